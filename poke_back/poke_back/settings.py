@@ -89,6 +89,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Base de tests en fichero: en memoria SQLite no espera a los locks y los tests concurrentes fallan
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
@@ -138,6 +142,45 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 AUTH_USER_MODEL = 'usuario.User'
 
+# Combates activos en memoria (usuario/services/battle_sessions.py).
+# CACHE_ALIAS=None usa un LRU en el proceso: solo con runserver o un único worker. Con varios
+# workers hay que apuntar CACHE_ALIAS a una caché compartida (Redis, Memcached).
+BATTLE_SESSIONS = {
+    'CACHE_ALIAS': None,
+    'MAX_SESSIONS': 1000,
+    'FLUSH_INTERVAL': 30,  # segundos tras los que el hilo de wsgi.py/asgi.py escribe un combate con cambios
+}
+
+# Registro de Pokémon, movimientos y ubicaciones en memoria (pokemon/services/game_data.py).
+# La marca de invalidación se guarda en CACHE_ALIAS; con una caché compartida llega a todos los procesos.
+GAME_DATA = {
+    'CACHE_ALIAS': 'default',
+    'CHECK_INTERVAL': 5,  # segundos entre comprobaciones de la marca
+}
+
+# Clasificación PvP (usuario/services/leaderboard.py): top N en CACHE_ALIAS, posiciones en memoria.
+# wsgi.py/asgi.py arrancan el hilo que carga el índice; sin él las posiciones se consultan en la base de datos.
+LEADERBOARD = {
+    'CACHE_ALIAS': 'default',
+    'TOP_SIZE': 50,
+    'TOP_TIMEOUT': 60,
+    'REFRESH_INTERVAL': 60,  # segundos entre recargas en segundo plano del índice de posiciones
+}
+
+# Streams SSE de PvP (usuario/services/pvp_events.py). Bajo WSGI cada stream abierto ocupa un
+# hilo del servidor: MAX_STREAMS debe quedar por debajo de los hilos de cada proceso.
+PVP_EVENTS = {
+    'MAX_STREAMS': 64,
+}
+
+# Cliente de PokeAPI de los comandos de carga (pokemon/services/pokeapi.py).
+POKEAPI = {
+    'BASE_URL': 'https://pokeapi.co/api/v2/',
+    'CACHE_DIR': BASE_DIR / 'pokeapi_cache',  # respuestas en disco: repetir una carga no pide nada
+    'WORKERS': 8,
+    'RATE_LIMIT': 10,  # peticiones por segundo entre todos los hilos
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
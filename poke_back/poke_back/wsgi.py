@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poke_back.settings')
 
 application = get_wsgi_application()
+
+# Índice de la clasificación PvP: se carga y se recarga en un hilo, nunca dentro de una petición
+from usuario.services.leaderboard import leaderboard  # noqa: E402
+
+leaderboard.start_background_refresh()
+
+# Combates en memoria: un hilo escribe los pendientes cada FLUSH_INTERVAL y todos al salir
+from usuario.services.battle_sessions import battle_sessions  # noqa: E402
+
+battle_sessions.start_background_flush()
@@ -0,0 +1,43 @@
+from rest_framework import viewsets, permissions
+from rest_framework.response import Response
+
+from pokemon.services.matchups import MAX_LEVEL, MIN_LEVEL, matchup_payload, matchup_table, rounded_rows
+
+
+class MatchupViewSet(viewsets.ViewSet):
+    """Tabla precalculada de daño esperado y turnos para debilitar entre todas las especies."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        try:
+            level = int(request.query_params.get('level', 50))
+        except ValueError:
+            return Response({'error': 'level debe ser un número'}, status=400)
+        if not MIN_LEVEL <= level <= MAX_LEVEL:
+            return Response({'error': f'level debe estar entre {MIN_LEVEL} y {MAX_LEVEL}'}, status=400)
+
+        pokedex_id = request.query_params.get('pokemon')
+        if pokedex_id is None:
+            return Response(matchup_payload(level))
+
+        table = matchup_table(level)
+        try:
+            index = table.index_of(int(pokedex_id))
+        except ValueError:
+            index = None
+        if index is None:
+            return Response({'error': 'Pokémon no encontrado'}, status=404)
+
+        # Fila (como atacante) y columna (como defensor) de una especie
+        return Response({
+            'level': level,
+            'pokedex_id': int(pokedex_id),
+            'name': table.names[index],
+            'pokedex_ids': table.pokedex_ids.tolist(),
+            'stats': table.stats[index].tolist(),
+            'move_ids': table.move_ids[index].tolist(),
+            'expected_damage_dealt': rounded_rows(table.expected_damage[index:index + 1])[0],
+            'expected_damage_taken': rounded_rows(table.expected_damage[:, index:index + 1].T)[0],
+            'turns_to_ko_dealt': rounded_rows(table.turns_to_ko[index:index + 1])[0],
+            'turns_to_ko_taken': rounded_rows(table.turns_to_ko[:, index:index + 1].T)[0],
+        })
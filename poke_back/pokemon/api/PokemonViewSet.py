@@ -4,6 +4,7 @@ from rest_framework.response import Response
 
 from pokemon.models.Pokemon import Pokemon
 from pokemon.models.PokemonMove import PokemonMove
+from pokemon.services.game_data import get_game_data
 
 
 class PokemonMoveSerializer(serializers.ModelSerializer):
@@ -43,14 +44,13 @@ class PokemonViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def starters(self, request):
-        starters = Pokemon.objects.filter(pokedex_id__in=[1, 4, 7])
+        game_data = get_game_data()
+        starters = [game_data.pokemon_by_pokedex(pokedex_id) for pokedex_id in (1, 4, 7)]
+        starters = [starter for starter in starters if starter is not None]
 
         starter_data = []
         for starter in starters:
-            initial_moves = PokemonMove.objects.filter(
-                pokemon=starter,
-                level__lte=5
-            )[:4]
+            initial_moves = game_data.moves_learned_up_to(starter.id, 5)[:4]
 
             moves_data = []
             for move in initial_moves:
@@ -64,7 +64,7 @@ class PokemonViewSet(viewsets.ReadOnlyModelViewSet):
                     'level_learned': move.level
                 })
 
-            evolved_pokemon = Pokemon.objects.filter(evolves_from=starter).first()
+            evolved_pokemon = next(iter(game_data.evolutions(starter.id)), None)
 
             starter_data.append({
                 'id': starter.id,
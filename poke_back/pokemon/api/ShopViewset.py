@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from pokemon.models.ShopItem import ShopItem
 from usuario.api.BagViewSet import BagSerializer
 from usuario.models.Bag import Bag
+from usuario.services.battle_sessions import battle_sessions
 
 
 class ShopItemSerializer(serializers.ModelSerializer):
@@ -34,6 +35,8 @@ class ShopViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'error': str(e)}, status=400)
 
         item = self.get_object()
+        # Un combate en memoria no debe volver a escribir el dinero de antes de la compra
+        battle_sessions.release_player(player)
         bag = Bag.objects.get(player=player)
 
         if player.money < item.price:
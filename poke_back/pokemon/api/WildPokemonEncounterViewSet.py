@@ -3,8 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 import random
 from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
+from pokemon.services.encounters import encounter_sampler
 from usuario.models.PlayerPokemon import PlayerPokemon
-from usuario.models.Pokedex import Pokedex
+from usuario.services.pokedex_progress import register_pokemons
 
 
 class WildPokemonEncounterSerializer(serializers.ModelSerializer):
@@ -44,32 +45,18 @@ class WildPokemonEncounterViewSet(viewsets.ReadOnlyModelViewSet):
         if not location_id:
             return Response({'error': 'Se requiere location_id'}, status=400)
 
-        encounters = WildPokemonEncounter.objects.filter(location_id=location_id)
-        if not encounters.exists():
-            return Response({'error': 'No hay Pokémon en esta ubicación'}, status=400)
-
-        rarity_weights = {
-            'common': 60,
-            'uncommon': 30,
-            'rare': 9,
-            'very_rare': 1
-        }
+        try:
+            encounters = encounter_sampler(int(location_id))
+        except (TypeError, ValueError):
+            return Response({'error': 'location_id inválido'}, status=400)
 
-        weighted_encounters = []
-        for encounter in encounters:
-            weighted_encounters.extend([encounter] * rarity_weights[encounter.rarity])
-
-        if not weighted_encounters:
-            return Response({'error': 'No se pudo generar encuentro'}, status=400)
+        if not encounters:
+            return Response({'error': 'No hay Pokémon en esta ubicación'}, status=400)
 
-        selected_encounter = random.choice(weighted_encounters)
+        selected_encounter = encounters.sample()
         level = random.randint(selected_encounter.min_level, selected_encounter.max_level)
 
-        Pokedex.objects.get_or_create(
-            player=player,
-            pokemon=selected_encounter.pokemon,
-            defaults={'state': 'seen'}
-        )
+        register_pokemons(player, [selected_encounter.pokemon])
 
         return Response({
             'pokemon': {
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PokemonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pokemon'
+
+    def ready(self):
+        from pokemon.services.game_data import connect_signals
+        connect_signals()
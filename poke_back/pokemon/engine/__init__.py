@@ -0,0 +1,8 @@
+from .structs import MoveData, Combatant, AttackRequest
+from .type_chart import (
+    TYPE_EFFECTIVENESS, TYPES, TYPE_INDEX, NO_TYPE, TYPE_MATRIX, DUAL_TYPE_TABLE,
+    type_index, effectiveness_by_index, get_type_effectiveness,
+    effectiveness_matrix
+)
+from .stats import STAT_NAMES, StatTable, base_stats, calculate_hp, calculate_stat, stats_at
+from .damage import calculate_damage, resolve_attacks
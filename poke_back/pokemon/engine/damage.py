@@ -0,0 +1,31 @@
+import random
+
+from .type_chart import effectiveness_by_index
+
+
+def calculate_damage(attacker, defender, move, rng=random):
+    if move.damage_class == 'status':
+        return 0
+
+    if move.damage_class == 'physical':
+        attack_stat = attacker.attack
+        defense_stat = defender.defense
+    else:
+        attack_stat = attacker.special_attack
+        defense_stat = defender.special_defense
+
+    level_factor = (2 * attacker.level) / 5 + 2
+    stat_factor = attack_stat / defense_stat
+
+    base_damage = (level_factor * move.power * stat_factor) / 50 + 2
+
+    base_damage *= effectiveness_by_index(move.type_id, defender.type1_id, defender.type2_id)
+
+    base_damage *= rng.uniform(0.85, 1.0)
+
+    return int(max(1, base_damage))
+
+
+def resolve_attacks(requests, rng=random):
+    """Calcula el daño de una lista de AttackRequest en una sola llamada, sin aplicarlo."""
+    return [calculate_damage(request.attacker, request.defender, request.move, rng) for request in requests]
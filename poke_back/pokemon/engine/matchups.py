@@ -0,0 +1,123 @@
+"""
+Tabla de enfrentamientos de todas las especies a un nivel dado. Requiere NumPy.
+
+Con la fórmula de stats de engine.stats y la de calculate_damage se calculan
+de una vez los stats de todas las especies y, para cada par atacante/defensor, el daño
+esperado del mejor de los 4 movimientos del atacante (best_moves, como el escalado a
+nivel 50 del PvP) y los turnos esperados para debilitar al defensor.
+
+El daño esperado incluye el factor aleatorio 0.85-1.0 y el redondeo hacia abajo (se
+promedia sobre RANDOM_SAMPLES valores del factor); los turnos son ceil(PS / daño esperado).
+"""
+from .simulation import MAX_MOVES, best_moves
+from .stats import STAT_NAMES, base_stats, stats_at
+from .type_chart import NO_TYPE, effectiveness_matrix, type_index
+
+RANDOM_SAMPLES = 16
+
+
+class MatchupTable:
+    """Arrays alineados por especie (en orden de Pokédex); fila = atacante, columna = defensor."""
+
+    ARRAYS = ('species_ids', 'pokedex_ids', 'stats', 'move_ids', 'expected_damage', 'best_move', 'turns_to_ko')
+
+    def __init__(self, level, names, species_ids, pokedex_ids, stats, move_ids, expected_damage, best_move,
+                 turns_to_ko):
+        self.level = level
+        self.names = list(names)
+        self.species_ids = species_ids
+        self.pokedex_ids = pokedex_ids
+        self.stats = stats
+        self.move_ids = move_ids
+        self.expected_damage = expected_damage
+        self.best_move = best_move
+        self.turns_to_ko = turns_to_ko
+        self._index = {int(pokedex_id): index for index, pokedex_id in enumerate(pokedex_ids)}
+
+    def index_of(self, pokedex_id):
+        return self._index.get(pokedex_id)
+
+    def save(self, path):
+        import numpy as np
+
+        np.savez_compressed(
+            path, level=np.int16(self.level), names=np.array(self.names),
+            **{name: getattr(self, name) for name in self.ARRAYS}
+        )
+
+    @classmethod
+    def load(cls, path):
+        import numpy as np
+
+        with np.load(path) as data:
+            return cls(int(data['level']), data['names'].tolist(), **{name: data[name] for name in cls.ARRAYS})
+
+
+def stat_arrays(species, level):
+    """Stats de todas las especies a ese nivel: array (especies x 6) en el orden de STAT_NAMES."""
+    import numpy as np
+
+    return np.array(
+        [stats_at(base_stats(spec), level) for spec in species], dtype=np.int64
+    ).reshape(len(species), len(STAT_NAMES))
+
+
+def compute_matchups(species, level):
+    import numpy as np
+
+    species = sorted(species, key=lambda spec: spec.pokedex_id)
+    count = len(species)
+    stats = stat_arrays(species, level)
+
+    # Movimientos de cada especie en 4 huecos; los vacíos tienen potencia 0 y se descartan con la máscara
+    power = np.zeros((count, MAX_MOVES))
+    move_type = np.full((count, MAX_MOVES), NO_TYPE, dtype=np.intp)
+    special = np.zeros((count, MAX_MOVES), dtype=bool)
+    damaging = np.zeros((count, MAX_MOVES), dtype=bool)
+    move_ids = np.full((count, MAX_MOVES), -1, dtype=np.int64)
+    for i, spec in enumerate(species):
+        for k, move in enumerate(best_moves(spec, level)):
+            power[i, k] = move.power
+            move_type[i, k] = move.type_id
+            special[i, k] = move.damage_class == 'special'
+            damaging[i, k] = move.damage_class != 'status'
+            move_ids[i, k] = move.id if move.id is not None else -1
+
+    attack = np.where(special, stats[:, 3:4], stats[:, 1:2]).astype(np.float64)          # (N, 4)
+    defense_physical = stats[:, 2].astype(np.float64)                                    # (N,)
+    defense_special = stats[:, 4].astype(np.float64)
+    defense = np.where(special[:, :, None], defense_special[None, None, :], defense_physical[None, None, :])
+
+    level_factor = (2 * level) / 5 + 2
+    base_damage = (level_factor * power[:, :, None] * attack[:, :, None] / defense) / 50 + 2  # (N, 4, N)
+
+    effectiveness = effectiveness_matrix(
+        move_type.ravel(),
+        [type_index(spec.type1) for spec in species],
+        [type_index(spec.type2) for spec in species],
+    ).reshape(count, MAX_MOVES, count)
+    base_damage *= effectiveness
+
+    factors = 0.85 + 0.15 * (np.arange(RANDOM_SAMPLES) + 0.5) / RANDOM_SAMPLES
+    samples = np.floor(np.maximum(1.0, base_damage[..., None] * factors))
+    expected = samples.mean(axis=-1)
+    expected[~np.broadcast_to(damaging[:, :, None], expected.shape)] = 0.0
+
+    best_move = expected.argmax(axis=1)                                                  # (N, N)
+    expected_damage = np.take_along_axis(expected, best_move[:, None, :], axis=1)[:, 0, :]
+
+    hp = stats[:, 0].astype(np.float64)[None, :]
+    with np.errstate(divide='ignore'):
+        turns_to_ko = np.where(expected_damage > 0, np.ceil(hp / expected_damage), np.inf)
+
+    return MatchupTable(
+        level,
+        [spec.name for spec in species],
+        np.array([spec.id for spec in species], dtype=np.int64),
+        np.array([spec.pokedex_id for spec in species], dtype=np.int32),
+        stats.astype(np.int32),
+        move_ids,
+        expected_damage.astype(np.float32),
+        best_move.astype(np.int8),
+        turns_to_ko.astype(np.float32),
+    )
@@ -0,0 +1,368 @@
+"""
+Simulador de combates sin HTTP ni ORM, para pruebas de equilibrio (Monte Carlo).
+
+Los datos (especies, movimientos por nivel, rutas y entrenadores) se copian una vez a
+estructuras simples que se pueden enviar a otros procesos. Cada trozo de simulaciones
+usa su propio random.Random con una semilla derivada, así que el resultado solo depende
+de la semilla y del tamaño de trozo, no del número de procesos.
+
+Reglas, las mismas que las vistas:
+- wild / trainer: el jugador ataca primero y el rival responde con un movimiento al azar;
+  el jugador gasta PP, el rival no.
+- pvp: 1 contra 1 a nivel 50 (por defecto); empieza el más rápido (empate al azar) y
+  se alterna un ataque por jugador.
+"""
+import random
+from collections import Counter, defaultdict
+
+from .damage import calculate_damage
+from .stats import StatTable
+from .structs import Combatant, MoveData
+
+MODES = ('wild', 'trainer', 'pvp')
+MAX_MOVES = 4
+DEFAULT_MAX_TURNS = 200
+DEFAULT_CHUNK_SIZE = 5000
+
+# Igual que battle_turns.FALLBACK_MOVE: se usa si no quedan movimientos o PP
+FALLBACK_MOVE = MoveData(None, 'Tackle', 'normal', 0)
+
+
+class SpeciesData:
+    __slots__ = ('id', 'pokedex_id', 'name', 'type1', 'type2', 'base_hp', 'base_attack', 'base_defense',
+                 'base_special_attack', 'base_special_defense', 'base_speed', 'learnset')
+
+    def __init__(self, id, pokedex_id, name, type1, type2, base_hp, base_attack, base_defense,
+                 base_special_attack, base_special_defense, base_speed, learnset=()):
+        self.id = id
+        self.pokedex_id = pokedex_id
+        self.name = name
+        self.type1 = type1
+        self.type2 = type2
+        self.base_hp = base_hp
+        self.base_attack = base_attack
+        self.base_defense = base_defense
+        self.base_special_attack = base_special_attack
+        self.base_special_defense = base_special_defense
+        self.base_speed = base_speed
+        # (nivel, MoveData) ordenado por nivel
+        self.learnset = tuple(learnset)
+
+    def __repr__(self):
+        return f"SpeciesData({self.pokedex_id}: {self.name})"
+
+    @classmethod
+    def from_model(cls, pokemon, pokemon_moves=()):
+        return cls(
+            pokemon.id, pokemon.pokedex_id, pokemon.name, pokemon.type1, pokemon.type2,
+            pokemon.base_hp, pokemon.base_attack, pokemon.base_defense,
+            pokemon.base_special_attack, pokemon.base_special_defense, pokemon.base_speed,
+            [(pm.level, MoveData.from_model(pm.move)) for pm in pokemon_moves]
+        )
+
+    def learned_up_to(self, level):
+        return [move for move_level, move in self.learnset if move_level <= level]
+
+
+class RouteData:
+    __slots__ = ('id', 'name', 'encounters', 'weights', 'cum_weights')
+
+    def __init__(self, id, name, encounters, weights):
+        self.id = id
+        self.name = name
+        # (species_id, min_level, max_level)
+        self.encounters = tuple(encounters)
+        self.weights = tuple(weights)
+        self.cum_weights = []
+        total = 0
+        for weight in weights:
+            total += weight
+            self.cum_weights.append(total)
+
+    def sample(self, rng):
+        return rng.choices(self.encounters, cum_weights=self.cum_weights)[0]
+
+    def sample_excluding(self, species_ids, rng):
+        remaining = [(encounter, weight) for encounter, weight in zip(self.encounters, self.weights)
+                     if encounter[0] not in species_ids]
+        if not remaining:
+            return None
+        encounters, weights = zip(*remaining)
+        return rng.choices(encounters, weights=weights)[0]
+
+
+class SimulationData:
+    def __init__(self, species, routes=(), trainer_types=(), trainer_type_weights=(),
+                 trainer_team_sizes=None, trainer_levels=None):
+        self.species = {spec.id: spec for spec in species}
+        self.stat_table = StatTable(self.species.values())
+        self.routes = tuple(route for route in routes if route.encounters)
+        self.trainer_types = tuple(trainer_types)
+        self.trainer_type_weights = tuple(trainer_type_weights)
+        self.trainer_team_sizes = dict(trainer_team_sizes or {})
+        self.trainer_levels = dict(trainer_levels or {})
+
+
+def first_moves(spec, level):
+    """Los 4 primeros movimientos aprendidos (salvajes)."""
+    return tuple(spec.learned_up_to(level)[:MAX_MOVES])
+
+
+def latest_moves(spec, level):
+    """Los 4 últimos movimientos aprendidos (entrenadores)."""
+    return tuple(spec.learned_up_to(level)[::-1][:MAX_MOVES])
+
+
+def best_moves(spec, level):
+    """Los 4 mejores por la puntuación de PvPBattleViewSet.scale_pokemon_to_level_50."""
+    scored = []
+    for move_level, move in spec.learnset:
+        if move_level > level:
+            break
+        score = (1000 if move.damage_class != 'status' else 0) + move.power + move_level * 10
+        scored.append((score, move))
+    scored.sort(key=lambda item: item[0], reverse=True)
+
+    moves = []
+    for score, move in scored:
+        if all(move.id != known.id for known in moves):
+            moves.append(move)
+        if len(moves) == MAX_MOVES:
+            break
+    return tuple(moves)
+
+
+class Fighter:
+    __slots__ = ('spec', 'combatant', 'moves', 'pp')
+
+    def __init__(self, spec, level, moves, stat_table, track_pp=False):
+        self.spec = spec
+        self.combatant = Combatant.from_species(spec, level, stats=stat_table.get(spec, level))
+        self.moves = moves
+        self.pp = [move.pp for move in moves] if track_pp else None
+
+    def choose_move(self, rng):
+        if not self.moves:
+            return FALLBACK_MOVE
+        if self.pp is None:
+            return rng.choice(self.moves)
+
+        available = [index for index, pp in enumerate(self.pp) if pp > 0]
+        if not available:
+            return FALLBACK_MOVE
+        index = rng.choice(available)
+        self.pp[index] -= 1
+        return self.moves[index]
+
+
+class SimulationStats:
+    def __init__(self):
+        self.battles = 0
+        self.turns = 0
+        self.draws = 0
+        self.side_wins = [0, 0]
+        # species_id -> [combates, victorias, turnos]
+        self.species = {}
+        self.species_damage = defaultdict(Counter)
+        self.move_damage = defaultdict(Counter)
+
+    def record_attack(self, species_id, move_name, damage):
+        self.species_damage[species_id][damage] += 1
+        self.move_damage[move_name][damage] += 1
+
+    def record_battle(self, teams, winner, turns):
+        self.battles += 1
+        self.turns += turns
+        if winner is None:
+            self.draws += 1
+        else:
+            self.side_wins[winner] += 1
+
+        for side, team in enumerate(teams):
+            for species_id in {fighter.spec.id for fighter in team}:
+                entry = self.species.setdefault(species_id, [0, 0, 0])
+                entry[0] += 1
+                entry[1] += 1 if winner == side else 0
+                entry[2] += turns
+
+    def merge(self, other):
+        self.battles += other.battles
+        self.turns += other.turns
+        self.draws += other.draws
+        self.side_wins[0] += other.side_wins[0]
+        self.side_wins[1] += other.side_wins[1]
+        for species_id, (battles, wins, turns) in other.species.items():
+            entry = self.species.setdefault(species_id, [0, 0, 0])
+            entry[0] += battles
+            entry[1] += wins
+            entry[2] += turns
+        for species_id, damages in other.species_damage.items():
+            self.species_damage[species_id].update(damages)
+        for move_name, damages in other.move_damage.items():
+            self.move_damage[move_name].update(damages)
+        return self
+
+
+def distribution_summary(damages):
+    """Media, percentiles 10/50/90 y máximo de un Counter {daño: veces}."""
+    total = sum(damages.values())
+    if not total:
+        return {'count': 0, 'mean': 0, 'p10': 0, 'p50': 0, 'p90': 0, 'max': 0}
+
+    marks = {'p10': 0.1 * total, 'p50': 0.5 * total, 'p90': 0.9 * total}
+    summary = {'count': total, 'mean': sum(d * n for d, n in damages.items()) / total, 'max': max(damages)}
+    seen = 0
+    for damage in sorted(damages):
+        seen += damages[damage]
+        for key, mark in list(marks.items()):
+            if seen >= mark:
+                summary[key] = damage
+                del marks[key]
+    return summary
+
+
+def fight(teams, first, rng, stats, max_turns=DEFAULT_MAX_TURNS):
+    """Combate por turnos alternos; devuelve el lado ganador (0/1) o None si se agotan los turnos."""
+    active = [0, 0]
+    attacker = first
+    actions = 0
+
+    while actions < max_turns * 2:
+        defender = 1 - attacker
+        fighter = teams[attacker][active[attacker]]
+        target = teams[defender][active[defender]]
+
+        move = fighter.choose_move(rng)
+        damage = calculate_damage(fighter.combatant, target.combatant, move, rng)
+        target.combatant.current_hp = max(0, target.combatant.current_hp - damage)
+        stats.record_attack(fighter.spec.id, move.name, damage)
+        actions += 1
+
+        if target.combatant.current_hp <= 0:
+            active[defender] += 1
+            if active[defender] >= len(teams[defender]):
+                stats.record_battle(teams, attacker, (actions + 1) // 2)
+                return attacker
+
+        attacker = defender
+
+    stats.record_battle(teams, None, max_turns)
+    return None
+
+
+def pick_species(data, species_ids, rng):
+    return data.species[rng.choice(species_ids)]
+
+
+def wild_battle(data, species_ids, level, rng, stats, max_turns):
+    route = data.routes[rng.randrange(len(data.routes))]
+    species_id, min_level, max_level = route.sample(rng)
+    wild_spec = data.species[species_id]
+    wild_level = rng.randint(min_level, max_level)
+
+    player_spec = pick_species(data, species_ids, rng)
+    player_level = level or wild_level
+    player = Fighter(player_spec, player_level, best_moves(player_spec, player_level), data.stat_table,
+                     track_pp=True)
+    wild = Fighter(wild_spec, wild_level, first_moves(wild_spec, wild_level), data.stat_table)
+    return fight(([player], [wild]), 0, rng, stats, max_turns)
+
+
+def trainer_battle(data, species_ids, level, rng, stats, max_turns):
+    route = data.routes[rng.randrange(len(data.routes))]
+    trainer_type = rng.choices(data.trainer_types, weights=data.trainer_type_weights)[0]
+    min_size, max_size = data.trainer_team_sizes[trainer_type]
+    min_level, max_level = data.trainer_levels[trainer_type]
+
+    team = []
+    used = set()
+    for _ in range(rng.randint(min_size, max_size)):
+        species_id = route.sample(rng)[0]
+        if species_id in used:
+            other = route.sample_excluding(used, rng)
+            if other is not None:
+                species_id = other[0]
+        used.add(species_id)
+        spec = data.species[species_id]
+        member_level = rng.randint(min_level, max_level)
+        team.append(Fighter(spec, member_level, latest_moves(spec, member_level), data.stat_table))
+
+    player_spec = pick_species(data, species_ids, rng)
+    player_level = level or max(fighter.combatant.level for fighter in team)
+    player = Fighter(player_spec, player_level, best_moves(player_spec, player_level), data.stat_table,
+                     track_pp=True)
+    return fight(([player], team), 0, rng, stats, max_turns)
+
+
+def pvp_battle(data, species_ids, level, rng, stats, max_turns):
+    level = level or 50
+    fighters = []
+    for _ in range(2):
+        spec = pick_species(data, species_ids, rng)
+        fighters.append(Fighter(spec, level, best_moves(spec, level), data.stat_table, track_pp=True))
+
+    speed1, speed2 = fighters[0].combatant.speed, fighters[1].combatant.speed
+    first = 0 if speed1 > speed2 else 1 if speed2 > speed1 else rng.randrange(2)
+    return fight(([fighters[0]], [fighters[1]]), first, rng, stats, max_turns)
+
+
+BATTLES = {
+    'wild': wild_battle,
+    'trainer': trainer_battle,
+    'pvp': pvp_battle,
+}
+
+# Datos del proceso trabajador; se fijan una vez en init_worker
+_worker_data = None
+
+
+def init_worker(data):
+    global _worker_data
+    _worker_data = data
+
+
+def run_chunk(task):
+    mode, count, seed, species_ids, level, max_turns = task
+    rng = random.Random(seed)
+    stats = SimulationStats()
+    battle = BATTLES[mode]
+    for _ in range(count):
+        battle(_worker_data, species_ids, level, rng, stats, max_turns)
+    return stats
+
+
+def chunk_tasks(mode, battles, seed, species_ids, level, max_turns, chunk_size):
+    tasks = []
+    for index, start in enumerate(range(0, battles, chunk_size)):
+        count = min(chunk_size, battles - start)
+        tasks.append((mode, count, seed * 1_000_003 + index, tuple(species_ids), level, max_turns))
+    return tasks
+
+
+def simulate(data, mode, battles, seed=0, workers=1, species_ids=None, level=None,
+             max_turns=DEFAULT_MAX_TURNS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Ejecuta battles combates en workers procesos y devuelve un SimulationStats agregado."""
+    if mode not in BATTLES:
+        raise ValueError(f'Modo desconocido: {mode}')
+    if mode in ('wild', 'trainer') and not data.routes:
+        raise ValueError('No hay rutas con encuentros salvajes')
+
+    species_ids = list(species_ids or data.species)
+    if not species_ids:
+        raise ValueError('No hay especies para simular')
+
+    tasks = chunk_tasks(mode, battles, seed, species_ids, level, max_turns, chunk_size)
+    total = SimulationStats()
+
+    if workers <= 1:
+        init_worker(data)
+        for task in tasks:
+            total.merge(run_chunk(task))
+        return total
+
+    import multiprocessing
+
+    with multiprocessing.Pool(processes=workers, initializer=init_worker, initargs=(data,)) as pool:
+        for stats in pool.imap_unordered(run_chunk, tasks):
+            total.merge(stats)
+    return total
@@ -0,0 +1,50 @@
+"""
+Fórmula de stats, única para todo el juego.
+
+StatTable precalcula los seis stats de cada especie en los niveles 1-100; consultar
+los stats de una especie a un nivel queda en un acceso por índice. Las especies o
+niveles que no están en la tabla se calculan al momento con la misma fórmula.
+"""
+STAT_NAMES = ('hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed')
+MIN_LEVEL = 1
+MAX_LEVEL = 100
+
+
+def calculate_hp(base_hp, level):
+    return int((2 * base_hp * level) / 100) + level + 10
+
+
+def calculate_stat(base_stat, level):
+    return int((2 * base_stat * level) / 100) + 5
+
+
+def base_stats(species):
+    """Stats base de un Pokemon (o SpeciesData) en el orden de STAT_NAMES."""
+    return (species.base_hp, species.base_attack, species.base_defense,
+            species.base_special_attack, species.base_special_defense, species.base_speed)
+
+
+def stats_at(base, level):
+    return (calculate_hp(base[0], level),) + tuple(calculate_stat(stat, level) for stat in base[1:])
+
+
+class StatTable:
+    """Stats de cada especie (por id) en cada nivel, como tuplas en el orden de STAT_NAMES."""
+
+    def __init__(self, species=()):
+        self._rows = {}
+        for spec in species:
+            base = base_stats(spec)
+            self._rows[spec.id] = tuple(stats_at(base, level) for level in range(MIN_LEVEL, MAX_LEVEL + 1))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, species, level):
+        row = self._rows.get(species.id)
+        if row is None or not MIN_LEVEL <= level <= MAX_LEVEL:
+            return stats_at(base_stats(species), level)
+        return row[level - MIN_LEVEL]
+
+    def as_dict(self, species, level):
+        return dict(zip(STAT_NAMES, self.get(species, level)))
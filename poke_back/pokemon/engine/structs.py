@@ -0,0 +1,103 @@
+from .stats import base_stats, stats_at
+from .type_chart import type_index
+
+
+class MoveData:
+    __slots__ = ('id', 'name', 'type', 'type_id', 'power', 'accuracy', 'pp', 'damage_class')
+
+    def __init__(self, id, name, type, power=0, accuracy=100, pp=0, damage_class='physical'):
+        self.id = id
+        self.name = name
+        self.type = type
+        self.type_id = type_index(type)
+        self.power = power or 0
+        self.accuracy = accuracy
+        self.pp = pp
+        self.damage_class = damage_class
+
+    def __repr__(self):
+        return f"MoveData({self.name}, {self.type}, {self.power})"
+
+    @classmethod
+    def from_model(cls, move):
+        return cls(move.id, move.name, move.type, move.power, move.accuracy, move.pp, move.damage_class)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get('id'),
+            data['name'],
+            data['type'],
+            data.get('power', 0),
+            data.get('accuracy', 100),
+            data.get('pp', 0),
+            data.get('damage_class', 'physical')
+        )
+
+
+class Combatant:
+    __slots__ = ('name', 'level', 'type1', 'type2', 'type1_id', 'type2_id', 'max_hp', 'current_hp', 'attack', 'defense',
+                 'special_attack', 'special_defense', 'speed')
+
+    def __init__(self, name, level, type1, type2, max_hp, current_hp, attack, defense,
+                 special_attack, special_defense, speed):
+        self.name = name
+        self.level = level
+        self.type1 = type1
+        self.type2 = type2
+        self.type1_id = type_index(type1)
+        self.type2_id = type_index(type2)
+        self.max_hp = max_hp
+        self.current_hp = current_hp
+        self.attack = attack
+        self.defense = defense
+        self.special_attack = special_attack
+        self.special_defense = special_defense
+        self.speed = speed
+
+    def __repr__(self):
+        return f"Combatant({self.name} Lv.{self.level} {self.current_hp}/{self.max_hp})"
+
+    @property
+    def types(self):
+        return (self.type1, self.type2) if self.type2 else (self.type1,)
+
+    @classmethod
+    def from_player_pokemon(cls, player_pokemon):
+        species = player_pokemon.pokemon
+        return cls(
+            species.name, player_pokemon.level, species.type1, species.type2,
+            player_pokemon.hp, player_pokemon.current_hp,
+            player_pokemon.attack, player_pokemon.defense,
+            player_pokemon.special_attack, player_pokemon.special_defense,
+            player_pokemon.speed
+        )
+
+    @classmethod
+    def from_species(cls, species, level, current_hp=None, stats=None):
+        """stats: los seis stats ya calculados (StatTable.get); si no se pasan, se calculan."""
+        hp, attack, defense, special_attack, special_defense, speed = stats or stats_at(base_stats(species), level)
+        return cls(
+            species.name, level, species.type1, species.type2,
+            hp, hp if current_hp is None else current_hp,
+            attack, defense, special_attack, special_defense, speed
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['pokemon_name'], data['level'], data['type1'], data.get('type2'),
+            data['max_hp'], data['current_hp'],
+            data['attack'], data['defense'],
+            data['special_attack'], data['special_defense'],
+            data['speed']
+        )
+
+
+class AttackRequest:
+    __slots__ = ('attacker', 'defender', 'move')
+
+    def __init__(self, attacker, defender, move):
+        self.attacker = attacker
+        self.defender = defender
+        self.move = move
@@ -0,0 +1,99 @@
+TYPE_EFFECTIVENESS = {
+    'normal': {'rock': 0.5, 'ghost': 0, 'steel': 0.5},
+    'fire': {'fire': 0.5, 'water': 0.5, 'grass': 2, 'ice': 2, 'bug': 2, 'rock': 0.5, 'dragon': 0.5, 'steel': 2},
+    'water': {'fire': 2, 'water': 0.5, 'grass': 0.5, 'ground': 2, 'rock': 2, 'dragon': 0.5},
+    'electric': {'water': 2, 'electric': 0.5, 'grass': 0.5, 'ground': 0, 'flying': 2, 'dragon': 0.5},
+    'grass': {'fire': 0.5, 'water': 2, 'grass': 0.5, 'poison': 0.5, 'ground': 2, 'flying': 0.5, 'bug': 0.5,
+              'rock': 2, 'dragon': 0.5, 'steel': 0.5},
+    'ice': {'fire': 0.5, 'water': 0.5, 'grass': 2, 'ice': 0.5, 'ground': 2, 'flying': 2, 'dragon': 2, 'steel': 0.5},
+    'fighting': {'normal': 2, 'ice': 2, 'poison': 0.5, 'flying': 0.5, 'psychic': 0.5, 'bug': 0.5, 'rock': 2,
+                 'ghost': 0, 'dark': 2, 'steel': 2, 'fairy': 0.5},
+    'poison': {'grass': 2, 'poison': 0.5, 'ground': 0.5, 'rock': 0.5, 'ghost': 0.5, 'steel': 0, 'fairy': 2},
+    'ground': {'fire': 2, 'electric': 2, 'grass': 0.5, 'poison': 2, 'flying': 0, 'bug': 0.5, 'rock': 2, 'steel': 2},
+    'flying': {'electric': 0.5, 'grass': 2, 'fighting': 2, 'bug': 2, 'rock': 0.5, 'steel': 0.5},
+    'psychic': {'fighting': 2, 'poison': 2, 'psychic': 0.5, 'dark': 0, 'steel': 0.5},
+    'bug': {'fire': 0.5, 'grass': 2, 'fighting': 0.5, 'poison': 0.5, 'flying': 0.5, 'psychic': 2, 'ghost': 0.5,
+            'dark': 2, 'steel': 0.5, 'fairy': 0.5},
+    'rock': {'fire': 2, 'ice': 2, 'fighting': 0.5, 'ground': 0.5, 'flying': 2, 'bug': 2, 'steel': 0.5},
+    'ghost': {'normal': 0, 'psychic': 2, 'ghost': 2, 'dark': 0.5},
+    'dragon': {'dragon': 2, 'steel': 0.5, 'fairy': 0},
+    'dark': {'fighting': 0.5, 'psychic': 2, 'ghost': 2, 'dark': 0.5, 'fairy': 0.5},
+    'steel': {'fire': 0.5, 'water': 0.5, 'electric': 0.5, 'ice': 2, 'rock': 2, 'steel': 0.5, 'fairy': 2},
+    'fairy': {'fire': 0.5, 'fighting': 2, 'poison': 0.5, 'dragon': 2, 'dark': 2, 'steel': 0.5}
+}
+
+# Mismo orden que Pokemon.POKEMON_TYPES / Move.POKEMON_TYPES
+TYPES = ('normal', 'fire', 'water', 'electric', 'grass', 'ice', 'fighting', 'poison', 'ground',
+         'flying', 'psychic', 'bug', 'rock', 'ghost', 'dragon', 'dark', 'steel', 'fairy')
+TYPE_INDEX = {name: index for index, name in enumerate(TYPES)}
+
+# Índice extra para "sin tipo" (type2 vacío o tipo de movimiento desconocido): siempre x1
+NO_TYPE = len(TYPES)
+_SIZE = NO_TYPE + 1
+
+# Matriz 18x18: TYPE_MATRIX[tipo_movimiento][tipo_defensor]
+TYPE_MATRIX = tuple(
+    tuple(float(TYPE_EFFECTIVENESS[attacking].get(defending, 1.0)) for defending in TYPES)
+    for attacking in TYPES
+)
+
+
+def _build_dual_table():
+    rows = [list(row) + [1.0] for row in TYPE_MATRIX]
+    rows.append([1.0] * _SIZE)
+
+    table = []
+    for move_row in rows:
+        for type1 in range(_SIZE):
+            for type2 in range(_SIZE):
+                if type1 == type2:
+                    # Un tipo repetido no se aplica dos veces
+                    table.append(move_row[type1])
+                else:
+                    table.append(move_row[type1] * move_row[type2])
+    return tuple(table)
+
+
+# Tabla plana de todas las combinaciones (tipo movimiento, type1, type2),
+# indexada como (move_type_id * _SIZE + type1_id) * _SIZE + type2_id
+DUAL_TYPE_TABLE = _build_dual_table()
+
+
+def type_index(type_name):
+    if not type_name:
+        return NO_TYPE
+    return TYPE_INDEX.get(type_name, NO_TYPE)
+
+
+def effectiveness_by_index(move_type_id, type1_id, type2_id=NO_TYPE):
+    return DUAL_TYPE_TABLE[(move_type_id * _SIZE + type1_id) * _SIZE + type2_id]
+
+
+def get_type_effectiveness(move_type, defender_types):
+    type1 = defender_types[0] if len(defender_types) > 0 else None
+    type2 = defender_types[1] if len(defender_types) > 1 else None
+    return effectiveness_by_index(type_index(move_type), type_index(type1), type_index(type2))
+
+
+_numpy_table = None
+
+
+def _get_numpy_table():
+    global _numpy_table
+    if _numpy_table is None:
+        import numpy as np
+
+        _numpy_table = np.array(DUAL_TYPE_TABLE, dtype=np.float64).reshape(_SIZE, _SIZE, _SIZE)
+    return _numpy_table
+
+
+def effectiveness_matrix(move_type_ids, type1_ids, type2_ids):
+    """Efectividad de cada movimiento contra cada defensor: array (movimientos x defensores). Requiere NumPy."""
+    import numpy as np
+
+    table = _get_numpy_table()
+    moves = np.asarray(move_type_ids, dtype=np.intp)[:, None]
+    type1 = np.asarray(type1_ids, dtype=np.intp)[None, :]
+    type2 = np.asarray(type2_ids, dtype=np.intp)[None, :]
+    return table[moves, type1, type2]
+
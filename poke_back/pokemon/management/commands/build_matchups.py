@@ -0,0 +1,33 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pokemon.services.matchups import MAX_LEVEL, MIN_LEVEL, matchup_table
+
+
+class Command(BaseCommand):
+    help = 'Calcula la tabla de enfrentamientos de todas las especies a un nivel y la guarda en un .npz'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--level', type=int, default=50)
+        parser.add_argument('--output', help='Fichero .npz de salida (por defecto matchups_L<nivel>.npz)')
+
+    def handle(self, *args, **options):
+        level = options['level']
+        if not MIN_LEVEL <= level <= MAX_LEVEL:
+            raise CommandError(f'El nivel debe estar entre {MIN_LEVEL} y {MAX_LEVEL}')
+
+        table = matchup_table(level)
+        if not len(table.pokedex_ids):
+            raise CommandError('No hay Pokémon cargados; ejecuta load_pokemon_data primero')
+
+        output = options['output'] or f'matchups_L{level}.npz'
+        table.save(output)
+        # savez_compressed añade .npz si falta
+        if not output.endswith('.npz'):
+            output += '.npz'
+
+        count = len(table.pokedex_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Tabla {count}x{count} a nivel {level} guardada en {output} ({os.path.getsize(output) / 1024:.1f} KB)'
+        ))
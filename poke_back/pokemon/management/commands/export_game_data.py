@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pokemon.models.Pokemon import Pokemon
+from pokemon.services.game_data_bundle import export_bundle
+
+DEFAULT_BUNDLE = 'game_data.json.gz'
+
+
+class Command(BaseCommand):
+    help = 'Guarda Pokémon, movimientos, ubicaciones, encuentros y tienda en un paquete comprimido'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=DEFAULT_BUNDLE, help=f'Fichero de salida (por defecto {DEFAULT_BUNDLE})')
+
+    def handle(self, *args, **options):
+        if not Pokemon.objects.exists():
+            raise CommandError('No hay Pokémon cargados; ejecuta load_pokemon_data primero')
+
+        content_hash, counts = export_bundle(options['output'])
+
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'{options["output"]} ({content_hash[:12]}): {summary}'))
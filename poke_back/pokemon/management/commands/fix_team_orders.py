@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from usuario.models.Player import Player
+from usuario.models.PlayerPokemon import PlayerPokemon
 
 
 class Command(BaseCommand):
@@ -8,17 +9,10 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         self.stdout.write('Corrigiendo órdenes de equipos...')
 
-        players = Player.objects.all()
+        players = Player.objects.select_related('user')
 
         for player in players:
-            team_pokemons = player.pokemons.filter(in_team=True).order_by('order', 'id')
-
-            fixed_count = 0
-            for new_order, pokemon in enumerate(team_pokemons):
-                if pokemon.order != new_order:
-                    pokemon.order = new_order
-                    pokemon.save(update_fields=['order'])
-                    fixed_count += 1
+            fixed_count = PlayerPokemon.reorder_team(player.id)
 
             if fixed_count > 0:
                 self.stdout.write(f'Jugador {player.user.username}: {fixed_count} Pokémon reordenados')
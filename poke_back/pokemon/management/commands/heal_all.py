@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from usuario.services.healing import heal_players
+
+
+class Command(BaseCommand):
+    help = 'Cura PS y PP de los Pokémon de todos los jugadores (o de los indicados) en dos consultas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, nargs='+', help='Ids de jugador (por defecto, todos)')
+        parser.add_argument('--boxes', action='store_true', help='Cura también los Pokémon de la reserva')
+
+    def handle(self, *args, **options):
+        healed = heal_players(options['players'], include_boxes=options['boxes'])
+        self.stdout.write(self.style.SUCCESS(f'{healed} Pokémon curados'))
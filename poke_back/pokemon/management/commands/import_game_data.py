@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pokemon.management.commands.export_game_data import DEFAULT_BUNDLE
+from pokemon.services.game_data_bundle import BundleError, import_bundle
+
+
+class Command(BaseCommand):
+    help = 'Carga un paquete de export_game_data en una sola transacción, sin conexión'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--input', default=DEFAULT_BUNDLE, help=f'Paquete a cargar (por defecto {DEFAULT_BUNDLE})')
+        parser.add_argument('--replace', action='store_true',
+                            help='Sustituye los datos del juego existentes (actualiza por id; los datos de jugadores se conservan)')
+
+    def handle(self, *args, **options):
+        try:
+            content_hash, counts, loaded = import_bundle(options['input'], replace=options['replace'])
+        except BundleError as e:
+            raise CommandError(str(e))
+
+        if not loaded:
+            self.stdout.write(f'Los datos del juego ya coinciden con {options["input"]} ({content_hash[:12]})')
+            return
+
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Cargado {options["input"]} ({content_hash[:12]}): {summary}'))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from pokemon.models.Location import Location
+from pokemon.services.game_data import invalidate_game_data
 
 
 class Command(BaseCommand):
@@ -217,4 +218,5 @@ class Command(BaseCommand):
         locations['Ruta 23'].connected_locations.add(locations['Ciudad Plateada'])
         locations['Ciudad Plateada'].connected_locations.add(locations['Ruta 23'])
 
+        invalidate_game_data()
         self.stdout.write(self.style.SUCCESS('Ubicaciones cargadas exitosamente!'))
\ No newline at end of file
@@ -1,41 +1,121 @@
-import requests
-import time
+import os
+
 from django.core.management.base import BaseCommand
 from pokemon.models.Pokemon import Pokemon
 from pokemon.models.Move import Move
 from pokemon.models.PokemonMove import PokemonMove
+from pokemon.services.game_data import invalidate_game_data
+from pokemon.services.pokeapi import Checkpoint, PokeApiClient
+
+KANTO_POKEMON = 151
+LEVEL_UP_VERSIONS = ('red-blue', 'yellow')
+BATCH_SIZE = 500
+
+MOVE_FIELDS = ('type', 'power', 'accuracy', 'pp', 'damage_class')
+DEFAULT_MOVE = {
+    'type': 'normal',
+    'power': 0,
+    'accuracy': 0,
+    'pp': 0,
+    'damage_class': 'physical',
+}
 
 
 class Command(BaseCommand):
     help = 'Carga los datos completos de los 151 Pokémon de Kanto desde PokeAPI'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=KANTO_POKEMON, help='Pokémon a cargar (desde el nº 1)')
+        parser.add_argument('--workers', type=int, help='Peticiones en paralelo (POKEAPI["WORKERS"])')
+        parser.add_argument('--rate', type=float, help='Peticiones por segundo como máximo (POKEAPI["RATE_LIMIT"])')
+        parser.add_argument('--base-url', help='URL base de la API (espejo o servidor de pruebas)')
+        parser.add_argument('--cache-dir', help='Directorio de la caché de respuestas (POKEAPI["CACHE_DIR"])')
+        parser.add_argument('--offline', action='store_true', help='Usa solo la caché, sin conexión')
+        parser.add_argument('--restart', action='store_true', help='Ignora el punto de control y empieza de cero')
+
     def handle(self, *args, **options):
-        self.stdout.write('Cargando datos completos de Pokémon...')
+        self.client = PokeApiClient(
+            base_url=options['base_url'], cache_dir=options['cache_dir'], workers=options['workers'],
+            rate_limit=options['rate'], offline=options['offline']
+        )
+        checkpoint = Checkpoint(os.path.join(self.client.cache.directory, 'load_pokemon_data.checkpoint.json'))
+        if options['restart']:
+            checkpoint.clear()
+
+        pokedex_ids = range(1, options['count'] + 1)
+
+        self.stdout.write('Descargando datos de Pokémon...')
+        responses, errors = self.client.get_many(
+            [f'pokemon/{i}/' for i in pokedex_ids] + [f'pokemon-species/{i}/' for i in pokedex_ids]
+        )
+
+        # Movimientos y cadenas de evolución, también en paralelo
+        extra_urls = []
+        for i in pokedex_ids:
+            data = responses.get(f'pokemon/{i}/')
+            species_data = responses.get(f'pokemon-species/{i}/')
+            if data:
+                extra_urls += [move_data['move']['url'] for move_data in self.level_up_moves(data['moves'])]
+            if species_data and species_data.get('evolution_chain'):
+                extra_urls.append(species_data['evolution_chain']['url'])
+        extra_responses, extra_errors = self.client.get_many(extra_urls)
+        responses.update(extra_responses)
+        errors.update(extra_errors)
+
+        for url, error in errors.items():
+            self.stdout.write(self.style.ERROR(error))
+        self.stdout.write(f'{len(responses)} respuestas ({self.client.requests_made} peticiones a la API)')
 
         # Primero cargar todos los Pokémon básicos
-        for i in range(1, 152):
-            self.load_pokemon_basic_data(i)
-            time.sleep(0.5)  # Esperar para no sobrecargar la API
+        done = checkpoint.done('pokemon')
+        for i in pokedex_ids:
+            if i in done:
+                continue
+            if self.load_pokemon_basic_data(i, responses):
+                checkpoint.mark('pokemon', i)
 
-        # Luego cargar las evoluciones
+        # Movimientos y aprendizajes de todas las especies en bloque (no depende del punto de control)
+        self.stdout.write('Cargando movimientos...')
+        self.load_learnsets(pokedex_ids, responses)
+
+        # Luego cargar las evoluciones (una vez por cadena)
         self.stdout.write('Cargando evoluciones...')
-        for i in range(1, 152):
-            self.load_evolution_data(i)
-            time.sleep(0.5)
+        done = checkpoint.done('evolution_chains')
+        chain_urls = dict.fromkeys(
+            responses[f'pokemon-species/{i}/']['evolution_chain']['url']
+            for i in pokedex_ids
+            if responses.get(f'pokemon-species/{i}/', {}).get('evolution_chain')
+        )
+        for chain_url in chain_urls:
+            if chain_url in done or chain_url not in responses:
+                continue
+            self.process_evolution_chain(responses[chain_url]['chain'])
+            checkpoint.mark('evolution_chains', chain_url)
+
+        invalidate_game_data()
+
+        if errors:
+            self.stdout.write(self.style.WARNING(
+                f'{len(errors)} descargas fallidas: vuelve a ejecutar el comando para retomar la carga'
+            ))
+            return
 
+        checkpoint.clear()
         self.stdout.write(self.style.SUCCESS('Datos completos de Pokémon cargados exitosamente!'))
 
-    def load_pokemon_basic_data(self, pokemon_id):
-        try:
-            # Obtener datos del Pokémon
-            url = f'https://pokeapi.co/api/v2/pokemon/{pokemon_id}/'
-            response = requests.get(url)
-            data = response.json()
+    def level_up_moves(self, moves_data):
+        return [
+            move_data for move_data in moves_data
+            if any(version['move_learn_method']['name'] == 'level-up'
+                   and version['version_group']['name'] in LEVEL_UP_VERSIONS
+                   and version['level_learned_at'] > 0
+                   for version in move_data['version_group_details'])
+        ]
 
-            # Obtener datos de la especie
-            species_url = f'https://pokeapi.co/api/v2/pokemon-species/{pokemon_id}/'
-            species_response = requests.get(species_url)
-            species_data = species_response.json()
+    def load_pokemon_basic_data(self, pokemon_id, responses):
+        try:
+            data = responses[f'pokemon/{pokemon_id}/']
+            species_data = responses[f'pokemon-species/{pokemon_id}/']
 
             # Determinar si evoluciona de otro Pokémon
             evolves_from = None
@@ -66,32 +146,13 @@ class Command(BaseCommand):
                 }
             )
 
-            # Cargar movimientos
-            self.load_moves(pokemon, data['moves'])
-
             status = 'Creado' if created else 'Actualizado'
             self.stdout.write(f'{status}: {pokemon.name}')
+            return True
 
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Error cargando Pokémon {pokemon_id}: {str(e)}'))
-
-    def load_evolution_data(self, pokemon_id):
-        try:
-            # Obtener datos de la especie para la evolución
-            species_url = f'https://pokeapi.co/api/v2/pokemon-species/{pokemon_id}/'
-            species_response = requests.get(species_url)
-            species_data = species_response.json()
-
-            # Obtener la cadena de evolución
-            evolution_chain_url = species_data['evolution_chain']['url']
-            evolution_response = requests.get(evolution_chain_url)
-            evolution_data = evolution_response.json()
-
-            # Procesar la cadena de evolución
-            self.process_evolution_chain(evolution_data['chain'])
-
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f'Error cargando evolución para Pokémon {pokemon_id}: {str(e)}'))
+            return False
 
     def process_evolution_chain(self, chain):
         current_pokemon_name = chain['species']['name']
@@ -128,45 +189,69 @@ class Command(BaseCommand):
             # Procesar recursivamente
             self.process_evolution_chain(evolution)
 
-    def load_moves(self, pokemon, moves_data):
-        for move_data in moves_data:
-            for version in move_data['version_group_details']:
-                if version['move_learn_method']['name'] == 'level-up' and version['version_group']['name'] in [
-                    'red-blue', 'yellow']:
-                    level = version['level_learned_at']
-                    if level > 0:
-                        move_name = move_data['move']['name']
-                        move, created = Move.objects.get_or_create(
-                            name=move_name,
-                            defaults={
-                                'type': 'normal',
-                                'power': 0,
-                                'accuracy': 0,
-                                'pp': 0,
-                                'damage_class': 'physical',
-                            }
-                        )
-
-                        if created:
-                            self.update_move_data(move)
-
-                        PokemonMove.objects.get_or_create(
-                            pokemon=pokemon,
-                            move=move,
-                            level=level
-                        )
-
-    def update_move_data(self, move):
-        try:
-            move_url = f'https://pokeapi.co/api/v2/move/{move.name}/'
-            response = requests.get(move_url)
-            if response.status_code == 200:
-                data = response.json()
-                move.type = data['type']['name']
-                move.power = data['power'] if data['power'] else 0
-                move.accuracy = data['accuracy'] if data['accuracy'] else 0
-                move.pp = data['pp'] if data['pp'] else 0
-                move.damage_class = data['damage_class']['name']
-                move.save()
-        except:
-            pass  # Si falla, dejamos los valores por defecto
\ No newline at end of file
+    def load_learnsets(self, pokedex_ids, responses):
+        pokemon_ids = dict(Pokemon.objects.filter(pokedex_id__in=pokedex_ids).values_list('pokedex_id', 'id'))
+
+        # Movimientos (nombre -> URL) y filas (pokemon, movimiento, nivel) sin repetir
+        move_urls = {}
+        learnset = set()
+        for i in pokedex_ids:
+            data = responses.get(f'pokemon/{i}/')
+            if not data or i not in pokemon_ids:
+                continue
+            for move_data in data['moves']:
+                move_name = move_data['move']['name']
+                for version in move_data['version_group_details']:
+                    if version['move_learn_method']['name'] == 'level-up' and \
+                            version['version_group']['name'] in LEVEL_UP_VERSIONS and version['level_learned_at'] > 0:
+                        move_urls.setdefault(move_name, move_data['move']['url'])
+                        learnset.add((pokemon_ids[i], move_name, version['level_learned_at']))
+
+        move_ids = self.upsert_moves(move_urls, responses)
+
+        rows = {(pokemon_id, move_ids[move_name], level) for pokemon_id, move_name, level in learnset}
+        existing = set(PokemonMove.objects.filter(pokemon_id__in=pokemon_ids.values()).values_list(
+            'pokemon_id', 'move_id', 'level'))
+        new_rows = sorted(rows - existing)
+        PokemonMove.objects.bulk_create(
+            [PokemonMove(pokemon_id=pokemon_id, move_id=move_id, level=level) for pokemon_id, move_id, level in new_rows],
+            batch_size=BATCH_SIZE
+        )
+
+        self.stdout.write(f'Aprendizajes: {len(new_rows)} nuevos, {len(rows) - len(new_rows)} sin cambios')
+
+    def upsert_moves(self, move_urls, responses):
+        """Crea o actualiza los movimientos en bloque; devuelve su id por nombre."""
+        existing = {move.name: move for move in Move.objects.filter(name__in=move_urls)}
+
+        new_moves, changed_moves = [], []
+        for move_name, url in move_urls.items():
+            values = self.move_values(responses.get(url))
+            move = existing.get(move_name)
+            if move is None:
+                # Si falló la descarga, dejamos los valores por defecto
+                new_moves.append(Move(name=move_name, **(values or DEFAULT_MOVE)))
+            elif values and any(getattr(move, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(move, field, value)
+                changed_moves.append(move)
+
+        Move.objects.bulk_create(new_moves, batch_size=BATCH_SIZE)
+        Move.objects.bulk_update(changed_moves, MOVE_FIELDS, batch_size=BATCH_SIZE)
+
+        unchanged = len(move_urls) - len(new_moves) - len(changed_moves)
+        self.stdout.write(f'Movimientos: {len(new_moves)} nuevos, {len(changed_moves)} actualizados, '
+                          f'{unchanged} sin cambios')
+
+        return dict(Move.objects.filter(name__in=move_urls).values_list('name', 'id'))
+
+    def move_values(self, data):
+        if not data:
+            return None
+        return {
+            'type': data['type']['name'],
+            'power': data['power'] if data['power'] else 0,
+            'accuracy': data['accuracy'] if data['accuracy'] else 0,
+            'pp': data['pp'] if data['pp'] else 0,
+            'damage_class': data['damage_class']['name'],
+        }
@@ -1,6 +1,7 @@
 import requests
 from django.core.management.base import BaseCommand
 from pokemon.models.Pokemon import Pokemon
+from pokemon.services.game_data import invalidate_game_data
 
 
 class Command(BaseCommand):
@@ -13,6 +14,7 @@ class Command(BaseCommand):
         for i in range(1, 152):
             self.load_evolution(i)
 
+        invalidate_game_data()
         self.stdout.write(self.style.SUCCESS('Evoluciones cargadas exitosamente!'))
 
     def load_evolution(self, pokemon_id):
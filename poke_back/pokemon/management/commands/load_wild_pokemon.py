@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 from pokemon.models.Location import Location
 from pokemon.models.Pokemon import Pokemon
 from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
+from pokemon.services.game_data import invalidate_game_data
 
 
 class Command(BaseCommand):
@@ -217,4 +218,5 @@ class Command(BaseCommand):
             except Location.DoesNotExist:
                 self.stdout.write(self.style.WARNING(f'Ubicación {route_name} no encontrada'))
 
+        invalidate_game_data()
         self.stdout.write(self.style.SUCCESS('¡Encuentros salvajes cargados exitosamente para todas las rutas!'))
\ No newline at end of file
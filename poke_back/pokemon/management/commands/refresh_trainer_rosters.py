@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from pokemon.services.game_data import get_game_data, invalidate_game_data
+from usuario.services.trainer_rosters import TRAINER_TYPES, location_trainers, trainer_roster
+
+
+class Command(BaseCommand):
+    help = 'Vuelve a generar los entrenadores aleatorios de todas las rutas (invalida el registro en todos los procesos)'
+
+    def handle(self, *args, **options):
+        invalidate_game_data()
+        game_data = get_game_data()
+
+        routes = [location for location in game_data.locations if location.location_type == 'route']
+        total = 0
+        for location in routes:
+            rosters = [trainer_roster(location.id, trainer_type, game_data) for trainer_type in TRAINER_TYPES]
+            rosters.append(location_trainers(location.id, game_data))
+            count = sum(len(roster.templates) for roster in rosters)
+            total += count
+            if not count:
+                self.stdout.write(self.style.WARNING(f'{location.name}: sin Pokémon salvajes, no hay entrenadores'))
+
+        self.stdout.write(self.style.SUCCESS(f'{total} entrenadores generados en {len(routes)} rutas'))
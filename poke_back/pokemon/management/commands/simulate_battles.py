@@ -0,0 +1,149 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pokemon.engine.simulation import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_MAX_TURNS, MODES, RouteData, SimulationData, distribution_summary, simulate
+)
+from pokemon.services.encounters import rarity_weight
+from pokemon.services.game_data import get_game_data
+from pokemon.services.matchups import species_data
+
+
+def build_simulation_data(game_data):
+    from usuario.services.trainer_rosters import TRAINER_LEVELS, TRAINER_TEAM_SIZES, TRAINER_TYPES, TRAINER_TYPE_WEIGHTS
+
+    species = species_data(game_data)
+    routes = [
+        RouteData(
+            location.id, location.name,
+            [(e.pokemon_id, e.min_level, e.max_level) for e in game_data.encounters(location.id)],
+            [rarity_weight(e) for e in game_data.encounters(location.id)]
+        )
+        for location in game_data.locations
+        if location.location_type == 'route'
+    ]
+    return SimulationData(species, routes, TRAINER_TYPES, TRAINER_TYPE_WEIGHTS, TRAINER_TEAM_SIZES, TRAINER_LEVELS)
+
+
+class Command(BaseCommand):
+    help = 'Simula combates salvajes, contra entrenadores o PvP sin pasar por la API e informa de las tasas de victoria'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=MODES, default='pvp')
+        parser.add_argument('--battles', type=int, default=10000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Procesos en paralelo (por defecto, todos los núcleos)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--species', type=int, nargs='+',
+                            help='Números de Pokédex del lado del jugador (por defecto, todos)')
+        parser.add_argument('--location', type=int, nargs='+',
+                            help='Ids de ruta para wild/trainer (por defecto, todas)')
+        parser.add_argument('--level', type=int,
+                            help='Nivel del jugador; por defecto 50 en PvP y el del rival en wild/trainer')
+        parser.add_argument('--max-turns', type=int, default=DEFAULT_MAX_TURNS)
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--top', type=int, default=20, help='Filas de las tablas de especies y movimientos')
+        parser.add_argument('--json', dest='json_path', help='Guarda el informe completo en este fichero JSON')
+
+    def handle(self, *args, **options):
+        data = build_simulation_data(get_game_data())
+        if not data.species:
+            raise CommandError('No hay Pokémon cargados; ejecuta load_pokemon_data primero')
+
+        species_ids = None
+        if options['species']:
+            by_pokedex = {spec.pokedex_id: spec.id for spec in data.species.values()}
+            missing = [pokedex_id for pokedex_id in options['species'] if pokedex_id not in by_pokedex]
+            if missing:
+                raise CommandError(f'Pokémon no encontrados: {missing}')
+            species_ids = [by_pokedex[pokedex_id] for pokedex_id in options['species']]
+
+        if options['location']:
+            data.routes = tuple(route for route in data.routes if route.id in options['location'])
+
+        self.stdout.write(
+            f"Simulando {options['battles']} combates {options['mode']} en {options['workers']} procesos..."
+        )
+        started = time.monotonic()
+        try:
+            stats = simulate(
+                data, options['mode'], options['battles'],
+                seed=options['seed'], workers=options['workers'], species_ids=species_ids,
+                level=options['level'], max_turns=options['max_turns'], chunk_size=options['chunk_size']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.monotonic() - started
+
+        report = self.build_report(data, stats, options)
+        self.print_report(report, options['top'], elapsed)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Informe guardado en {options['json_path']}")
+
+    def build_report(self, data, stats, options):
+        species = []
+        for species_id, (battles, wins, turns) in stats.species.items():
+            spec = data.species[species_id]
+            species.append({
+                'pokedex_id': spec.pokedex_id,
+                'name': spec.name,
+                'battles': battles,
+                'wins': wins,
+                'win_rate': wins / battles,
+                'average_turns': turns / battles,
+                'damage': distribution_summary(stats.species_damage.get(species_id, {})),
+            })
+        species.sort(key=lambda entry: (entry['win_rate'], entry['battles']), reverse=True)
+
+        moves = [
+            dict(name=name, **distribution_summary(damages))
+            for name, damages in stats.move_damage.items()
+        ]
+        moves.sort(key=lambda entry: entry['count'], reverse=True)
+
+        return {
+            'mode': options['mode'],
+            'seed': options['seed'],
+            'battles': stats.battles,
+            'draws': stats.draws,
+            'side_wins': stats.side_wins,
+            'average_turns': stats.turns / stats.battles if stats.battles else 0,
+            'species': species,
+            'moves': moves,
+        }
+
+    def print_report(self, report, top, elapsed):
+        battles = report['battles'] or 1
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['battles']} combates en {elapsed:.1f}s "
+            f"({report['battles'] / max(elapsed, 1e-9):.0f}/s), {report['average_turns']:.1f} turnos de media"
+        ))
+        self.stdout.write(
+            f"Victorias lado 1: {report['side_wins'][0] / battles:.1%}  "
+            f"lado 2: {report['side_wins'][1] / battles:.1%}  "
+            f"empates: {report['draws'] / battles:.1%}"
+        )
+
+        self.stdout.write('\nEspecies (por tasa de victoria):')
+        self.stdout.write(f"{'#':>4} {'Pokémon':<14} {'Combates':>9} {'Victorias':>9} {'Turnos':>7} "
+                          f"{'Daño medio':>10} {'p50':>5} {'p90':>5}")
+        for entry in report['species'][:top]:
+            damage = entry['damage']
+            self.stdout.write(
+                f"{entry['pokedex_id']:>4} {entry['name']:<14} {entry['battles']:>9} {entry['win_rate']:>9.1%} "
+                f"{entry['average_turns']:>7.1f} {damage['mean']:>10.1f} {damage['p50']:>5} {damage['p90']:>5}"
+            )
+
+        self.stdout.write('\nMovimientos (por uso):')
+        self.stdout.write(f"{'Movimiento':<18} {'Usos':>9} {'Media':>7} {'p10':>5} {'p50':>5} {'p90':>5} {'Máx':>5}")
+        for entry in report['moves'][:top]:
+            self.stdout.write(
+                f"{entry['name']:<18} {entry['count']:>9} {entry['mean']:>7.1f} {entry['p10']:>5} "
+                f"{entry['p50']:>5} {entry['p90']:>5} {entry['max']:>5}"
+            )
@@ -0,0 +1,62 @@
+"""
+Sorteo de encuentros salvajes por rareza.
+
+Los pesos acumulados de cada ruta se calculan una vez (el registro de game_data guarda un
+sampler por ubicación) y cada sorteo es una búsqueda binaria sobre ellos, en vez de
+repetir cada encuentro 60/30/9/1 veces en una lista nueva por petición.
+"""
+import random
+from itertools import accumulate
+
+RARITY_WEIGHTS = {
+    'common': 60,
+    'uncommon': 30,
+    'rare': 9,
+    'very_rare': 1,
+}
+
+
+def rarity_weight(encounter):
+    return RARITY_WEIGHTS.get(encounter.rarity, 1)
+
+
+class EncounterSampler:
+    __slots__ = ('encounters', 'cum_weights')
+
+    def __init__(self, encounters):
+        self.encounters = tuple(encounters)
+        self.cum_weights = tuple(accumulate(rarity_weight(encounter) for encounter in self.encounters))
+
+    def __bool__(self):
+        return bool(self.encounters)
+
+    def __len__(self):
+        return len(self.encounters)
+
+    def sample(self, rng=random):
+        """Un encuentro al azar según su rareza, o None si la ubicación no tiene."""
+        if not self.encounters:
+            return None
+        return rng.choices(self.encounters, cum_weights=self.cum_weights)[0]
+
+    def sample_many(self, count, rng=random):
+        """count encuentros con reemplazo, para simulaciones en lote."""
+        if not self.encounters or count <= 0:
+            return []
+        return rng.choices(self.encounters, cum_weights=self.cum_weights, k=count)
+
+    def excluding(self, pokemon_ids):
+        """Sampler sin los encuentros de esas especies."""
+        return EncounterSampler(e for e in self.encounters if e.pokemon_id not in pokemon_ids)
+
+
+def encounter_sampler(location_id):
+    from pokemon.services.game_data import get_game_data
+    return get_game_data().encounter_sampler(location_id)
+
+
+def sample_encounter(encounters, rng=random):
+    """Sorteo puntual sobre una lista cualquiera de encuentros."""
+    if isinstance(encounters, EncounterSampler):
+        return encounters.sample(rng)
+    return EncounterSampler(encounters).sample(rng)
@@ -0,0 +1,263 @@
+"""
+Registro de datos estáticos del juego.
+
+Pokémon, movimientos, movimientos por nivel, ubicaciones y encuentros salvajes solo
+cambian con los comandos de carga o desde el admin, así que se leen de la base de datos
+una vez por proceso y se sirven desde índices en memoria (los stats de cada especie en
+cada nivel, también precalculados). Las instancias del registro se
+comparten entre peticiones: se pueden asignar a FKs, pero no se deben modificar.
+
+Guardar o borrar cualquiera de esos modelos invalida el registro (señales conectadas en
+PokemonConfig.ready). Los comandos que usan operaciones en bloque llaman a
+invalidate_game_data() al terminar. Con una caché compartida en GAME_DATA['CACHE_ALIAS'],
+la invalidación llega también al resto de procesos.
+"""
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from pokemon.engine import StatTable
+from pokemon.services.encounters import EncounterSampler
+from pokemon.services.wild_pools import WildEncounterPool
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'CHECK_INTERVAL': 5,  # segundos entre consultas a la marca de versión compartida
+}
+
+STAMP_KEY = 'game-data:stamp'
+
+EMPTY_SAMPLER = EncounterSampler(())
+
+
+class GameData:
+    def __init__(self, pokemons, moves, pokemon_moves, locations, encounters):
+        self.pokemons = tuple(sorted(pokemons, key=lambda pokemon: pokemon.pokedex_id))
+        self.pokemon_by_id = {pokemon.id: pokemon for pokemon in self.pokemons}
+        self.pokemon_by_pokedex_id = {pokemon.pokedex_id: pokemon for pokemon in self.pokemons}
+        self.pokemon_by_name = {pokemon.name.lower(): pokemon for pokemon in self.pokemons}
+        self.stat_table = StatTable(self.pokemons)
+
+        evolutions = defaultdict(list)
+        for pokemon in self.pokemons:
+            if pokemon.evolves_from_id is not None:
+                pokemon.evolves_from = self.pokemon_by_id.get(pokemon.evolves_from_id)
+                evolutions[pokemon.evolves_from_id].append(pokemon)
+        self.evolutions_by_pokemon = {pokemon_id: tuple(items) for pokemon_id, items in evolutions.items()}
+
+        self.moves = tuple(sorted(moves, key=lambda move: move.id))
+        self.move_by_id = {move.id: move for move in self.moves}
+        self.move_by_name = {}
+        moves_by_type = defaultdict(list)
+        for move in self.moves:
+            self.move_by_name.setdefault(move.name, move)
+            moves_by_type[move.type].append(move)
+        self.moves_by_type = {move_type: tuple(items) for move_type, items in moves_by_type.items()}
+
+        # Aprendizaje por Pokémon ordenado por nivel; los niveles aparte para usar bisect
+        learnsets = defaultdict(list)
+        for pokemon_move in sorted(pokemon_moves, key=lambda pm: (pm.level, pm.id)):
+            pokemon_move.pokemon = self.pokemon_by_id[pokemon_move.pokemon_id]
+            pokemon_move.move = self.move_by_id[pokemon_move.move_id]
+            learnsets[pokemon_move.pokemon_id].append(pokemon_move)
+        self.learnsets = {pokemon_id: tuple(items) for pokemon_id, items in learnsets.items()}
+        self._learnset_levels = {
+            pokemon_id: tuple(pm.level for pm in items) for pokemon_id, items in self.learnsets.items()
+        }
+
+        self.locations = tuple(sorted(locations, key=lambda location: location.id))
+        self.location_by_id = {location.id: location for location in self.locations}
+        self.towns = tuple(location for location in self.locations if location.location_type == 'town')
+
+        by_location = defaultdict(list)
+        by_pokemon = defaultdict(list)
+        for encounter in sorted(encounters, key=lambda encounter: encounter.id):
+            encounter.pokemon = self.pokemon_by_id[encounter.pokemon_id]
+            encounter.location = self.location_by_id[encounter.location_id]
+            by_location[encounter.location_id].append(encounter)
+            by_pokemon[encounter.pokemon_id].append(encounter)
+        self.encounters_by_location = {location_id: tuple(items) for location_id, items in by_location.items()}
+        self.encounter_samplers = {
+            location_id: EncounterSampler(items) for location_id, items in self.encounters_by_location.items()
+        }
+        self.encounters_by_pokemon = {pokemon_id: tuple(items) for pokemon_id, items in by_pokemon.items()}
+        # Datos derivados (plantillas de rutas, tablas de enfrentamientos...) generados la primera vez que se piden
+        self._derived = {}
+
+    def pokemon(self, pokemon_id):
+        return self.pokemon_by_id.get(pokemon_id)
+
+    def pokemon_by_pokedex(self, pokedex_id):
+        return self.pokemon_by_pokedex_id.get(pokedex_id)
+
+    def move(self, move_id):
+        return self.move_by_id.get(int(move_id)) if move_id is not None else None
+
+    def stats(self, pokemon, level):
+        """(hp, attack, defense, special_attack, special_defense, speed) de la especie a ese nivel."""
+        return self.stat_table.get(pokemon, level)
+
+    def evolutions(self, pokemon_id):
+        return self.evolutions_by_pokemon.get(pokemon_id, ())
+
+    def evolution_for(self, pokemon_id, level):
+        """Primera evolución (por número de Pokédex) disponible a ese nivel, o None."""
+        for evolution in self.evolutions(pokemon_id):
+            if evolution.evolution_level is not None and evolution.evolution_level <= level:
+                return evolution
+        return None
+
+    def learnset(self, pokemon_id):
+        return self.learnsets.get(pokemon_id, ())
+
+    def moves_learned_up_to(self, pokemon_id, level):
+        """PokemonMove aprendidos hasta level incluido, ordenados por nivel."""
+        levels = self._learnset_levels.get(pokemon_id)
+        if not levels:
+            return ()
+        return self.learnsets[pokemon_id][:bisect_right(levels, level)]
+
+    def moves_at_level(self, pokemon_id, level):
+        levels = self._learnset_levels.get(pokemon_id)
+        if not levels:
+            return ()
+        end = bisect_right(levels, level)
+        start = bisect_right(levels, level - 1)
+        return self.learnsets[pokemon_id][start:end]
+
+    def can_learn(self, pokemon_id, move_id, level):
+        return any(pm.move_id == move_id for pm in self.moves_learned_up_to(pokemon_id, level))
+
+    def location(self, location_id):
+        return self.location_by_id.get(location_id)
+
+    def first_town(self):
+        return self.towns[0] if self.towns else None
+
+    def encounters(self, location_id):
+        return self.encounters_by_location.get(location_id, ())
+
+    def encounter_sampler(self, location_id):
+        sampler = self.encounter_samplers.get(location_id)
+        return sampler if sampler is not None else EMPTY_SAMPLER
+
+    def encounters_for_pokemon(self, pokemon_id):
+        return self.encounters_by_pokemon.get(pokemon_id, ())
+
+    def derived(self, key, build):
+        """Valor calculado a partir del registro; se descarta junto con él al invalidarlo."""
+        value = self._derived.get(key)
+        if value is None:
+            value = self._derived.setdefault(key, build())
+        return value
+
+    def wild_pool(self, location_id):
+        return self.derived(
+            ('wild_pool', location_id),
+            lambda: WildEncounterPool(self.encounter_sampler(location_id), self)
+        )
+
+    def moves_by_ids(self, move_ids):
+        """Movimientos de una lista de ids, saltando los que ya no existan."""
+        return [move for move in (self.move_by_id.get(move_id) for move_id in move_ids) if move is not None]
+
+
+def load_game_data():
+    from pokemon.models.Location import Location
+    from pokemon.models.Move import Move
+    from pokemon.models.Pokemon import Pokemon
+    from pokemon.models.PokemonMove import PokemonMove
+    from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
+
+    return GameData(
+        pokemons=list(Pokemon.objects.all()),
+        moves=list(Move.objects.all()),
+        pokemon_moves=list(PokemonMove.objects.all()),
+        locations=list(Location.objects.all()),
+        encounters=list(WildPokemonEncounter.objects.all()),
+    )
+
+
+class GameDataRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._stamp = None
+        self._checked_at = 0.0
+
+    def _config(self):
+        config = dict(DEFAULTS)
+        config.update(getattr(settings, 'GAME_DATA', {}))
+        return config
+
+    def _cache(self, config):
+        alias = config['CACHE_ALIAS']
+        return caches[alias] if alias else None
+
+    def _shared_stamp(self, config):
+        cache = self._cache(config)
+        return cache.get(STAMP_KEY) if cache is not None else None
+
+    def get(self):
+        config = self._config()
+        data = self._data
+
+        if data is not None and time.monotonic() - self._checked_at >= config['CHECK_INTERVAL']:
+            self._checked_at = time.monotonic()
+            if self._shared_stamp(config) != self._stamp:
+                data = None
+
+        if data is None:
+            with self._lock:
+                stamp = self._shared_stamp(config)
+                if self._data is None or stamp != self._stamp:
+                    self._data = load_game_data()
+                    self._stamp = stamp
+                    self._checked_at = time.monotonic()
+                data = self._data
+        return data
+
+    def invalidate(self):
+        config = self._config()
+        cache = self._cache(config)
+        with self._lock:
+            self._data = None
+            if cache is not None:
+                cache.set(STAMP_KEY, time.time_ns(), timeout=None)
+
+
+game_data_registry = GameDataRegistry()
+
+
+def get_game_data():
+    return game_data_registry.get()
+
+
+def invalidate_game_data():
+    game_data_registry.invalidate()
+
+
+def invalidate_on_change(sender, **kwargs):
+    invalidate_game_data()
+    if transaction.get_connection().in_atomic_block:
+        # Otro proceso pudo reconstruir el registro sin ver aún la transacción en curso
+        transaction.on_commit(invalidate_game_data)
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_save
+
+    from pokemon.models.Location import Location
+    from pokemon.models.Move import Move
+    from pokemon.models.Pokemon import Pokemon
+    from pokemon.models.PokemonMove import PokemonMove
+    from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
+
+    for model in (Pokemon, Move, PokemonMove, Location, WildPokemonEncounter):
+        post_save.connect(invalidate_on_change, sender=model, dispatch_uid=f'game-data-{model.__name__}-save')
+        post_delete.connect(invalidate_on_change, sender=model, dispatch_uid=f'game-data-{model.__name__}-delete')
@@ -0,0 +1,190 @@
+"""
+Paquete de datos del juego en un solo fichero.
+
+export_bundle vuelca Pokémon, movimientos, movimientos por nivel (con las evoluciones en
+la propia tabla de Pokémon), ubicaciones y sus conexiones, encuentros salvajes y objetos
+de la tienda en un JSON comprimido con gzip. Cada tabla va como columnas + filas y se
+conservan las claves primarias, así que las relaciones se cargan tal cual.
+
+import_bundle comprueba formato, versión y hash del contenido y lo carga con un
+bulk_create por tabla dentro de una transacción: una base de datos nueva (o la de pruebas)
+queda lista en segundos y sin red. Si el contenido ya coincide con el de la base de datos
+no se toca nada.
+
+Sobre una base de datos con otros datos del juego (replace=True) las filas se actualizan
+por clave primaria y solo se borran las que ya no están en el paquete. Los datos de los
+jugadores apuntan a esas claves y se conservan; si borrar una fila arrastraría alguno
+(un Pokémon capturado de una especie que desaparece, un jugador en una ubicación borrada)
+la carga se rechaza.
+"""
+import gzip
+import hashlib
+import json
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models.deletion import Collector
+
+from pokemon.services.game_data import invalidate_game_data
+
+BUNDLE_FORMAT = 'poke-gami/game-data'
+BUNDLE_VERSION = 1
+BATCH_SIZE = 500
+
+
+class BundleError(Exception):
+    """El paquete no es válido o no se puede cargar en esta base de datos."""
+
+
+def bundle_tables():
+    """(nombre, modelo) en orden de carga: cada tabla solo apunta a las anteriores (o a sí misma)."""
+    from pokemon.models.Location import Location
+    from pokemon.models.Move import Move
+    from pokemon.models.Pokemon import Pokemon
+    from pokemon.models.PokemonMove import PokemonMove
+    from pokemon.models.ShopItem import ShopItem
+    from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
+
+    return (
+        ('moves', Move),
+        ('pokemon', Pokemon),
+        ('pokemon_moves', PokemonMove),
+        ('locations', Location),
+        ('location_connections', Location.connected_locations.through),
+        ('wild_encounters', WildPokemonEncounter),
+        ('shop_items', ShopItem),
+    )
+
+
+def table_fields(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def dump_tables():
+    tables = {}
+    for name, model in bundle_tables():
+        fields = table_fields(model)
+        tables[name] = {
+            'fields': fields,
+            'rows': [list(row) for row in model.objects.order_by('pk').values_list(*fields)],
+        }
+    return tables
+
+
+def content_hash(tables):
+    canonical = json.dumps(tables, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def export_bundle(path):
+    tables = dump_tables()
+    bundle = {
+        'format': BUNDLE_FORMAT,
+        'version': BUNDLE_VERSION,
+        'hash': content_hash(tables),
+        'tables': tables,
+    }
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        json.dump(bundle, file, separators=(',', ':'), ensure_ascii=False)
+    return bundle['hash'], {name: len(table['rows']) for name, table in tables.items()}
+
+
+def read_bundle(path):
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            bundle = json.load(file)
+    except (OSError, ValueError) as e:
+        raise BundleError(f'No se pudo leer {path}: {e}')
+
+    if bundle.get('format') != BUNDLE_FORMAT:
+        raise BundleError(f'{path} no es un paquete de datos del juego')
+    if bundle.get('version') != BUNDLE_VERSION:
+        raise BundleError(f'Versión de paquete {bundle.get("version")} no soportada (se espera {BUNDLE_VERSION})')
+    if content_hash(bundle['tables']) != bundle.get('hash'):
+        raise BundleError(f'El contenido de {path} no coincide con su hash: el fichero está dañado')
+    return bundle
+
+
+def affected_models(querysets):
+    """Modelos cuyas filas cambiarían (borradas o puestas a NULL) al borrar los querysets."""
+    collector = Collector(using=connection.alias)
+    for queryset in querysets:
+        collector.collect(queryset)
+
+    models = {model for model, instances in collector.data.items() if instances}
+    models.update(queryset.model for queryset in collector.fast_deletes if queryset.exists())
+    for (field, value), updates in collector.field_updates.items():
+        if any(update.exists() if hasattr(update, 'exists') else update for update in updates):
+            models.add(field.model)
+    return models
+
+
+def delete_missing(tables):
+    """Borra las filas de los datos del juego que no están en el paquete, sin tocar las de jugadores."""
+    missing = []
+    for name, model in reversed(bundle_tables()):
+        pk_index = tables[name]['fields'].index(model._meta.pk.attname)
+        pks = {row[pk_index] for row in tables[name]['rows']}
+        existing = set(model.objects.values_list('pk', flat=True))
+        if existing - pks:
+            missing.append(model.objects.filter(pk__in=existing - pks))
+
+    outside = affected_models(missing) - {model for name, model in bundle_tables()}
+    if outside:
+        names = ', '.join(sorted(model._meta.db_table for model in outside))
+        raise BundleError(f'El paquete quita datos del juego que aún usan otras tablas ({names})')
+
+    for queryset in missing:
+        queryset.delete()
+
+
+def import_bundle(path, replace=False):
+    """
+    Carga el paquete. Devuelve (hash, filas por tabla, cargado); cargado es False si la base
+    de datos ya tenía exactamente ese contenido. Con datos distintos hace falta replace=True,
+    que actualiza las filas por clave primaria y borra las que falten en el paquete; los
+    datos de los jugadores no se tocan.
+    """
+    bundle = read_bundle(path)
+    tables = bundle['tables']
+    counts = {name: len(table['rows']) for name, table in tables.items()}
+
+    for name, model in bundle_tables():
+        if name not in tables:
+            raise BundleError(f'Falta la tabla {name} en el paquete')
+
+    with transaction.atomic():
+        current = dump_tables()
+        if content_hash(current) == bundle['hash']:
+            return bundle['hash'], counts, False
+
+        if any(table['rows'] for table in current.values()):
+            if not replace:
+                raise BundleError('La base de datos ya tiene otros datos del juego; usa replace para sustituirlos')
+            delete_missing(tables)
+
+        models = []
+        for name, model in bundle_tables():
+            table = tables[name]
+            known_fields = set(table_fields(model))
+            fields = table['fields']
+            pk_name = model._meta.pk.attname
+            model.objects.bulk_create(
+                [model(**{field: value for field, value in zip(fields, row) if field in known_fields})
+                 for row in table['rows']],
+                batch_size=BATCH_SIZE,
+                # Misma clave primaria: se actualiza la fila y lo que apunte a ella sigue válido
+                update_conflicts=True,
+                unique_fields=[pk_name],
+                update_fields=[field for field in fields if field in known_fields and field != pk_name],
+            )
+            models.append(model)
+
+        # Las claves primarias vienen del paquete: las secuencias (PostgreSQL) deben seguirlas
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+    # bulk_create no envía señales
+    invalidate_game_data()
+    return bundle['hash'], counts, True
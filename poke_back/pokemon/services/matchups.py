@@ -0,0 +1,46 @@
+"""
+Tablas de enfrentamientos (pokemon.engine.matchups) calculadas con el registro de game_data.
+
+Cada nivel se calcula una vez por proceso y se invalida junto con el registro.
+"""
+from pokemon.engine.simulation import SpeciesData
+from pokemon.services.game_data import get_game_data
+
+MIN_LEVEL = 1
+MAX_LEVEL = 100
+
+
+def species_data(game_data):
+    return [SpeciesData.from_model(pokemon, game_data.learnset(pokemon.id)) for pokemon in game_data.pokemons]
+
+
+def matchup_table(level):
+    from pokemon.engine.matchups import compute_matchups
+
+    game_data = get_game_data()
+    return game_data.derived(('matchups', level), lambda: compute_matchups(species_data(game_data), level))
+
+
+def rounded_rows(array):
+    """Filas de floats a 1 decimal; infinito (no puede debilitarlo) pasa a None."""
+    return [[round(float(value), 1) if value != float('inf') else None for value in row] for row in array.tolist()]
+
+
+def matchup_payload(level):
+    """Respuesta JSON de la tabla completa; también se guarda para no serializarla en cada petición."""
+    game_data = get_game_data()
+
+    def build():
+        table = matchup_table(level)
+        return {
+            'level': level,
+            'pokedex_ids': table.pokedex_ids.tolist(),
+            'names': table.names,
+            'stat_names': ['hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed'],
+            'stats': table.stats.tolist(),
+            'move_ids': table.move_ids.tolist(),
+            'expected_damage': rounded_rows(table.expected_damage),
+            'turns_to_ko': rounded_rows(table.turns_to_ko),
+        }
+
+    return game_data.derived(('matchups-payload', level), build)
@@ -0,0 +1,215 @@
+"""
+Cliente de PokeAPI para los comandos de carga.
+
+Las peticiones salen en paralelo (un pool de hilos acotado) y respetan un límite de
+peticiones por segundo compartido por todos los hilos. Cada respuesta se guarda en una
+caché en disco direccionada por contenido:
+
+    objects/ab/<sha256 del JSON>.json   cuerpo de la respuesta
+    urls/cd/<sha256 de la URL>          hash del cuerpo que devolvió esa URL
+
+así que repetir una carga no vuelve a pedir nada (con offline=True ni siquiera se intenta)
+y un directorio de respuestas grabadas sirve igual que la API para pruebas. Cada comando
+guarda además su punto de control (un JSON en el mismo directorio) para retomar una carga
+interrumpida.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+
+DEFAULTS = {
+    'BASE_URL': 'https://pokeapi.co/api/v2/',
+    'CACHE_DIR': os.path.join(tempfile.gettempdir(), 'pokeapi-cache'),
+    'WORKERS': 8,
+    'RATE_LIMIT': 10,  # peticiones por segundo; 0 sin límite
+    'TIMEOUT': 30,
+    'RETRIES': 3,
+}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class PokeApiError(Exception):
+    """La respuesta no está en caché y no se pudo obtener de la API."""
+
+
+def pokeapi_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'POKEAPI', {}))
+    return config
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class RateLimiter:
+    """Reparte las peticiones a intervalos de 1/rate segundos entre todos los hilos."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self.interval
+        if start_at > now:
+            time.sleep(start_at - now)
+
+
+class ResponseCache:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, kind, key):
+        return os.path.join(self.directory, kind, key[:2], key)
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Escritura atómica: una carga interrumpida no deja ficheros a medias
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+    def get(self, url):
+        try:
+            with open(self._path('urls', sha256(url.encode())), 'r') as file:
+                digest = file.read().strip()
+            with open(self._path('objects', digest) + '.json', 'rb') as file:
+                return json.loads(file.read())
+        except FileNotFoundError:
+            return None
+
+    def put(self, url, body):
+        digest = sha256(body)
+        object_path = self._path('objects', digest) + '.json'
+        if not os.path.exists(object_path):
+            self._write(object_path, body)
+        self._write(self._path('urls', sha256(url.encode())), digest.encode())
+
+
+class PokeApiClient:
+    def __init__(self, base_url=None, cache_dir=None, workers=None, rate_limit=None, offline=False,
+                 timeout=None, retries=None):
+        config = pokeapi_config()
+        self.base_url = (base_url or config['BASE_URL']).rstrip('/') + '/'
+        self.cache = ResponseCache(str(cache_dir or config['CACHE_DIR']))
+        self.workers = workers or config['WORKERS']
+        self.limiter = RateLimiter(config['RATE_LIMIT'] if rate_limit is None else rate_limit)
+        self.offline = offline
+        self.timeout = timeout or config['TIMEOUT']
+        self.retries = retries or config['RETRIES']
+        self._local = threading.local()
+        self.requests_made = 0
+        self._counter_lock = threading.Lock()
+
+    def url(self, path):
+        """
+        URL completa de un recurso ('pokemon/1/'). Las URLs absolutas de la API pública que
+        vienen dentro de las respuestas se redirigen a base_url (espejo o servidor de pruebas).
+        """
+        if path.startswith(DEFAULTS['BASE_URL']):
+            path = path[len(DEFAULTS['BASE_URL']):]
+        elif path.startswith(('http://', 'https://')):
+            return path
+        return self.base_url + path.lstrip('/')
+
+    def _session(self):
+        # requests.Session no es seguro entre hilos: una por hilo
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _download(self, url):
+        last_error = None
+        for attempt in range(self.retries):
+            self.limiter.wait()
+            with self._counter_lock:
+                self.requests_made += 1
+            try:
+                response = self._session().get(url, timeout=self.timeout)
+            except requests.RequestException as e:
+                last_error = e
+            else:
+                if response.status_code == 200:
+                    return response.content
+                last_error = PokeApiError(f'{url}: HTTP {response.status_code}')
+                if response.status_code not in RETRY_STATUS:
+                    break
+            time.sleep(min(2 ** attempt * 0.5, 5))
+        raise PokeApiError(f'No se pudo obtener {url}: {last_error}')
+
+    def get(self, path):
+        url = self.url(path)
+        data = self.cache.get(url)
+        if data is not None:
+            return data
+        if self.offline:
+            raise PokeApiError(f'{url} no está en la caché (modo sin conexión)')
+
+        body = self._download(url)
+        data = json.loads(body)
+        self.cache.put(url, body)
+        return data
+
+    def get_many(self, paths):
+        """
+        Descarga en paralelo. Devuelve (datos por ruta, errores por ruta); un fallo no
+        detiene el resto y lo ya descargado queda en caché para el siguiente intento.
+        """
+        paths_by_url = {}
+        for path in paths:
+            paths_by_url.setdefault(self.url(path), []).append(path)
+        results, errors = {}, {}
+
+        def fetch(url):
+            try:
+                data = self.get(url)
+            except (PokeApiError, ValueError) as e:
+                errors.update((path, str(e)) for path in paths_by_url[url])
+            else:
+                results.update((path, data) for path in paths_by_url[url])
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(fetch, paths_by_url))
+        return results, errors
+
+
+class Checkpoint:
+    """Progreso de una carga guardado en disco tras cada paso."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.state = {}
+        if os.path.exists(self.path):
+            with open(self.path) as file:
+                self.state = json.load(file)
+
+    def done(self, step):
+        return set(self.state.get(step, []))
+
+    def mark(self, step, *keys):
+        self.state[step] = sorted(self.done(step) | set(keys))
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(self.state, file)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        self.state = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
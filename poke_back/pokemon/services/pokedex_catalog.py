@@ -0,0 +1,83 @@
+"""
+Ficha estática de cada especie para la Pokédex: tipos, evoluciones, dónde aparece y la
+descripción ya redactada.
+
+Solo depende de Pokemon, Location y WildPokemonEncounter, así que se construye una vez a
+partir del registro de game_data y se descarta junto con él. Las fichas se comparten
+entre peticiones: no se deben modificar.
+"""
+from pokemon.services.game_data import get_game_data
+
+
+class CatalogEntry:
+    __slots__ = ('types', 'evolution_info', 'locations', 'description')
+
+    def __init__(self, types, evolution_info, locations, description):
+        self.types = types
+        self.evolution_info = evolution_info
+        self.locations = locations
+        self.description = description
+
+
+EMPTY_ENTRY = CatalogEntry([], {'evolves_from': None, 'evolves_to': None}, [],
+                           "Este Pokémon no aparece en rutas salvajes")
+
+
+def build_entry(game_data, pokemon):
+    types = [pokemon.type1]
+    if pokemon.type2:
+        types.append(pokemon.type2)
+
+    evolves_from = None
+    previous_pokemon = game_data.pokemon(pokemon.evolves_from_id)
+    if previous_pokemon:
+        evolves_from = {
+            'id': previous_pokemon.id,
+            'name': previous_pokemon.name,
+            'pokedex_id': previous_pokemon.pokedex_id
+        }
+
+    evolves_to = None
+    evolved_pokemon = next(iter(game_data.evolutions(pokemon.id)), None)
+    if evolved_pokemon:
+        evolves_to = {
+            'id': evolved_pokemon.id,
+            'name': evolved_pokemon.name,
+            'pokedex_id': evolved_pokemon.pokedex_id,
+            'evolution_level': evolved_pokemon.evolution_level
+        }
+
+    encounters = game_data.encounters_for_pokemon(pokemon.id)
+    locations = [{
+        'location_id': encounter.location.id,
+        'location_name': encounter.location.name,
+        'location_type': encounter.location.location_type,
+        'min_level': encounter.min_level,
+        'max_level': encounter.max_level,
+        'rarity': encounter.rarity,
+        'rarity_display': encounter.get_rarity_display()
+    } for encounter in encounters]
+
+    route_names = sorted({encounter.location.name for encounter in encounters})
+    if route_names:
+        description = f"Puede ser encontrado en: {', '.join(route_names)}"
+    else:
+        description = "Este Pokémon no aparece en rutas salvajes"
+
+    if evolved_pokemon and evolved_pokemon.evolution_level:
+        description += f". Evoluciona a {evolved_pokemon.name} al nivel {evolved_pokemon.evolution_level}"
+
+    return CatalogEntry(types, {'evolves_from': evolves_from, 'evolves_to': evolves_to}, locations, description)
+
+
+def build_catalog(game_data):
+    return {pokemon.id: build_entry(game_data, pokemon) for pokemon in game_data.pokemons}
+
+
+def pokedex_catalog():
+    game_data = get_game_data()
+    return game_data.derived('pokedex_catalog', lambda: build_catalog(game_data))
+
+
+def catalog_entry(pokemon_id):
+    return pokedex_catalog().get(pokemon_id, EMPTY_ENTRY)
@@ -0,0 +1,62 @@
+"""
+Plantillas de Pokémon salvajes por ruta.
+
+Para cada encuentro y cada nivel posible se precalculan una vez los stats y el set de
+movimientos por defecto (los 4 primeros aprendidos hasta ese nivel). Empezar un combate
+salvaje queda en sortear una plantilla y hacer un único INSERT en battles.
+"""
+import random
+
+MAX_WILD_MOVES = 4
+
+
+class WildTemplate:
+    __slots__ = ('encounter', 'pokemon', 'level', 'hp', 'attack', 'defense', 'special_attack',
+                 'special_defense', 'speed', 'moves', 'move_ids')
+
+    def __init__(self, encounter, level, learned_moves, stats):
+        self.encounter = encounter
+        self.pokemon = encounter.pokemon
+        self.level = level
+        self.hp, self.attack, self.defense, self.special_attack, self.special_defense, self.speed = stats
+        self.moves = tuple(pokemon_move.move for pokemon_move in learned_moves[:MAX_WILD_MOVES])
+        self.move_ids = tuple(move.id for move in self.moves)
+
+    @property
+    def types(self):
+        return [self.pokemon.type1, self.pokemon.type2] if self.pokemon.type2 else [self.pokemon.type1]
+
+
+class WildEncounterPool:
+    """Plantillas de una ruta; el encuentro se sortea por rareza y el nivel de forma uniforme."""
+
+    def __init__(self, sampler, game_data):
+        self.sampler = sampler
+        self.templates = {}
+        for encounter in sampler.encounters:
+            self.templates[encounter.id] = tuple(
+                WildTemplate(
+                    encounter, level,
+                    game_data.moves_learned_up_to(encounter.pokemon_id, level),
+                    game_data.stats(encounter.pokemon, level)
+                )
+                for level in range(encounter.min_level, encounter.max_level + 1)
+            )
+
+    def __bool__(self):
+        return bool(self.sampler)
+
+    def _template(self, encounter, rng):
+        return rng.choice(self.templates[encounter.id])
+
+    def sample(self, rng=random):
+        encounter = self.sampler.sample(rng)
+        return self._template(encounter, rng) if encounter is not None else None
+
+    def sample_many(self, count, rng=random):
+        return [self._template(encounter, rng) for encounter in self.sampler.sample_many(count, rng)]
+
+
+def wild_encounter_pool(location_id):
+    from pokemon.services.game_data import get_game_data
+    return get_game_data().wild_pool(location_id)
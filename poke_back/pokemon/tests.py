@@ -1,3 +1,591 @@
+import gzip
+import json
+import os
+import random
+import tempfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from pokemon.models.Location import Location
+from pokemon.models.Move import Move
+from pokemon.models.Pokemon import Pokemon
+from pokemon.models.PokemonMove import PokemonMove
+from pokemon.models.ShopItem import ShopItem
+from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
+
+from pokemon.engine import (
+    DUAL_TYPE_TABLE, NO_TYPE, TYPE_EFFECTIVENESS, TYPES, AttackRequest, Combatant, MoveData, calculate_damage,
+    calculate_hp, calculate_stat, effectiveness_by_index, effectiveness_matrix, get_type_effectiveness,
+    resolve_attacks
+)
+from pokemon.engine.matchups import MatchupTable
+from pokemon.engine.simulation import best_moves, simulate
+from pokemon.management.commands.simulate_battles import build_simulation_data
+from pokemon.services.encounters import EncounterSampler, encounter_sampler
+from pokemon.services.game_data import get_game_data, invalidate_game_data
+from pokemon.services.matchups import matchup_table, species_data
+from pokemon.services.game_data_bundle import BundleError, content_hash, dump_tables, import_bundle
+from pokemon.services.pokeapi import Checkpoint, PokeApiClient, PokeApiError
+from usuario.models.Player import Player
+from usuario.models.PlayerPokemon import PlayerPokemon
+from usuario.models.User import User
+
+
+def create_species(pokedex_id, name, evolves_from=None, evolution_level=None):
+    return Pokemon.objects.create(
+        pokedex_id=pokedex_id, name=name, type1='normal',
+        base_hp=50, base_attack=50, base_defense=50,
+        base_special_attack=50, base_special_defense=50, base_speed=50,
+        experience_growth=100, evolves_from=evolves_from, evolution_level=evolution_level,
+        sprite_front='https://example.com/front.png', sprite_back='https://example.com/back.png',
+    )
+
+
+class GameDataTest(TestCase):
+    def setUp(self):
+        invalidate_game_data()
+        self.base = create_species(1001, 'Basemon')
+        self.evolved = create_species(1002, 'Evomon', evolves_from=self.base, evolution_level=16)
+        self.tackle = Move.objects.create(name='Tackle', type='normal', power=40, accuracy=100, pp=35,
+                                          damage_class='physical')
+        self.growl = Move.objects.create(name='Growl', type='normal', power=None, accuracy=100, pp=40,
+                                         damage_class='status')
+        PokemonMove.objects.create(pokemon=self.base, move=self.tackle, level=1)
+        PokemonMove.objects.create(pokemon=self.base, move=self.growl, level=7)
+        self.route = Location.objects.create(name='Ruta de prueba', location_type='route')
+        WildPokemonEncounter.objects.create(location=self.route, pokemon=self.base,
+                                            min_level=2, max_level=4, rarity='common')
+
+    def test_indexes(self):
+        game_data = get_game_data()
+
+        self.assertEqual(game_data.pokemon(self.base.id).name, 'Basemon')
+        self.assertEqual(game_data.pokemon_by_pokedex(1002).id, self.evolved.id)
+        self.assertEqual(game_data.pokemon_by_name['evomon'].id, self.evolved.id)
+        self.assertEqual([p.id for p in game_data.evolutions(self.base.id)], [self.evolved.id])
+        self.assertIsNone(game_data.evolution_for(self.base.id, 15))
+        self.assertEqual(game_data.evolution_for(self.base.id, 16).id, self.evolved.id)
+        self.assertEqual(game_data.move_by_name['Growl'].id, self.growl.id)
+        self.assertEqual([e.pokemon_id for e in game_data.encounters(self.route.id)], [self.base.id])
+
+    def test_learnset_by_level(self):
+        game_data = get_game_data()
+
+        self.assertEqual([pm.move.name for pm in game_data.moves_learned_up_to(self.base.id, 6)], ['Tackle'])
+        self.assertEqual([pm.move.name for pm in game_data.moves_learned_up_to(self.base.id, 7)],
+                         ['Tackle', 'Growl'])
+        self.assertEqual([pm.move.name for pm in game_data.moves_at_level(self.base.id, 7)], ['Growl'])
+        self.assertTrue(game_data.can_learn(self.base.id, self.growl.id, 7))
+        self.assertFalse(game_data.can_learn(self.base.id, self.growl.id, 6))
+
+    def test_reads_without_queries(self):
+        get_game_data()
+
+        with self.assertNumQueries(0):
+            game_data = get_game_data()
+            game_data.moves_learned_up_to(self.base.id, 100)[0].move.name
+            game_data.evolution_for(self.base.id, 20).name
+
+    def test_stat_table(self):
+        Pokemon.objects.filter(pk=self.base.pk).update(base_hp=45, base_attack=49, base_speed=45)
+        invalidate_game_data()
+        game_data = get_game_data()
+        base = game_data.pokemon(self.base.id)
+
+        for level in (1, 5, 50, 99, 100):
+            self.assertEqual(game_data.stats(base, level), (
+                calculate_hp(45, level), calculate_stat(49, level), calculate_stat(50, level),
+                calculate_stat(50, level), calculate_stat(50, level), calculate_stat(45, level)
+            ))
+        self.assertEqual(game_data.stats(base, 50), (105, 54, 55, 55, 55, 50))
+        # Una especie que no está en el registro se calcula con la misma fórmula
+        self.assertEqual(game_data.stats(Pokemon(id=-1, base_hp=45, base_attack=49, base_defense=50,
+                                                 base_special_attack=50, base_special_defense=50,
+                                                 base_speed=45), 50),
+                         game_data.stats(base, 50))
+
+    def test_saving_invalidates(self):
+        self.assertEqual(get_game_data().pokemon(self.base.id).name, 'Basemon')
+
+        self.base.name = 'Renamed'
+        self.base.save()
+        PokemonMove.objects.create(pokemon=self.base, move=self.tackle, level=20)
+
+        game_data = get_game_data()
+        self.assertEqual(game_data.pokemon(self.base.id).name, 'Renamed')
+        self.assertEqual(len(game_data.learnset(self.base.id)), 3)
+
+
+class EncounterSamplerTest(TestCase):
+    def setUp(self):
+        invalidate_game_data()
+        self.route = Location.objects.create(name='Ruta de prueba', location_type='route')
+        self.common = create_species(1001, 'Commonmon')
+        self.rare = create_species(1002, 'Raremon')
+        WildPokemonEncounter.objects.create(location=self.route, pokemon=self.common,
+                                            min_level=2, max_level=4, rarity='common')
+        WildPokemonEncounter.objects.create(location=self.route, pokemon=self.rare,
+                                            min_level=2, max_level=4, rarity='very_rare')
+
+    def test_sample_follows_rarity_weights(self):
+        samples = encounter_sampler(self.route.id).sample_many(6100, rng=random.Random(7))
+        counts = Counter(encounter.pokemon_id for encounter in samples)
+
+        self.assertEqual(sum(counts.values()), 6100)
+        # 60:1 -> unos 100 raros de 6100
+        self.assertGreater(counts[self.rare.id], 50)
+        self.assertLess(counts[self.rare.id], 160)
+
+    def test_sampler_is_built_once_per_location(self):
+        sampler = encounter_sampler(self.route.id)
+
+        with self.assertNumQueries(0):
+            self.assertIs(encounter_sampler(self.route.id), sampler)
+            sampler.sample()
+
+    def test_excluding_and_empty(self):
+        sampler = encounter_sampler(self.route.id).excluding({self.common.id})
+
+        self.assertEqual(sampler.sample().pokemon_id, self.rare.id)
+        self.assertIsNone(encounter_sampler(self.route.id + 1000).sample())
+        self.assertEqual(EncounterSampler(()).sample_many(3), [])
+
+
+class SimulateBattlesTest(TestCase):
+    def setUp(self):
+        invalidate_game_data()
+        route = Location.objects.create(name='Ruta de prueba', location_type='route')
+        tackle = Move.objects.create(name='Tackle', type='normal', power=40, accuracy=100, pp=35,
+                                     damage_class='physical')
+        ember = Move.objects.create(name='Ember', type='fire', power=40, accuracy=100, pp=25,
+                                    damage_class='special')
+        self.weak = create_species(1001, 'Weakmon')
+        self.strong = create_species(1002, 'Strongmon')
+        Pokemon.objects.filter(pk=self.strong.pk).update(base_attack=150, base_special_attack=150, base_speed=150)
+        invalidate_game_data()
+        for species, move in ((self.weak, tackle), (self.strong, ember)):
+            PokemonMove.objects.create(pokemon=species, move=move, level=1)
+            WildPokemonEncounter.objects.create(location=route, pokemon=species,
+                                                min_level=3, max_level=5, rarity='common')
+        self.data = build_simulation_data(get_game_data())
+
+    def test_same_seed_same_result_with_any_worker_count(self):
+        one = simulate(self.data, 'pvp', 400, seed=5, workers=1, chunk_size=100)
+        two = simulate(self.data, 'pvp', 400, seed=5, workers=2, chunk_size=100)
+
+        self.assertEqual(one.battles, 400)
+        self.assertEqual(one.species, two.species)
+        self.assertEqual(one.move_damage, two.move_damage)
+
+    def test_stronger_species_wins_more(self):
+        stats = simulate(self.data, 'pvp', 500, seed=1)
+
+        battles, wins, turns = stats.species[self.strong.id]
+        self.assertGreater(wins / battles, 0.7)
+
+    def test_command_writes_report(self):
+        for mode in ('wild', 'trainer'):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'report.json')
+                call_command('simulate_battles', mode=mode, battles=50, workers=1, json_path=path,
+                             stdout=open(os.devnull, 'w'))
+                with open(path, encoding='utf-8') as f:
+                    report = json.load(f)
+
+            self.assertEqual(report['battles'], 50)
+            self.assertEqual({entry['name'] for entry in report['moves']}, {'Tackle', 'Ember'})
+
+
+def view_damage(attack_stat, defense_stat, level, move, defender_types, rng):
+    """Fórmula que tenían BattleViewSet.calculate_damage y PvPBattleViewSet.calculate_pvp_damage."""
+    if move['damage_class'] == 'status':
+        return 0
+    level_factor = (2 * level) / 5 + 2
+    power_factor = move['power'] if move['power'] else 0
+    base_damage = (level_factor * power_factor * (attack_stat / defense_stat)) / 50 + 2
+    for defender_type in defender_types:
+        if defender_type and move['type'] in TYPE_EFFECTIVENESS:
+            base_damage *= TYPE_EFFECTIVENESS[move['type']].get(defender_type, 1.0)
+    base_damage *= rng.uniform(0.85, 1.0)
+    return int(max(1, base_damage))
+
+
+def random_fighter(rng, level):
+    type1, type2 = rng.sample(TYPES, 2)
+    return {
+        'pokemon_name': 'Testmon', 'level': level, 'type1': type1, 'type2': rng.choice([type2, None]),
+        'max_hp': 100, 'current_hp': 100, 'attack': rng.randint(5, 300), 'defense': rng.randint(5, 300),
+        'special_attack': rng.randint(5, 300), 'special_defense': rng.randint(5, 300), 'speed': 50,
+    }
+
+
+def random_move(rng):
+    return {'id': 1, 'name': 'move', 'type': rng.choice(TYPES), 'power': rng.choice([None, 0, 40, 90, 150]),
+            'accuracy': 100, 'pp': 10, 'damage_class': rng.choice(['physical', 'special', 'status'])}
+
+
+class DamageEngineTest(TestCase):
+    """El motor da el mismo daño que las fórmulas de las vistas con la misma semilla."""
+
+    def test_matches_view_formulas(self):
+        rng = random.Random(11)
+        for seed in range(500):
+            # PvP usaba siempre nivel 50; wild y trainer, el del atacante
+            level = 50 if seed % 2 else rng.randint(1, 100)
+            attacker, defender, move = random_fighter(rng, level), random_fighter(rng, level), random_move(rng)
+            stat = 'attack' if move['damage_class'] == 'physical' else 'special_attack'
+            defense = 'defense' if move['damage_class'] == 'physical' else 'special_defense'
+
+            expected = view_damage(attacker[stat], defender[defense], level, move,
+                                   [defender['type1'], defender['type2']], random.Random(seed))
+            damage = calculate_damage(Combatant.from_dict(attacker), Combatant.from_dict(defender),
+                                      MoveData.from_dict(move), random.Random(seed))
+            self.assertEqual(damage, expected, (attacker, defender, move))
+
+    def test_resolve_attacks_matches_one_by_one(self):
+        rng = random.Random(5)
+        requests = [
+            AttackRequest(Combatant.from_dict(random_fighter(rng, 50)), Combatant.from_dict(random_fighter(rng, 50)),
+                          MoveData.from_dict(random_move(rng)))
+            for _ in range(50)
+        ]
+
+        one_by_one = random.Random(9)
+        expected = [calculate_damage(request.attacker, request.defender, request.move, one_by_one)
+                    for request in requests]
+        self.assertEqual(resolve_attacks(requests, random.Random(9)), expected)
+        self.assertEqual(resolve_attacks([]), [])
+
+
+class TypeChartTest(TestCase):
+    """Las tablas precalculadas dan el producto de TYPE_EFFECTIVENESS para cada combinación."""
+
+    def expected(self, move_type, type1, type2):
+        # NO_TYPE (tipo vacío o desconocido) cuenta x1; un tipo repetido se aplica una sola vez
+        defender_types = {TYPES[index] for index in (type1, type2) if index != NO_TYPE}
+        effectiveness = 1.0
+        if move_type != NO_TYPE:
+            for defender_type in defender_types:
+                effectiveness *= TYPE_EFFECTIVENESS[TYPES[move_type]].get(defender_type, 1.0)
+        return effectiveness
+
+    def test_dual_table_and_matrix(self):
+        ids = range(NO_TYPE + 1)
+        combinations = [(move, type1, type2) for move in ids for type1 in ids for type2 in ids]
+        self.assertEqual(len(DUAL_TYPE_TABLE), len(combinations))
+
+        expected = [self.expected(*combination) for combination in combinations]
+        self.assertEqual([effectiveness_by_index(*combination) for combination in combinations], expected)
+
+        type1_ids = [type1 for type1 in ids for _ in ids]
+        type2_ids = [type2 for _ in ids for type2 in ids]
+        self.assertEqual(effectiveness_matrix(list(ids), type1_ids, type2_ids).reshape(-1).tolist(), expected)
+
+    def test_type_names(self):
+        self.assertEqual(get_type_effectiveness('fire', ['grass', 'bug']), 4.0)
+        self.assertEqual(get_type_effectiveness('electric', ['water', None]), 2.0)
+        self.assertEqual(get_type_effectiveness('ground', ['flying']), 0.0)
+        self.assertEqual(get_type_effectiveness('fire', ['grass', 'grass']), 2.0)
+        self.assertEqual(get_type_effectiveness('???', ['grass']), 1.0)
+        self.assertEqual(get_type_effectiveness('fire', ['???']), 1.0)
+
+
+class MatchupTableTest(TestCase):
+    def setUp(self):
+        invalidate_game_data()
+        tackle = Move.objects.create(name='Tackle', type='normal', power=40, accuracy=100, pp=35,
+                                     damage_class='physical')
+        ember = Move.objects.create(name='Ember', type='fire', power=40, accuracy=100, pp=25,
+                                    damage_class='special')
+        self.fire = create_species(1004, 'Firemon')
+        self.grass = create_species(1001, 'Grassmon')
+        Pokemon.objects.filter(pk=self.fire.pk).update(type1='fire')
+        Pokemon.objects.filter(pk=self.grass.pk).update(type1='grass')
+        invalidate_game_data()
+        PokemonMove.objects.create(pokemon=self.fire, move=ember, level=1)
+        PokemonMove.objects.create(pokemon=self.grass, move=tackle, level=1)
+
+    def test_matches_damage_formula(self):
+        table = matchup_table(50)
+        species = {spec.pokedex_id: spec for spec in species_data(get_game_data())}
+        attacker, defender = species[1004], species[1001]
+
+        rng = random.Random(3)
+        move = best_moves(attacker, 50)[0]
+        samples = [calculate_damage(Combatant.from_species(attacker, 50), Combatant.from_species(defender, 50),
+                                    move, rng) for _ in range(20000)]
+        expected = table.expected_damage[table.index_of(1004), table.index_of(1001)]
+
+        self.assertEqual(list(table.pokedex_ids), [1001, 1004])
+        self.assertAlmostEqual(expected, sum(samples) / len(samples), delta=0.3)
+        # Fuego contra planta hace el doble que al revés con la misma potencia y stats
+        self.assertGreater(expected, table.expected_damage[table.index_of(1001), table.index_of(1004)])
+        self.assertEqual(table.turns_to_ko[table.index_of(1004), table.index_of(1001)],
+                         -(-table.stats[table.index_of(1001), 0] // expected))
+
+    def test_npz_round_trip(self):
+        table = matchup_table(30)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'matchups.npz')
+            call_command('build_matchups', level=30, output=path, stdout=open(os.devnull, 'w'))
+            loaded = MatchupTable.load(path)
+
+        self.assertEqual(loaded.level, 30)
+        self.assertEqual(loaded.names, table.names)
+        self.assertEqual(loaded.expected_damage.tolist(), table.expected_damage.tolist())
+
+    def test_api_is_cached(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='ash', email='ash@example.com', password='x'))
+
+        response = client.get('/api/game/matchups/', {'level': 50})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['expected_damage']), 2)
+
+        with self.assertNumQueries(0):
+            response = client.get('/api/game/matchups/', {'level': 50, 'pokemon': 1004})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Firemon')
+        self.assertEqual(client.get('/api/game/matchups/', {'level': 101}).status_code, 400)
+
+
+API = 'https://pokeapi.co/api/v2/'
+
+
+def api_pokemon(pokedex_id, name, moves):
+    return {
+        'name': name,
+        'types': [{'type': {'name': 'grass'}}, {'type': {'name': 'poison'}}],
+        'stats': [{'base_stat': value} for value in (45, 49, 49, 65, 65, 45)],
+        'sprites': {'front_default': f'https://example.com/{pokedex_id}.png',
+                    'back_default': f'https://example.com/back/{pokedex_id}.png'},
+        'moves': [{
+            'move': {'name': move, 'url': f'{API}move/{move}/'},
+            'version_group_details': [{'move_learn_method': {'name': 'level-up'},
+                                       'version_group': {'name': 'red-blue'}, 'level_learned_at': level}]
+        } for move, level in moves],
+    }
+
+
+def api_species(evolves_from=None):
+    return {
+        'base_happiness': 70,
+        'evolves_from_species': {'name': evolves_from} if evolves_from else None,
+        'evolution_chain': {'url': f'{API}evolution-chain/1/'},
+    }
+
+
+POKEAPI_RESPONSES = {
+    'pokemon/1/': api_pokemon(1, 'bulbasaur', [('tackle', 1)]),
+    'pokemon/2/': api_pokemon(2, 'ivysaur', [('tackle', 1), ('vine-whip', 10)]),
+    'pokemon-species/1/': api_species(),
+    'pokemon-species/2/': api_species('bulbasaur'),
+    'evolution-chain/1/': {'chain': {'species': {'name': 'bulbasaur'}, 'evolves_to': [{
+        'species': {'name': 'ivysaur'}, 'evolves_to': [],
+        'evolution_details': [{'trigger': {'name': 'level-up'}, 'min_level': 16}],
+    }]}},
+    'move/tackle/': {'type': {'name': 'normal'}, 'power': 40, 'accuracy': 100, 'pp': 35,
+                     'damage_class': {'name': 'physical'}},
+    'move/vine-whip/': {'type': {'name': 'grass'}, 'power': 45, 'accuracy': 100, 'pp': 25,
+                        'damage_class': {'name': 'special'}},
+}
+
+
+class StubPokeApi(BaseHTTPRequestHandler):
+    requests = Counter()
+
+    def do_GET(self):
+        path = self.path.split('/api/v2/', 1)[-1]
+        StubPokeApi.requests[path] += 1
+        data = POKEAPI_RESPONSES.get(path)
+        self.send_response(200 if data is not None else 404)
+        self.end_headers()
+        if data is not None:
+            self.wfile.write(json.dumps(data).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class PokeApiImportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubPokeApi)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}/api/v2/'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubPokeApi.requests.clear()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+
+    def load(self, **options):
+        out = StringIO()
+        call_command('load_pokemon_data', count=2, base_url=self.base_url, cache_dir=self.cache_dir, rate=0,
+                     stdout=out, **options)
+        return out.getvalue()
+
+    def test_import_from_stub_server(self):
+        self.load()
+
+        bulbasaur, ivysaur = Pokemon.objects.order_by('pokedex_id')
+        self.assertEqual(ivysaur.evolves_from_id, bulbasaur.id)
+        self.assertEqual(ivysaur.evolution_level, 16)
+        self.assertEqual(Move.objects.get(name='vine-whip').power, 45)
+        self.assertEqual(PokemonMove.objects.filter(pokemon=ivysaur).count(), 2)
+        # La cadena de evolución compartida y cada movimiento se piden una sola vez
+        self.assertEqual(set(StubPokeApi.requests.values()), {1})
+        self.assertEqual(len(StubPokeApi.requests), len(POKEAPI_RESPONSES))
+
+    def test_rerun_is_served_from_cache(self):
+        self.load()
+        StubPokeApi.requests.clear()
+        Pokemon.objects.all().delete()
+        Move.objects.all().delete()
+
+        self.load(offline=True)
+
+        self.assertFalse(StubPokeApi.requests)
+        self.assertEqual(Pokemon.objects.count(), 2)
+
+    def test_rerun_upserts_moves_and_learnsets_in_bulk(self):
+        output = self.load()
+        self.assertIn('Movimientos: 2 nuevos, 0 actualizados, 0 sin cambios', output)
+        self.assertIn('Aprendizajes: 3 nuevos, 0 sin cambios', output)
+
+        Move.objects.filter(name='tackle').update(power=1)
+        PokemonMove.objects.filter(move__name='vine-whip').delete()
+
+        output = self.load(offline=True)
+
+        self.assertIn('Movimientos: 0 nuevos, 1 actualizados, 1 sin cambios', output)
+        self.assertIn('Aprendizajes: 1 nuevos, 2 sin cambios', output)
+        self.assertEqual(Move.objects.get(name='tackle').power, 40)
+        self.assertEqual(PokemonMove.objects.count(), 3)
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        Checkpoint(os.path.join(self.cache_dir, 'load_pokemon_data.checkpoint.json')).mark('pokemon', 1)
+
+        output = self.load()
+
+        self.assertEqual(list(Pokemon.objects.values_list('name', flat=True)), ['Ivysaur'])
+        self.assertIn('cargados exitosamente', output)
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, 'load_pokemon_data.checkpoint.json')))
+
+    def test_client_cache_and_errors(self):
+        client = PokeApiClient(base_url=self.base_url, cache_dir=self.cache_dir, rate_limit=0, retries=1)
+
+        results, errors = client.get_many(['pokemon/1/', f'{API}pokemon/1/', 'pokemon/999/'])
+
+        self.assertEqual(results['pokemon/1/']['name'], 'bulbasaur')
+        self.assertIn('pokemon/999/', errors)
+        self.assertEqual(StubPokeApi.requests['pokemon/1/'], 1)
+        with self.assertRaises(PokeApiError):
+            PokeApiClient(base_url=self.base_url, cache_dir=self.cache_dir, offline=True).get('pokemon/2/')
+
+
+class GameDataBundleTest(TestCase):
+    def setUp(self):
+        base = create_species(1, 'Basemon')
+        evolved = create_species(2, 'Evomon', evolves_from=base, evolution_level=16)
+        tackle = Move.objects.create(name='tackle', type='normal', power=40, accuracy=100, pp=35,
+                                     damage_class='physical')
+        PokemonMove.objects.create(pokemon=base, move=tackle, level=1)
+        PokemonMove.objects.create(pokemon=evolved, move=tackle, level=1)
+        town = Location.objects.create(name='Pueblo Paleta', location_type='town')
+        route = Location.objects.create(name='Ruta 1', location_type='route')
+        town.connected_locations.add(route)
+        route.connected_locations.add(town)
+        WildPokemonEncounter.objects.create(location=route, pokemon=base, min_level=2, max_level=4, rarity='common')
+        ShopItem.objects.create(name='Poción', item_type='potion', price=300, description='Cura 20 PS',
+                                effect_value=20)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'game_data.json.gz')
+        call_command('export_game_data', output=self.path, stdout=StringIO())
+        self.exported_hash = content_hash(dump_tables())
+
+    def clear(self):
+        for model in (WildPokemonEncounter, ShopItem, PokemonMove, Location, Pokemon, Move):
+            model.objects.all().delete()
+
+    def test_round_trip(self):
+        self.clear()
+        get_game_data()
+
+        call_command('import_game_data', input=self.path, stdout=StringIO())
+
+        self.assertEqual(content_hash(dump_tables()), self.exported_hash)
+        evolved = Pokemon.objects.get(name='Evomon')
+        self.assertEqual((evolved.evolves_from.name, evolved.evolution_level), ('Basemon', 16))
+        route = Location.objects.get(name='Ruta 1')
+        self.assertEqual([location.name for location in route.connected_locations.all()], ['Pueblo Paleta'])
+        # bulk_create no envía señales: el registro se invalida a mano
+        self.assertEqual(get_game_data().encounters(route.id)[0].pokemon.name, 'Basemon')
+
+    def test_same_content_is_skipped(self):
+        output = StringIO()
+        with self.assertNumQueries(len(dump_tables()) + 2):  # lectura de cada tabla + savepoint
+            call_command('import_game_data', input=self.path, stdout=output)
+        self.assertIn('ya coinciden', output.getvalue())
+
+    def test_other_content_needs_replace(self):
+        Move.objects.filter(name='tackle').update(power=50)
+
+        with self.assertRaises(BundleError):
+            import_bundle(self.path)
+        import_bundle(self.path, replace=True)
+        self.assertEqual(Move.objects.get(name='tackle').power, 40)
+
+    def test_replace_keeps_player_data(self):
+        user = User.objects.create_user(username='ash', email='ash@example.com', password='secret')
+        player = Player.objects.create(user=user, current_location=Location.objects.get(name='Ruta 1'))
+        player_pokemon = PlayerPokemon.objects.create(player=player, pokemon=Pokemon.objects.get(name='Basemon'),
+                                                      level=5)
+        player_pokemon.set_moves([Move.objects.get(name='tackle')])
+        Move.objects.filter(name='tackle').update(power=50)
+        Pokemon.objects.filter(name='Evomon').update(evolution_level=20)
+        extra = create_species(3, 'Extramon')
+
+        import_bundle(self.path, replace=True)
+
+        self.assertEqual(content_hash(dump_tables()), self.exported_hash)
+        self.assertFalse(Pokemon.objects.filter(pk=extra.pk).exists())
+        player.refresh_from_db()
+        self.assertEqual(player.current_location.name, 'Ruta 1')
+        self.assertEqual([move.power for move in PlayerPokemon.objects.get(pk=player_pokemon.pk).get_moves()], [40])
+
+    def test_replace_refuses_to_drop_player_data(self):
+        user = User.objects.create_user(username='ash', email='ash@example.com', password='secret')
+        player = Player.objects.create(user=user)
+        extra = create_species(3, 'Extramon')
+        PlayerPokemon.objects.create(player=player, pokemon=extra, level=5)
+
+        with self.assertRaises(BundleError):
+            import_bundle(self.path, replace=True)
+        self.assertTrue(PlayerPokemon.objects.filter(pokemon=extra).exists())
+
+    def test_damaged_bundle_is_rejected(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+            bundle = json.load(file)
+        bundle['tables']['moves']['rows'][0][2] = 'fire'
+        with gzip.open(self.path, 'wt', encoding='utf-8') as file:
+            json.dump(bundle, file)
 
-# Create your tests here.
+        with self.assertRaises(BundleError):
+            import_bundle(self.path, replace=True)
@@ -6,6 +6,7 @@ from .api.MoveViewSet import MoveViewSet
 from .api.PokemonMoveViewSet import PokemonMoveViewSet
 from .api.PokemonViewSet import PokemonViewSet
 from .api.LocationViewSet import LocationViewSet
+from .api.MatchupViewSet import MatchupViewSet
 from .api.WildPokemonEncounterViewSet import WildPokemonEncounterViewSet
 
 router = DefaultRouter()
@@ -15,6 +16,7 @@ router.register(r'moves', MoveViewSet, basename='move')
 router.register(r'pokemon-moves', PokemonMoveViewSet, basename='pokemonmove')
 router.register(r'wild-encounters', WildPokemonEncounterViewSet, basename='wildencounter')
 router.register(r'shop', ShopViewSet, basename='shop')
+router.register(r'matchups', MatchupViewSet, basename='matchup')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -4,6 +4,7 @@ from .models.User import User
 from .models.Player import Player
 from .models.Bag import Bag
 from .models.Pokedex import Pokedex
+from .models.PokedexProgress import PokedexProgress
 from .models.PlayerPokemon import PlayerPokemon
 
 @admin.register(User)
@@ -31,6 +32,11 @@ class PokedexAdmin(admin.ModelAdmin):
     list_display = ('player', 'pokemon', 'state', 'date_registered')
     list_filter = ('state',)
 
+@admin.register(PokedexProgress)
+class PokedexProgressAdmin(admin.ModelAdmin):
+    list_display = ('player', 'seen_count', 'caught_count')
+    readonly_fields = ('seen', 'caught', 'seen_count', 'caught_count', 'version')
+
 @admin.register(PlayerPokemon)
 class PlayerPokemonAdmin(admin.ModelAdmin):
     list_display = ('player', 'pokemon', 'nickname', 'level')
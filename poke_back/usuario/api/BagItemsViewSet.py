@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from usuario.models.Bag import Bag
 from usuario.models.PlayerPokemon import PlayerPokemon
+from usuario.services.battle_sessions import battle_sessions
 
 
 class BagItemsViewSet(viewsets.ViewSet):
@@ -18,6 +19,7 @@ class BagItemsViewSet(viewsets.ViewSet):
         if not pokemon_id:
             return Response({'error': 'Se requiere pokemon_id'}, status=400)
 
+        battle_sessions.release_player(player)
         try:
             pokemon = PlayerPokemon.objects.get(pk=pokemon_id, player=player)
         except PlayerPokemon.DoesNotExist:
@@ -40,7 +42,7 @@ class BagItemsViewSet(viewsets.ViewSet):
 
         new_hp = min(pokemon.current_hp + heal_amounts[potion_type], pokemon.hp)
         pokemon.current_hp = new_hp
-        pokemon.save()
+        pokemon.save(update_fields=['current_hp'])
 
         return Response({
             'message': f'Usaste una {potion_type} en {pokemon.pokemon.name}',
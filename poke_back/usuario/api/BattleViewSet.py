@@ -10,10 +10,21 @@ from usuario.models.PlayerPokemon import PlayerPokemon
 from usuario.models.Bag import Bag
 from pokemon.models.Pokemon import Pokemon
 from pokemon.models.Move import Move
-from pokemon.models.PokemonMove import PokemonMove
+from pokemon.services.encounters import encounter_sampler
+from pokemon.services.game_data import get_game_data
+from pokemon.services.wild_pools import wild_encounter_pool
 from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
+from pokemon.engine import Combatant, MoveData, calculate_damage
+from usuario.services.battle_turns import (
+    find_known_move, get_current_pp, spend_pp, wild_counter_attack, trainer_counter_attack
+)
+from usuario.services.battle_sessions import battle_sessions, serialized_by_battle
+from usuario.services.experience import award_experience
+from usuario.services.healing import heal_team
+from usuario.services.pokedex_progress import register_pokemons
+from usuario.services.trainer_rosters import pick_trainer
+from usuario.services.wild_battles import new_wild_battle, register_seen
 import json
-import random
 
 
 class BattleSerializer(serializers.ModelSerializer):
@@ -48,103 +59,44 @@ class BattleSerializer(serializers.ModelSerializer):
 class BattleViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
-    TYPE_EFFECTIVENESS = {
-        'normal': {'rock': 0.5, 'ghost': 0, 'steel': 0.5},
-        'fire': {'fire': 0.5, 'water': 0.5, 'grass': 2, 'ice': 2, 'bug': 2, 'rock': 0.5, 'dragon': 0.5, 'steel': 2},
-        'water': {'fire': 2, 'water': 0.5, 'grass': 0.5, 'ground': 2, 'rock': 2, 'dragon': 0.5},
-        'electric': {'water': 2, 'electric': 0.5, 'grass': 0.5, 'ground': 0, 'flying': 2, 'dragon': 0.5},
-        'grass': {'fire': 0.5, 'water': 2, 'grass': 0.5, 'poison': 0.5, 'ground': 2, 'flying': 0.5, 'bug': 0.5,
-                  'rock': 2, 'dragon': 0.5, 'steel': 0.5},
-        'ice': {'fire': 0.5, 'water': 0.5, 'grass': 2, 'ice': 0.5, 'ground': 2, 'flying': 2, 'dragon': 2, 'steel': 0.5},
-        'fighting': {'normal': 2, 'ice': 2, 'poison': 0.5, 'flying': 0.5, 'psychic': 0.5, 'bug': 0.5, 'rock': 2,
-                     'ghost': 0, 'dark': 2, 'steel': 2, 'fairy': 0.5},
-        'poison': {'grass': 2, 'poison': 0.5, 'ground': 0.5, 'rock': 0.5, 'ghost': 0.5, 'steel': 0, 'fairy': 2},
-        'ground': {'fire': 2, 'electric': 2, 'grass': 0.5, 'poison': 2, 'flying': 0, 'bug': 0.5, 'rock': 2, 'steel': 2},
-        'flying': {'electric': 0.5, 'grass': 2, 'fighting': 2, 'bug': 2, 'rock': 0.5, 'steel': 0.5},
-        'psychic': {'fighting': 2, 'poison': 2, 'psychic': 0.5, 'dark': 0, 'steel': 0.5},
-        'bug': {'fire': 0.5, 'grass': 2, 'fighting': 0.5, 'poison': 0.5, 'flying': 0.5, 'psychic': 2, 'ghost': 0.5,
-                'dark': 2, 'steel': 0.5, 'fairy': 0.5},
-        'rock': {'fire': 2, 'ice': 2, 'fighting': 0.5, 'ground': 0.5, 'flying': 2, 'bug': 2, 'steel': 0.5},
-        'ghost': {'normal': 0, 'psychic': 2, 'ghost': 2, 'dark': 0.5},
-        'dragon': {'dragon': 2, 'steel': 0.5, 'fairy': 0},
-        'dark': {'fighting': 0.5, 'psychic': 2, 'ghost': 2, 'dark': 0.5, 'fairy': 0.5},
-        'steel': {'fire': 0.5, 'water': 0.5, 'electric': 0.5, 'ice': 2, 'rock': 2, 'steel': 0.5, 'fairy': 2},
-        'fairy': {'fire': 0.5, 'fighting': 2, 'poison': 0.5, 'dragon': 2, 'dark': 2, 'steel': 0.5}
-    }
-
     @action(detail=False, methods=['post'])
     def start_wild_battle(self, request):
         player = request.user.player_profile
+        # PS y PP de otro combate aún en memoria: se escriben antes de elegir el Pokémon activo
+        battle_sessions.release_player(player)
 
         if not player.current_location:
             return Response({'error': 'No estás en ninguna ubicación'}, status=400)
         if player.current_location.location_type != 'route':
             return Response({'error': 'Solo puedes encontrar Pokémon salvajes en rutas'}, status=400)
 
-        active_pokemon = player.pokemons.filter(in_team=True, current_hp__gt=0).order_by('order').first()
+        active_pokemon = player.pokemons.filter(in_team=True, current_hp__gt=0).select_related(
+            'pokemon').prefetch_related('move_slots').order_by('order').first()
         if not active_pokemon:
             return Response({'error': 'No tienes Pokémon disponibles para combatir'}, status=400)
 
-        location_id = player.current_location.id
-
-        try:
-            encounter = self.get_wild_encounter(location_id)
-            if not encounter:
-                return Response({'error': 'No hay Pokémon salvajes en esta ruta'}, status=400)
-        except Exception as e:
-            return Response({'error': f'Error al buscar Pokémon: {str(e)}'}, status=400)
-
-        wild_level = random.randint(encounter.min_level, encounter.max_level)
-        wild_hp = self.calculate_hp(encounter.pokemon.base_hp, wild_level)
-        wild_attack = self.calculate_stat(encounter.pokemon.base_attack, wild_level)
-        wild_defense = self.calculate_stat(encounter.pokemon.base_defense, wild_level)
-        wild_special_attack = self.calculate_stat(encounter.pokemon.base_special_attack, wild_level)
-        wild_special_defense = self.calculate_stat(encounter.pokemon.base_special_defense, wild_level)
-        wild_speed = self.calculate_stat(encounter.pokemon.base_speed, wild_level)
-
-        wild_moves = PokemonMove.objects.filter(
-            pokemon=encounter.pokemon,
-            level__lte=wild_level
-        ).select_related('move')[:4]
-
-        if not wild_moves:
+        template = wild_encounter_pool(player.current_location.id).sample()
+        if template is None:
+            return Response({'error': 'No hay Pokémon salvajes en esta ruta'}, status=400)
+        if not template.moves:
             return Response({'error': 'El Pokémon salvaje no tiene movimientos'}, status=400)
 
-        with transaction.atomic():
-            battle = Battle.objects.create(
-                player=player,
-                wild_pokemon=encounter.pokemon,
-                wild_level=wild_level,
-                wild_current_hp=wild_hp,
-                wild_max_hp=wild_hp,
-                player_pokemon=active_pokemon,
-                state='active',
-                turn=0
-            )
-
-            for pokemon_move in wild_moves:
-                battle.wild_moves.add(pokemon_move.move)
-
-        from usuario.models.Pokedex import Pokedex
-        Pokedex.objects.get_or_create(
-            player=player,
-            pokemon=encounter.pokemon,
-            defaults={'state': 'seen'}
-        )
+        battle = new_wild_battle(player, active_pokemon, template)
+        battle.save()
+        register_seen(player, [template.pokemon])
 
         return Response({
             'battle_id': battle.id,
-            'message': f'¡Un {encounter.pokemon.name} salvaje apareció!',
+            'message': f'¡Un {template.pokemon.name} salvaje apareció!',
             'wild_pokemon': {
-                'id': encounter.pokemon.id,
-                'name': encounter.pokemon.name,
-                'level': wild_level,
-                'types': [encounter.pokemon.type1, encounter.pokemon.type2] if encounter.pokemon.type2 else [
-                    encounter.pokemon.type1],
-                'sprite_front': encounter.pokemon.sprite_front,
-                'current_hp': wild_hp,
-                'max_hp': wild_hp,
-                'moves': [{'id': move.move.id, 'name': move.move.name, 'type': move.move.type} for move in wild_moves]
+                'id': template.pokemon.id,
+                'name': template.pokemon.name,
+                'level': template.level,
+                'types': template.types,
+                'sprite_front': template.pokemon.sprite_front,
+                'current_hp': template.hp,
+                'max_hp': template.hp,
+                'moves': [{'id': move.id, 'name': move.name, 'type': move.type} for move in template.moves]
             },
             'player_pokemon': {
                 'id': active_pokemon.id,
@@ -158,13 +110,14 @@ class BattleViewSet(viewsets.ViewSet):
                 'current_hp': active_pokemon.current_hp,
                 'max_hp': active_pokemon.hp,
                 'moves': [{'id': move.id, 'name': move.name, 'type': move.type, 'power': move.power,
-                           'accuracy': move.accuracy, 'pp': move.pp} for move in active_pokemon.moves.all()]
+                           'accuracy': move.accuracy, 'pp': move.pp} for move in active_pokemon.get_moves()]
             }
         })
 
     @action(detail=False, methods=['post'])
     def start_trainer_battle(self, request):
         player = request.user.player_profile
+        battle_sessions.release_player(player)
 
         if not player.current_location:
             return Response({'error': 'No estás en ninguna ubicación'}, status=400)
@@ -172,40 +125,42 @@ class BattleViewSet(viewsets.ViewSet):
         if player.current_location.location_type != 'route':
             return Response({'error': 'Solo puedes combatir con entrenadores en rutas'}, status=400)
 
-        active_pokemon = player.pokemons.filter(in_team=True, current_hp__gt=0).order_by('order').first()
+        active_pokemon = player.pokemons.filter(in_team=True, current_hp__gt=0).select_related(
+            'pokemon').prefetch_related('move_slots').order_by('order').first()
         if not active_pokemon:
             return Response({'error': 'No tienes Pokémon disponibles para combatir'}, status=400)
 
-        trainer_data = self.generate_random_trainer(player.current_location)
+        # Entrenador ya generado para la ruta: sorteo en memoria y un único INSERT
+        trainer = pick_trainer(player.current_location.id)
 
-        if not trainer_data:
+        if not trainer:
             return Response({'error': 'No se pudo generar un entrenador para esta zona'}, status=400)
 
-        with transaction.atomic():
-            battle = Battle.objects.create(
-                battle_type='trainer',
-                player=player,
-                trainer_name=trainer_data['name'],
-                trainer_sprite=trainer_data['sprite'],
-                trainer_dialogue=trainer_data['dialogue'],
-                trainer_money_reward=trainer_data['money_reward'],
-                trainer_team=trainer_data['team'],
-                current_trainer_pokemon=0,
-                player_pokemon=active_pokemon,
-                state='active',
-                turn=0
-            )
+        team = trainer.team()
+        battle = Battle.objects.create(
+            battle_type='trainer',
+            player=player,
+            trainer_name=trainer.name,
+            trainer_sprite=trainer.sprite,
+            trainer_dialogue=trainer.dialogue,
+            trainer_money_reward=trainer.money_reward,
+            trainer_team=team,
+            current_trainer_pokemon=0,
+            player_pokemon=active_pokemon,
+            state='active',
+            turn=0
+        )
 
-        first_pokemon = trainer_data['team'][0] if trainer_data['team'] else None
+        first_pokemon = team[0] if team else None
 
         return Response({
             'battle_id': battle.id,
-            'message': trainer_data['dialogue'],
+            'message': trainer.dialogue,
             'trainer': {
-                'name': trainer_data['name'],
-                'sprite': trainer_data['sprite'],
-                'team_size': len(trainer_data['team']),
-                'money_reward': trainer_data['money_reward']
+                'name': trainer.name,
+                'sprite': trainer.sprite,
+                'team_size': trainer.team_size,
+                'money_reward': trainer.money_reward
             },
             'opponent_pokemon': first_pokemon,
             'player_pokemon': {
@@ -217,13 +172,14 @@ class BattleViewSet(viewsets.ViewSet):
                 'sprite_front': active_pokemon.pokemon.sprite_front,
                 'sprite_back': active_pokemon.pokemon.sprite_back,
                 'moves': [{'id': move.id, 'name': move.name, 'type': move.type, 'power': move.power,
-                           'accuracy': move.accuracy, 'pp': move.pp} for move in active_pokemon.moves.all()]
+                           'accuracy': move.accuracy, 'pp': move.pp} for move in active_pokemon.get_moves()]
             }
         })
 
     @action(detail=False, methods=['get'])
     def can_start_battle(self, request):
         player = request.user.player_profile
+        battle_sessions.release_player(player)
 
         if not player.current_location:
             return Response({
@@ -259,31 +215,10 @@ class BattleViewSet(viewsets.ViewSet):
         })
 
     def get_wild_encounter(self, location_id):
-        encounters = WildPokemonEncounter.objects.filter(location_id=location_id)
-        if not encounters:
-            return None
-
-        # Sistema de rareza
-        rarity_weights = {
-            'common': 60,
-            'uncommon': 30,
-            'rare': 9,
-            'very_rare': 1
-        }
-
-        weighted_encounters = []
-        for encounter in encounters:
-            weighted_encounters.extend([encounter] * rarity_weights[encounter.rarity])
-
-        return random.choice(weighted_encounters)
-
-    def calculate_hp(self, base_hp, level):
-        return int((2 * base_hp * level) / 100) + level + 10
-
-    def calculate_stat(self, base_stat, level):
-        return int((2 * base_stat * level) / 100) + 5
+        return encounter_sampler(location_id).sample()
 
     @action(detail=True, methods=['post'])
+    @serialized_by_battle
     def attack(self, request, pk=None):
         battle = self.get_battle(pk, request.user)
         if not battle or not battle.is_active:
@@ -293,264 +228,134 @@ class BattleViewSet(viewsets.ViewSet):
         if not move_id:
             return Response({'error': 'Se requiere move_id'}, status=400)
 
-        try:
-            player_move = battle.player_pokemon.moves.get(id=move_id)
-        except Move.DoesNotExist:
+        player_pokemon = battle.player_pokemon
+
+        player_move = find_known_move(player_pokemon, move_id)
+        if not player_move:
             return Response({'error': 'Movimiento no válido'}, status=400)
 
-        current_pp = self.get_move_current_pp(battle.player_pokemon, move_id)
+        current_pp = get_current_pp(player_pokemon, player_move)
         if current_pp <= 0:
             return Response({'error': f'No hay PP restantes para {player_move.name}'}, status=400)
 
-        with transaction.atomic():
-            message = ""
+        if battle.battle_type == 'trainer' and not battle.current_opponent_pokemon:
+            return Response({'error': 'No hay Pokémon oponente activo'}, status=400)
 
-            if battle.battle_type == 'wild':
-                damage = self.calculate_damage(
-                    battle.player_pokemon,
-                    battle.wild_pokemon,
-                    player_move,
-                    battle.wild_level
-                )
-                battle.wild_current_hp -= damage
-                battle.wild_current_hp = max(0, battle.wild_current_hp)
+        # Todo el turno se resuelve en memoria; battle_sessions decide cuándo escribirlo
+        remaining_pp = spend_pp(player_pokemon, player_move)
+        message = f'{player_pokemon.pokemon.name} usó {player_move.name}. '
 
-                remaining_pp = self.reduce_move_pp(battle.player_pokemon, move_id)
+        if battle.battle_type == 'wild':
+            damage = self.calculate_damage(
+                player_pokemon,
+                battle.wild_pokemon,
+                player_move,
+                battle.wild_level
+            )
+            battle.wild_current_hp = max(0, battle.wild_current_hp - damage)
 
-                message = f'{battle.player_pokemon.pokemon.name} usó {player_move.name}. '
-                if damage > 0:
-                    message += f'Causó {damage} de daño.'
-                    message += f'(PP: {remaining_pp}/{player_move.pp})'
+            if damage > 0:
+                message += f'Causó {damage} de daño.'
+                message += f'(PP: {remaining_pp}/{player_move.pp})'
 
-                if battle.wild_current_hp <= 0:
-                    battle.state = 'won'
-                    battle.save()
+            if battle.wild_current_hp <= 0:
+                battle.state = 'won'
+                with transaction.atomic():
+                    battle_sessions.save_turn(battle, player_pokemon)
                     return self.handle_battle_win(battle, message)
 
-            if battle.battle_type == 'trainer' :  # battle_type == 'trainer'
-                current_opponent = battle.current_opponent_pokemon
-                if not current_opponent:
-                    return Response({'error': 'No hay Pokémon oponente activo'}, status=400)
+            wild_damage, wild_move = self.wild_attack(battle)
+            player_pokemon.current_hp = max(0, player_pokemon.current_hp - wild_damage)
 
-                damage = self.calculate_damage_trainer(
-                    battle.player_pokemon,
-                    current_opponent,
-                    player_move
-                )
+            message += f' {battle.wild_pokemon.name} usó {wild_move.name}. '
+            if wild_damage > 0:
+                message += f'Causó {wild_damage} de daño.'
 
-                battle.trainer_team[battle.current_trainer_pokemon]['current_hp'] -= damage
-                battle.trainer_team[battle.current_trainer_pokemon]['current_hp'] = max(
-                    0, battle.trainer_team[battle.current_trainer_pokemon]['current_hp']
-                )
+        if battle.battle_type == 'trainer':
+            current_opponent = battle.current_opponent_pokemon
 
-                remaining_pp = self.reduce_move_pp(battle.player_pokemon, move_id)
+            damage = self.calculate_damage_trainer(
+                player_pokemon,
+                current_opponent,
+                player_move
+            )
+            current_opponent['current_hp'] = max(0, current_opponent['current_hp'] - damage)
 
-                message = f'{battle.player_pokemon.pokemon.name} usó {player_move.name}. '
-                message += f'Causó {damage} de daño. (PP restantes: {remaining_pp}/{player_move.pp})'
-                if damage > 0:
-                    message += f'Causó {damage} de daño.'
+            message += f'Causó {damage} de daño. (PP restantes: {remaining_pp}/{player_move.pp})'
+            if damage > 0:
+                message += f'Causó {damage} de daño.'
 
-                if battle.trainer_team[battle.current_trainer_pokemon]['current_hp'] <= 0:
-                    opponent_name = battle.trainer_team[battle.current_trainer_pokemon]['pokemon_name']
-                    message += f' ¡{opponent_name} fue derrotado!'
+            if current_opponent['current_hp'] <= 0:
+                message += f' ¡{current_opponent["pokemon_name"]} fue derrotado!'
 
-                    if battle.is_trainer_defeated():
-                        battle.state = 'won'
-                        battle.save()
+                next_index = self.get_next_trainer_pokemon(battle)
+                if next_index is None:
+                    battle.state = 'won'
+                    with transaction.atomic():
+                        battle_sessions.save_turn(battle, player_pokemon)
                         return self.handle_trainer_battle_win(battle, message)
-                    else:
-                        next_index = self.get_next_trainer_pokemon(battle)
-                        if next_index is not None:
-                            battle.current_trainer_pokemon = next_index
-                            next_pokemon = battle.trainer_team[next_index]
-                            message += f' {battle.trainer_name} envía a {next_pokemon["pokemon_name"]}.'
-                        else:
-                            battle.state = 'won'
-                            battle.save()
-                            return self.handle_trainer_battle_win(battle, message)
-
-                battle.save()
-
-            if battle.battle_type == 'wild':
-                wild_damage, wild_move = self.wild_attack(battle)
-                battle.player_pokemon.current_hp -= wild_damage
-                battle.player_pokemon.current_hp = max(0, battle.player_pokemon.current_hp)
-
-                PlayerPokemon.objects.filter(pk=battle.player_pokemon.pk).update(
-                    current_hp=battle.player_pokemon.current_hp
-                )
 
-                message += f' {battle.wild_pokemon.name} usó {wild_move.name}. '
-                if wild_damage > 0:
-                    message += f'Causó {wild_damage} de daño.'
-
-            if battle.battle_type == 'trainer':  # battle_type == 'trainer'
-                current_opponent = battle.current_opponent_pokemon
-                if current_opponent and current_opponent['current_hp'] > 0:
-                    trainer_damage, trainer_move = self.trainer_attack(battle)
-                    battle.player_pokemon.current_hp -= trainer_damage
-                    battle.player_pokemon.current_hp = max(0, battle.player_pokemon.current_hp)
-
-                    PlayerPokemon.objects.filter(pk=battle.player_pokemon.pk).update(
-                        current_hp=battle.player_pokemon.current_hp
-                    )
-
-                    opponent_name = battle.trainer_team[battle.current_trainer_pokemon]['pokemon_name']
-                    message += f' {opponent_name} usó {trainer_move["name"]}. '
-                    if trainer_damage > 0:
-                        message += f'Causó {trainer_damage} de daño.'
-
-            if battle.player_pokemon.current_hp <= 0:
-                defeated_pokemon_name = battle.player_pokemon.pokemon.name
-
-                next_pokemon = self.get_next_available_pokemon(battle.player)
-                if next_pokemon:
-                    battle.player_pokemon = next_pokemon
-                    battle.save()
-                    message += f' {defeated_pokemon_name} fue derrotado. ¡{next_pokemon.pokemon.name} entra al combate!'
-                else:
-                    battle.state = 'lost'
-                    battle.save()
-                    if battle.battle_type == 'wild':
-                        return self.handle_battle_loss(battle, message)
-                    else:
-                        return self.handle_trainer_battle_loss(battle, message)
-            else:
-                battle.save()
-
-            return Response({
-                'message': message,
-                'battle_state': self.get_battle_state(battle)
-            })
+                battle.current_trainer_pokemon = next_index
+                message += f' {battle.trainer_name} envía a {battle.trainer_team[next_index]["pokemon_name"]}.'
 
-    def reduce_move_pp(self, player_pokemon, move_id):
-        from usuario.models.PlayerPokemon import PlayerPokemon
-
-        move_id_str = str(move_id)
-        if not player_pokemon.moves_pp:
-            player_pokemon.moves_pp = {}
-
-        try:
-            move = Move.objects.get(id=move_id)
-            max_pp = move.pp
-        except Move.DoesNotExist:
-            max_pp = 0
-
-        if move_id_str not in player_pokemon.moves_pp:
-            player_pokemon.moves_pp[move_id_str] = max_pp
+            trainer_damage, trainer_move = self.trainer_attack(battle)
+            player_pokemon.current_hp = max(0, player_pokemon.current_hp - trainer_damage)
 
-        current_pp = player_pokemon.moves_pp[move_id_str]
-        if current_pp > 0:
-            player_pokemon.moves_pp[move_id_str] = current_pp - 1
+            opponent_name = battle.current_opponent_pokemon['pokemon_name']
+            message += f' {opponent_name} usó {trainer_move["name"]}. '
+            if trainer_damage > 0:
+                message += f'Causó {trainer_damage} de daño.'
 
-        PlayerPokemon.objects.filter(pk=player_pokemon.pk).update(
-            moves_pp=player_pokemon.moves_pp
-        )
+        fainted = player_pokemon.current_hp <= 0
+        if fainted:
+            defeated_pokemon_name = player_pokemon.pokemon.name
 
-        return player_pokemon.moves_pp[move_id_str]
+            next_pokemon = self.get_next_available_pokemon(battle.player, exclude=player_pokemon)
+            if next_pokemon:
+                battle.player_pokemon = next_pokemon
+                message += f' {defeated_pokemon_name} fue derrotado. ¡{next_pokemon.pokemon.name} entra al combate!'
+            else:
+                battle.state = 'lost'
 
-    def get_move_current_pp(self, player_pokemon, move_id):
-        move_id_str = str(move_id)
+        if battle.state == 'lost':
+            with transaction.atomic():
+                battle_sessions.save_turn(battle, player_pokemon)
+                if battle.battle_type == 'wild':
+                    return self.handle_battle_loss(battle, message)
+                return self.handle_trainer_battle_loss(battle, message)
 
-        if not player_pokemon.moves_pp:
-            try:
-                move = Move.objects.get(id=move_id)
-                return move.pp
-            except Move.DoesNotExist:
-                return 0
+        # Un Pokémon debilitado deja de ser el activo: se escribe ya
+        battle_sessions.save_turn(battle, player_pokemon, flush=fainted)
 
-        if move_id_str in player_pokemon.moves_pp:
-            return player_pokemon.moves_pp[move_id_str]
-        else:
-            try:
-                move = Move.objects.get(id=move_id)
-                return move.pp
-            except Move.DoesNotExist:
-                return 0
+        return Response({
+            'message': message,
+            'battle_state': self.get_battle_state(battle)
+        })
 
     def get_battle(self, battle_id, user):
         try:
-            return Battle.objects.get(id=battle_id, player__user=user, state='active')
+            return battle_sessions.get(battle_id, user)
         except Battle.DoesNotExist:
             return None
 
     def calculate_damage(self, attacker, defender, move, defender_level):
-        if move.damage_class == 'status':
-            return 0
-
-        if move.damage_class == 'physical':
-            attack_stat = attacker.attack
-            defense_stat = self.calculate_stat(defender.base_defense, defender_level)
-        else:
-            attack_stat = attacker.special_attack
-            defense_stat = self.calculate_stat(defender.base_special_defense, defender_level)
-
-        level_factor = (2 * attacker.level) / 5 + 2
-        power_factor = move.power if move.power else 0
-        stat_factor = attack_stat / defense_stat
-
-        base_damage = (level_factor * power_factor * stat_factor) / 50 + 2
-
-        type_effectiveness = self.get_type_effectiveness(move.type, [defender.type1, defender.type2])
-        base_damage *= type_effectiveness
-
-        base_damage *= random.uniform(0.85, 1.0)
-
-        return int(max(1, base_damage))
-
-    def get_type_effectiveness(self, move_type, defender_types):
-        effectiveness = 1.0
-        for defender_type in defender_types:
-            if defender_type and move_type in self.TYPE_EFFECTIVENESS:
-                if defender_type in self.TYPE_EFFECTIVENESS[move_type]:
-                    effectiveness *= self.TYPE_EFFECTIVENESS[move_type][defender_type]
-        return effectiveness
+        return calculate_damage(
+            Combatant.from_player_pokemon(attacker),
+            Combatant.from_species(defender, defender_level),
+            MoveData.from_model(move)
+        )
 
     def wild_attack(self, battle):
-        available_moves = list(battle.wild_moves.all())
-        if not available_moves:
-            return 0, Move.objects.first()
-
-        wild_move = random.choice(available_moves)
-
-        wild_attack = self.calculate_stat(battle.wild_pokemon.base_attack, battle.wild_level)
-        wild_special_attack = self.calculate_stat(battle.wild_pokemon.base_special_attack, battle.wild_level)
+        return wild_counter_attack(battle)
 
-        if wild_move.damage_class == 'status':
-            damage = 0
-        else:
-            if wild_move.damage_class == 'physical':
-                attack_stat = wild_attack
-                defense_stat = battle.player_pokemon.defense
-            else:
-                attack_stat = wild_special_attack
-                defense_stat = battle.player_pokemon.special_defense
-
-            level_factor = (2 * battle.wild_level) / 5 + 2
-            power_factor = wild_move.power if wild_move.power else 0
-            stat_factor = attack_stat / defense_stat
-
-            base_damage = (level_factor * power_factor * stat_factor) / 50 + 2
-
-            type_effectiveness = self.get_type_effectiveness(
-                wild_move.type,
-                [battle.player_pokemon.pokemon.type1, battle.player_pokemon.pokemon.type2]
-            )
-            base_damage *= type_effectiveness
-
-            base_damage *= random.uniform(0.85, 1.0)
-
-            damage = int(max(1, base_damage))
-
-        return damage, wild_move
-
-    def get_next_available_pokemon(self, player):
-        return player.pokemons.filter(
-            in_team=True,
-            current_hp__gt=0
-        ).order_by('order').first()
+    def get_next_available_pokemon(self, player, exclude=None):
+        pokemons = player.pokemons.filter(in_team=True, current_hp__gt=0)
+        if exclude is not None:
+            pokemons = pokemons.exclude(pk=exclude.pk)
+        return pokemons.select_related('pokemon').prefetch_related('move_slots').order_by('order').first()
 
     @action(detail=True, methods=['post'])
+    @serialized_by_battle
     def use_item(self, request, pk=None):
         battle = self.get_battle(pk, request.user)
         if not battle or not battle.is_active:
@@ -583,62 +388,53 @@ class BattleViewSet(viewsets.ViewSet):
         new_hp = min(battle.player_pokemon.current_hp + heal_amount, battle.player_pokemon.hp)
         actual_heal = new_hp - battle.player_pokemon.current_hp
 
-        with transaction.atomic():
-            setattr(bag, f'{potion_type}s', getattr(bag, f'{potion_type}s') - 1)
-            bag.save()
-
-            PlayerPokemon.objects.filter(pk=battle.player_pokemon.pk).update(
-                current_hp=new_hp
-            )
-
-            if battle.battle_type == 'wild':
-                wild_damage, wild_move = self.wild_attack(battle)
-                battle.player_pokemon.current_hp = new_hp - wild_damage
-                battle.player_pokemon.current_hp = max(0, battle.player_pokemon.current_hp)
+        setattr(bag, f'{potion_type}s', getattr(bag, f'{potion_type}s') - 1)
+        bag.save()
 
-                PlayerPokemon.objects.filter(pk=battle.player_pokemon.pk).update(
-                    current_hp=battle.player_pokemon.current_hp
-                )
+        battle.player_pokemon.current_hp = new_hp
 
-                message = f'Usaste una {potion_type}. Curaste {actual_heal} HP. '
-                message += f'{battle.wild_pokemon.name} usó {wild_move.name}. Causó {wild_damage} de daño.'
-            if battle.battle_type == 'trainer':
-                trainer_damage, trainer_move = self.trainer_attack(battle)
-                battle.player_pokemon.current_hp = new_hp - trainer_damage
-                battle.player_pokemon.current_hp = max(0, battle.player_pokemon.current_hp)
+        if battle.battle_type == 'wild':
+            wild_damage, wild_move = self.wild_attack(battle)
+            battle.player_pokemon.current_hp = new_hp - wild_damage
+            battle.player_pokemon.current_hp = max(0, battle.player_pokemon.current_hp)
 
-                PlayerPokemon.objects.filter(pk=battle.player_pokemon.pk).update(
-                    current_hp=battle.player_pokemon.current_hp
-                )
+            message = f'Usaste una {potion_type}. Curaste {actual_heal} HP. '
+            message += f'{battle.wild_pokemon.name} usó {wild_move.name}. Causó {wild_damage} de daño.'
+        if battle.battle_type == 'trainer':
+            trainer_damage, trainer_move = self.trainer_attack(battle)
+            battle.player_pokemon.current_hp = new_hp - trainer_damage
+            battle.player_pokemon.current_hp = max(0, battle.player_pokemon.current_hp)
 
-                current_opponent = battle.current_opponent_pokemon
-                opponent_name = current_opponent['pokemon_name'] if current_opponent else 'el oponente'
+            current_opponent = battle.current_opponent_pokemon
+            opponent_name = current_opponent['pokemon_name'] if current_opponent else 'el oponente'
 
-                message = f'Usaste una {potion_type}. Curaste {actual_heal} HP. '
-                message += f'{opponent_name} usó {trainer_move["name"]}. Causó {trainer_damage} de daño.'
+            message = f'Usaste una {potion_type}. Curaste {actual_heal} HP. '
+            message += f'{opponent_name} usó {trainer_move["name"]}. Causó {trainer_damage} de daño.'
 
-            if battle.player_pokemon.current_hp <= 0:
-                defeated_pokemon_name = battle.player_pokemon.pokemon.name
+        player_pokemon = battle.player_pokemon
+        if player_pokemon.current_hp <= 0:
+            defeated_pokemon_name = player_pokemon.pokemon.name
 
-                next_pokemon = self.get_next_available_pokemon(battle.player)
-                if next_pokemon:
-                    battle.player_pokemon = next_pokemon
-                    battle.save()
-                    message += f' {defeated_pokemon_name} fue derrotado. ¡{next_pokemon.pokemon.name} entra al combate!'
-                else:
-                    battle.state = 'lost'
-                    battle.save()
+            next_pokemon = self.get_next_available_pokemon(battle.player, exclude=player_pokemon)
+            if next_pokemon:
+                battle.player_pokemon = next_pokemon
+                battle_sessions.save_turn(battle, player_pokemon, flush=True)
+                message += f' {defeated_pokemon_name} fue derrotado. ¡{next_pokemon.pokemon.name} entra al combate!'
+            else:
+                battle.state = 'lost'
+                with transaction.atomic():
+                    battle_sessions.save_turn(battle, player_pokemon)
                     if battle.battle_type == 'wild':
                         return self.handle_battle_loss(battle, message)
                     else:
                         return self.handle_trainer_battle_loss(battle, message)
-            else:
-                battle.save()
+        else:
+            battle_sessions.save_turn(battle, player_pokemon)
 
-            return Response({
-                'message': message,
-                'battle_state': self.get_battle_state(battle)
-            })
+        return Response({
+            'message': message,
+            'battle_state': self.get_battle_state(battle)
+        })
 
     def use_pokeball(self, battle, bag, ball_type):
         ball_rates = {
@@ -670,55 +466,54 @@ class BattleViewSet(viewsets.ViewSet):
 
         print(f"Captura: HP={hp_current}/{hp_max}, Ball={ball_type}, Chance={catch_chance:.2%}")
 
-        with transaction.atomic():
-            setattr(bag, f'{ball_type}s', getattr(bag, f'{ball_type}s') - 1)
-            bag.save()
+        setattr(bag, f'{ball_type}s', getattr(bag, f'{ball_type}s') - 1)
+        bag.save()
 
-            if random.random() < catch_chance:
-                battle.state = 'won'
-                battle.save()
+        if random.random() < catch_chance:
+            battle.state = 'won'
+            with transaction.atomic():
+                battle_sessions.save_turn(battle, battle.player_pokemon)
                 return self.handle_capture(battle, ball_type)
-            else:
-                shake_check = random.random() < (catch_chance * 0.5)  # Simular "sacudidas" de la pokéball
-                if shake_check:
-                    message = f'Usaste una {ball_type}. ¡Casi lo atrapas! El Pokémon escapó del intento.'
-                else:
-                    message = f'Usaste una {ball_type}. ¡El Pokémon escapó!'
-
-                wild_damage, wild_move = self.wild_attack(battle)
-                battle.player_pokemon.current_hp -= wild_damage
-                battle.player_pokemon.current_hp = max(0, battle.player_pokemon.current_hp)
-
-                PlayerPokemon.objects.filter(pk=battle.player_pokemon.pk).update(
-                    current_hp=battle.player_pokemon.current_hp
-                )
 
-                message += f' {battle.wild_pokemon.name} usó {wild_move.name}.'
+        shake_check = random.random() < (catch_chance * 0.5)  # Simular "sacudidas" de la pokéball
+        if shake_check:
+            message = f'Usaste una {ball_type}. ¡Casi lo atrapas! El Pokémon escapó del intento.'
+        else:
+            message = f'Usaste una {ball_type}. ¡El Pokémon escapó!'
 
-                if wild_damage > 0:
-                    message += f' Causó {wild_damage} de daño.'
+        player_pokemon = battle.player_pokemon
+        wild_damage, wild_move = self.wild_attack(battle)
+        player_pokemon.current_hp -= wild_damage
+        player_pokemon.current_hp = max(0, player_pokemon.current_hp)
 
-                if battle.player_pokemon.current_hp <= 0:
-                    next_pokemon = self.get_next_available_pokemon(battle.player)
-                    if next_pokemon:
-                        battle.player_pokemon = next_pokemon
-                        battle.save()
-                        message += f' {battle.player_pokemon.pokemon.name} fue derrotado. ¡{next_pokemon.pokemon.name} entra al combate!'
-                    else:
-                        battle.state = 'lost'
-                        battle.save()
-                        return self.handle_battle_loss(battle, message)
-                else:
-                    battle.save()
+        message += f' {battle.wild_pokemon.name} usó {wild_move.name}.'
 
-                return Response({
-                    'message': message,
-                    'battle_state': self.get_battle_state(battle),
-                    'capture_attempt': True,
-                    'almost_caught': shake_check
-                })
+        if wild_damage > 0:
+            message += f' Causó {wild_damage} de daño.'
+
+        if player_pokemon.current_hp <= 0:
+            next_pokemon = self.get_next_available_pokemon(battle.player, exclude=player_pokemon)
+            if next_pokemon:
+                battle.player_pokemon = next_pokemon
+                battle_sessions.save_turn(battle, player_pokemon, flush=True)
+                message += f' {player_pokemon.pokemon.name} fue derrotado. ¡{next_pokemon.pokemon.name} entra al combate!'
+            else:
+                battle.state = 'lost'
+                with transaction.atomic():
+                    battle_sessions.save_turn(battle, player_pokemon)
+                    return self.handle_battle_loss(battle, message)
+        else:
+            battle_sessions.save_turn(battle, player_pokemon)
+
+        return Response({
+            'message': message,
+            'battle_state': self.get_battle_state(battle),
+            'capture_attempt': True,
+            'almost_caught': shake_check
+        })
 
     @action(detail=True, methods=['post'])
+    @serialized_by_battle
     def switch_pokemon(self, request, pk=None):
         battle = self.get_battle(pk, request.user)
         if not battle or not battle.is_active:
@@ -728,60 +523,58 @@ class BattleViewSet(viewsets.ViewSet):
         if not pokemon_id:
             return Response({'error': 'Se requiere pokemon_id'}, status=400)
 
-        try:
-            new_pokemon = PlayerPokemon.objects.get(
-                id=pokemon_id,
-                player=battle.player,
-                in_team=True,
-                current_hp__gt=0
-            )
-        except PlayerPokemon.DoesNotExist:
-            return Response({'error': 'Pokémon no válido'}, status=400)
-
-        with transaction.atomic():
-            battle.player_pokemon = new_pokemon
-            battle.save()
-
-            if battle.battle_type == 'wild':
-                wild_damage, wild_move = self.wild_attack(battle)
-                new_pokemon.current_hp -= wild_damage
-                new_pokemon.current_hp = max(0, new_pokemon.current_hp)
-
-                PlayerPokemon.objects.filter(pk=new_pokemon.pk).update(
-                    current_hp=new_pokemon.current_hp
+        previous_pokemon = battle.player_pokemon
+        if str(previous_pokemon.pk) == str(pokemon_id):
+            # El activo puede tener cambios que aún no están en la base de datos
+            new_pokemon = previous_pokemon
+        else:
+            try:
+                new_pokemon = PlayerPokemon.objects.select_related('pokemon').prefetch_related('move_slots').get(
+                    id=pokemon_id,
+                    player=battle.player,
+                    in_team=True,
+                    current_hp__gt=0
                 )
+            except PlayerPokemon.DoesNotExist:
+                return Response({'error': 'Pokémon no válido'}, status=400)
 
-                message = f'Cambiaste a {new_pokemon.pokemon.name}. '
-                message += f'{battle.wild_pokemon.name} usó {wild_move.name}. Causó {wild_damage} de daño.'
-            if battle.battle_type == 'trainer':
-                trainer_damage, trainer_move = self.trainer_attack(battle)
-                new_pokemon.current_hp -= trainer_damage
-                new_pokemon.current_hp = max(0, new_pokemon.current_hp)
+        battle.player_pokemon = new_pokemon
+        # El Pokémon que sale se escribe ya: solo el activo puede quedar pendiente
+        battle_sessions.save_turn(battle, previous_pokemon, flush=True)
 
-                PlayerPokemon.objects.filter(pk=new_pokemon.pk).update(
-                    current_hp=new_pokemon.current_hp
-                )
+        if battle.battle_type == 'wild':
+            wild_damage, wild_move = self.wild_attack(battle)
+            new_pokemon.current_hp -= wild_damage
+            new_pokemon.current_hp = max(0, new_pokemon.current_hp)
 
-                current_opponent = battle.current_opponent_pokemon
-                opponent_name = current_opponent['pokemon_name'] if current_opponent else 'el oponente'
-                message = f'Cambiaste a {new_pokemon.pokemon.name}. '
-                message += f'{opponent_name} usó {trainer_move["name"]}. Causó {trainer_damage} de daño.'
-
-            if new_pokemon.current_hp <= 0:
-                next_pokemon = self.get_next_available_pokemon(battle.player)
-                if next_pokemon:
-                    battle.player_pokemon = next_pokemon
-                    battle.save()
-                    message += f' {battle.player_pokemon.pokemon.name} fue derrotado. ¡{next_pokemon.pokemon.name} entra al combate!'
-                else:
-                    battle.state = 'lost'
-                    battle.save()
+            message = f'Cambiaste a {new_pokemon.pokemon.name}. '
+            message += f'{battle.wild_pokemon.name} usó {wild_move.name}. Causó {wild_damage} de daño.'
+        if battle.battle_type == 'trainer':
+            trainer_damage, trainer_move = self.trainer_attack(battle)
+            new_pokemon.current_hp -= trainer_damage
+            new_pokemon.current_hp = max(0, new_pokemon.current_hp)
+
+            current_opponent = battle.current_opponent_pokemon
+            opponent_name = current_opponent['pokemon_name'] if current_opponent else 'el oponente'
+            message = f'Cambiaste a {new_pokemon.pokemon.name}. '
+            message += f'{opponent_name} usó {trainer_move["name"]}. Causó {trainer_damage} de daño.'
+
+        if new_pokemon.current_hp <= 0:
+            next_pokemon = self.get_next_available_pokemon(battle.player, exclude=new_pokemon)
+            if next_pokemon:
+                battle.player_pokemon = next_pokemon
+                battle_sessions.save_turn(battle, new_pokemon, flush=True)
+                message += f' {new_pokemon.pokemon.name} fue derrotado. ¡{next_pokemon.pokemon.name} entra al combate!'
+            else:
+                battle.state = 'lost'
+                with transaction.atomic():
+                    battle_sessions.save_turn(battle, new_pokemon)
                     if battle.battle_type == 'wild':
                         return self.handle_battle_loss(battle, message)
                     else:
                         return self.handle_trainer_battle_loss(battle, message)
-            else:
-                battle.save()
+        else:
+            battle_sessions.save_turn(battle, new_pokemon)
 
         return Response({
             'message': message,
@@ -789,6 +582,7 @@ class BattleViewSet(viewsets.ViewSet):
         })
 
     @action(detail=True, methods=['post'])
+    @serialized_by_battle
     def flee(self, request, pk=None):
         """Intentar huir del combate"""
         battle = self.get_battle(pk, request.user)
@@ -809,7 +603,7 @@ class BattleViewSet(viewsets.ViewSet):
             return Response({'error': 'No puedes huir de un combate contra entrenador'}, status=400)
 
         battle.state = 'fled'
-        battle.save()
+        battle_sessions.save_turn(battle, battle.player_pokemon)
 
         return Response({
             'message': 'Has huido del combate',
@@ -817,6 +611,15 @@ class BattleViewSet(viewsets.ViewSet):
             'fled': True
         })
 
+    def add_money(self, player, amount):
+        # El Player de la sesión puede estar desfasado (compras durante el combate): solo se suma
+        Player.objects.filter(pk=player.pk).update(money=models.F('money') + amount)
+        player.money += amount
+
+    def move_player(self, player, location):
+        Player.objects.filter(pk=player.pk).update(current_location=location)
+        player.current_location = location
+
     def handle_battle_win(self, battle, message):
         experience_gained = battle.wild_level * 10
 
@@ -826,11 +629,11 @@ class BattleViewSet(viewsets.ViewSet):
         from usuario.models.PlayerPokemon import PlayerPokemon
         player_pokemon = PlayerPokemon.objects.get(pk=battle.player_pokemon.pk)
 
-        leveled_up = player_pokemon.add_experience(experience_gained)
+        result = award_experience(player_pokemon, experience_gained)
+        leveled_up = result.leveled_up
 
         money_gained = battle.wild_level * 5
-        battle.player.money += money_gained
-        battle.player.save()
+        self.add_money(battle.player, money_gained)
 
         victory_message = f'{message} ¡Has derrotado al {battle.wild_pokemon.name} salvaje! '
         victory_message += f'Ganaste {experience_gained} de experiencia y ${money_gained}.'
@@ -838,7 +641,7 @@ class BattleViewSet(viewsets.ViewSet):
         if leveled_up:
             victory_message += f' ¡{original_pokemon_name} subió al nivel {player_pokemon.level}!'
 
-            if player_pokemon.just_evolved:
+            if result.evolved:
                 victory_message += f' ¡Y evolucionó a {player_pokemon.pokemon.name}!'
 
         return Response({
@@ -849,21 +652,18 @@ class BattleViewSet(viewsets.ViewSet):
             'money_gained': money_gained,
             'leveled_up': leveled_up,
             'new_level': player_pokemon.level if leveled_up else None,
-            'evolved': player_pokemon.just_evolved if leveled_up else False,
-            'new_pokemon_name': player_pokemon.pokemon.name if player_pokemon.just_evolved else None
+            'evolved': result.evolved,
+            'new_pokemon_name': player_pokemon.pokemon.name if result.evolved else None
         })
 
     def handle_battle_loss(self, battle, message):
         last_town = battle.player.current_location
         if not last_town or last_town.location_type != 'town':
-            from pokemon.models.Location import Location
-            last_town = Location.objects.filter(location_type='town').first()
+            last_town = get_game_data().first_town()
 
-        battle.player.current_location = last_town
-        battle.player.save()
+        self.move_player(battle.player, last_town)
 
-        from usuario.models.PlayerPokemon import PlayerPokemon
-        PlayerPokemon.objects.filter(player=battle.player).update(current_hp=models.F('hp'))
+        heal_team(battle.player, include_boxes=True)
 
         return Response({
             'message': f'{message} Todos tus Pokémon fueron derrotados. Has sido transportado a {last_town.name} y tus Pokémon han sido curados.',
@@ -873,6 +673,12 @@ class BattleViewSet(viewsets.ViewSet):
         })
 
     def handle_capture(self, battle, ball_type):
+        wild_moves = [
+            pokemon_move.move
+            for pokemon_move in get_game_data().moves_learned_up_to(battle.wild_pokemon_id, battle.wild_level)[:2]
+        ]
+
+        # save() calcula los stats y los PS de un Pokémon nuevo: un único INSERT
         new_pokemon = PlayerPokemon.objects.create(
             player=battle.player,
             pokemon=battle.wild_pokemon,
@@ -880,32 +686,9 @@ class BattleViewSet(viewsets.ViewSet):
             experience=0,
             in_team=False
         )
-        new_pokemon.calculate_stats()
-
-        PlayerPokemon.objects.filter(pk=new_pokemon.pk).update(
-            hp=new_pokemon.hp,
-            current_hp=new_pokemon.hp,
-            attack=new_pokemon.attack,
-            defense=new_pokemon.defense,
-            special_attack=new_pokemon.special_attack,
-            special_defense=new_pokemon.special_defense,
-            speed=new_pokemon.speed
-        )
+        new_pokemon.set_moves(wild_moves)
 
-        wild_moves = PokemonMove.objects.filter(
-            pokemon=battle.wild_pokemon,
-            level__lte=battle.wild_level
-        )[:2]
-        for move in wild_moves:
-            new_pokemon.moves.add(move.move)
-
-        from usuario.models.Pokedex import Pokedex
-        pokedex_entry, created = Pokedex.objects.get_or_create(
-            player=battle.player,
-            pokemon=battle.wild_pokemon
-        )
-        pokedex_entry.state = 'caught'
-        pokedex_entry.save()
+        register_pokemons(battle.player, [battle.wild_pokemon], 'caught')
 
         return Response({
             'message': f'¡Has capturado a {battle.wild_pokemon.name} con una {ball_type}!',
@@ -916,16 +699,13 @@ class BattleViewSet(viewsets.ViewSet):
 
     def get_battle_state(self, battle):
         moves_with_pp = []
-        for move in battle.player_pokemon.moves.all():
-            current_pp = self.get_move_current_pp(battle.player_pokemon, move.id)
-            max_pp = move.pp
-
+        for slot in battle.player_pokemon.get_move_slots():
             moves_with_pp.append({
-                'id': move.id,
-                'name': move.name,
-                'type': move.type,
-                'current_pp': current_pp,
-                'max_pp': max_pp
+                'id': slot.move.id,
+                'name': slot.move.name,
+                'type': slot.move.type,
+                'current_pp': slot.current_pp,
+                'max_pp': slot.move.pp
             })
 
         if battle.battle_type == 'wild':
@@ -972,162 +752,10 @@ class BattleViewSet(viewsets.ViewSet):
                 'state': battle.state
             }
 
-    def generate_random_trainer(self, location):
-        trainer_names_by_type = {
-            'beginner': ['Alex', 'Sofía', 'Leo', 'Emma', 'Luis', 'Ana'],
-            'intermediate': ['Entrenador Marcos', 'Entrenadora Carla', 'Rival Diego', 'Rival Elena'],
-            'advanced': ['Maestro Koga', 'Maestro Bruno', 'Líder Blanca', 'Líder Rojo'],
-            'gym_leader': ['Líder Brock', 'Líder Misty', 'Líder Lt. Surge', 'Líder Erika'],
-        }
-
-        trainer_sprites = {
-            'beginner': 'https://example.com/trainer_beginner.png',
-            'intermediate': 'https://example.com/trainer_intermediate.png',
-            'advanced': 'https://example.com/trainer_advanced.png',
-            'gym_leader': 'https://example.com/trainer_gym_leader.png',
-        }
-
-        trainer_types = ['beginner', 'intermediate', 'advanced', 'gym_leader']
-        weights = [0.4, 0.3, 0.2, 0.1]
-        trainer_type = random.choices(trainer_types, weights=weights)[0]
-
-        name = random.choice(trainer_names_by_type[trainer_type])
-
-        dialogues = {
-            'beginner': f"¡Hola! Soy {name}, un entrenador principiante. ¡Prepárate para luchar!",
-            'intermediate': f"Soy {name}. Mi equipo está bien entrenado. ¡No será fácil!",
-            'advanced': f"Yo, {name}, te mostraré la fuerza de un entrenador experimentado.",
-            'gym_leader': f"¡Soy {name}! Para pasar, tendrás que derrotar a mi poderoso equipo.",
-        }
-
-        team = self.generate_trainer_team(location, trainer_type)
-
-        if not team:
-            return None
-
-        base_reward = {
-            'beginner': 50,
-            'intermediate': 100,
-            'advanced': 200,
-            'gym_leader': 500,
-        }
-
-        money_reward = base_reward[trainer_type] * len(team)
-
-        return {
-            'name': name,
-            'type': trainer_type,
-            'sprite': trainer_sprites[trainer_type],
-            'dialogue': dialogues[trainer_type],
-            'team': team,
-            'money_reward': money_reward,
-        }
-
-    def generate_trainer_team(self, location, trainer_type):
-        from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
-        from pokemon.models.PokemonMove import PokemonMove
-
-        encounters = WildPokemonEncounter.objects.filter(location=location)
-
-        if not encounters:
-            return []
-
-        team_sizes = {
-            'beginner': (1, 2),
-            'intermediate': (2, 3),
-            'advanced': (3, 4),
-            'gym_leader': (5, 6),
-        }
-
-        min_size, max_size = team_sizes[trainer_type]
-        team_size = random.randint(min_size, max_size)
-
-        base_levels = {
-            'beginner': (3, 7),
-            'intermediate': (8, 15),
-            'advanced': (16, 25),
-            'gym_leader': (26, 40),
-        }
-
-        min_level, max_level = base_levels[trainer_type]
-
-        team = []
-        used_pokemon_ids = set()
-
-        for _ in range(team_size):
-            encounter = self.select_weighted_encounter(encounters)
-
-            if encounter.pokemon.id in used_pokemon_ids:
-                available_encounters = [e for e in encounters if e.pokemon.id not in used_pokemon_ids]
-                if available_encounters:
-                    encounter = self.select_weighted_encounter(available_encounters)
-
-            used_pokemon_ids.add(encounter.pokemon.id)
-
-            level = random.randint(min_level, max_level)
-
-            hp = self.calculate_hp(encounter.pokemon.base_hp, level)
-            attack = self.calculate_stat(encounter.pokemon.base_attack, level)
-            defense = self.calculate_stat(encounter.pokemon.base_defense, level)
-            special_attack = self.calculate_stat(encounter.pokemon.base_special_attack, level)
-            special_defense = self.calculate_stat(encounter.pokemon.base_special_defense, level)
-            speed = self.calculate_stat(encounter.pokemon.base_speed, level)
-
-            wild_moves = PokemonMove.objects.filter(
-                pokemon=encounter.pokemon,
-                level__lte=level
-            ).select_related('move').order_by('-level')[:4]
-
-            pokemon_data = {
-                'pokemon_id': encounter.pokemon.id,
-                'pokemon_name': encounter.pokemon.name,
-                'level': level,
-                'current_hp': hp,
-                'max_hp': hp,
-                'attack': attack,
-                'defense': defense,
-                'special_attack': special_attack,
-                'special_defense': special_defense,
-                'speed': speed,
-                'type1': encounter.pokemon.type1,
-                'type2': encounter.pokemon.type2,
-                'sprite_front': encounter.pokemon.sprite_front,
-                'sprite_back': encounter.pokemon.sprite_back,
-                'moves': [
-                    {
-                        'id': pokemon_move.move.id,
-                        'name': pokemon_move.move.name,
-                        'type': pokemon_move.move.type,
-                        'power': pokemon_move.move.power,
-                        'accuracy': pokemon_move.move.accuracy,
-                        'pp': pokemon_move.move.pp,
-                        'damage_class': pokemon_move.move.damage_class,
-                        'current_pp': pokemon_move.move.pp
-                    } for pokemon_move in wild_moves
-                ]
-            }
-
-            team.append(pokemon_data)
-
-        return team
-
-    def select_weighted_encounter(self, encounters):
-        rarity_weights = {
-            'common': 60,
-            'uncommon': 30,
-            'rare': 9,
-            'very_rare': 1
-        }
-
-        weighted_encounters = []
-        for encounter in encounters:
-            weighted_encounters.extend([encounter] * rarity_weights.get(encounter.rarity, 1))
-
-        return random.choice(weighted_encounters)
-
     @action(detail=False, methods=['get'])
     def can_start_trainer_battle(self, request):
         player = request.user.player_profile
+        battle_sessions.release_player(player)
 
         if not player.current_location:
             return Response({
@@ -1141,9 +769,8 @@ class BattleViewSet(viewsets.ViewSet):
                 'reason': 'Solo puedes combatir con entrenadores en rutas'
             })
 
-        from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
-        encounters = WildPokemonEncounter.objects.filter(location=player.current_location)
-        if not encounters.exists():
+        encounters = get_game_data().encounters(player.current_location.id)
+        if not encounters:
             return Response({
                 'can_battle': False,
                 'reason': 'No hay Pokémon disponibles en esta ruta para generar entrenadores'
@@ -1160,94 +787,21 @@ class BattleViewSet(viewsets.ViewSet):
             'can_battle': True,
             'location': player.current_location.name,
             'location_type': player.current_location.location_type,
-            'available_pokemon': encounters.count()
+            'available_pokemon': len(encounters)
         })
 
     def calculate_damage_trainer(self, attacker, defender_data, move):
-        if move.damage_class == 'status':
-            return 0
-
-        if move.damage_class == 'physical':
-            attack_stat = attacker.attack
-            defense_stat = defender_data['defense']
-        else:  # special
-            attack_stat = attacker.special_attack
-            defense_stat = defender_data['special_defense']
-
-        level_factor = (2 * attacker.level) / 5 + 2
-        power_factor = move.power if move.power else 0
-        stat_factor = attack_stat / defense_stat
-
-        base_damage = (level_factor * power_factor * stat_factor) / 50 + 2
-
-        defender_types = [defender_data['type1']]
-        if defender_data.get('type2'):
-            defender_types.append(defender_data['type2'])
-
-        type_effectiveness = self.get_type_effectiveness(move.type, defender_types)
-        base_damage *= type_effectiveness
-
-        base_damage *= random.uniform(0.85, 1.0)
-
-        return int(max(1, base_damage))
+        return calculate_damage(
+            Combatant.from_player_pokemon(attacker),
+            Combatant.from_dict(defender_data),
+            MoveData.from_model(move)
+        )
 
     def trainer_attack(self, battle):
         if battle.battle_type != 'trainer':
             return 0, {'name': 'Tackle', 'type': 'normal'}
 
-        current_pokemon = battle.trainer_team[battle.current_trainer_pokemon]
-
-        available_moves = current_pokemon['moves']
-        if not available_moves:
-            return 0, {'name': 'Tackle', 'type': 'normal'}
-
-        move = random.choice(available_moves)
-
-        damage = self.calculate_damage_trainer_reverse(
-            current_pokemon,
-            battle.player_pokemon,
-            move
-        )
-
-        return damage, move
-
-    def calculate_damage_trainer_reverse(self, attacker_data, defender, move_dict):
-        from pokemon.models.Move import Move
-
-        move = Move(
-            name=move_dict['name'],
-            type=move_dict['type'],
-            power=move_dict.get('power', 0),
-            accuracy=move_dict.get('accuracy', 100),
-            damage_class=move_dict.get('damage_class', 'physical')
-        )
-
-        if move.damage_class == 'status':
-            return 0
-
-        if move.damage_class == 'physical':
-            attack_stat = attacker_data['attack']
-            defense_stat = defender.defense
-        else:  # special
-            attack_stat = attacker_data['special_attack']
-            defense_stat = defender.special_defense
-
-        level_factor = (2 * attacker_data['level']) / 5 + 2
-        power_factor = move.power if move.power else 0
-        stat_factor = attack_stat / defense_stat
-
-        base_damage = (level_factor * power_factor * stat_factor) / 50 + 2
-
-        defender_types = [defender.pokemon.type1]
-        if defender.pokemon.type2:
-            defender_types.append(defender.pokemon.type2)
-
-        type_effectiveness = self.get_type_effectiveness(move.type, defender_types)
-        base_damage *= type_effectiveness
-
-        base_damage *= random.uniform(0.85, 1.0)
-
-        return int(max(1, base_damage))
+        return trainer_counter_attack(battle)
 
     def get_next_trainer_pokemon(self, battle):
         for i, pokemon in enumerate(battle.trainer_team):
@@ -1268,8 +822,7 @@ class BattleViewSet(viewsets.ViewSet):
         leveled_up = battle.player_pokemon.add_experience(total_experience)
 
         money_gained = battle.trainer_money_reward
-        battle.player.money += money_gained
-        battle.player.save()
+        self.add_money(battle.player, money_gained)
 
         victory_message = f'{message} ¡Has derrotado a {battle.trainer_name}! '
         victory_message += f'Ganaste ${money_gained} y {total_experience} de experiencia.'
@@ -1289,17 +842,14 @@ class BattleViewSet(viewsets.ViewSet):
         })
 
     def handle_trainer_battle_loss(self, battle, message):
-        from pokemon.models.Location import Location
         last_town = battle.player.current_location
 
         if not last_town or last_town.location_type != 'town':
-            last_town = Location.objects.filter(location_type='town').first()
+            last_town = get_game_data().first_town()
 
-        battle.player.current_location = last_town
-        battle.player.save()
+        self.move_player(battle.player, last_town)
 
-        from usuario.models.PlayerPokemon import PlayerPokemon
-        PlayerPokemon.objects.filter(player=battle.player).update(current_hp=models.F('hp'))
+        heal_team(battle.player, include_boxes=True)
 
         return Response({
             'message': f'{message} Todos tus Pokémon fueron derrotados por {battle.trainer_name}. Has sido transportado a {last_town.name} y tus Pokémon han sido curados.',
@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError
 from usuario.models.PlayerPokemon import PlayerPokemon
+from usuario.services.battle_sessions import ReleasesPlayerBattles
 from pokemon.models.Move import Move
 
 
@@ -11,6 +12,7 @@ class PlayerPokemonSerializer(serializers.ModelSerializer):
     pokemon_types = serializers.SerializerMethodField()
     sprite_front = serializers.URLField(source='pokemon.sprite_front', read_only=True)
     sprite_back = serializers.URLField(source='pokemon.sprite_back', read_only=True)
+    moves = serializers.SerializerMethodField()
     moves_details = serializers.SerializerMethodField()
     available_moves = serializers.SerializerMethodField()
     experience_info = serializers.SerializerMethodField()
@@ -31,11 +33,13 @@ class PlayerPokemonSerializer(serializers.ModelSerializer):
             types.append(obj.pokemon.type2)
         return types
 
+    def get_moves(self, obj):
+        return [slot.move_id for slot in obj.get_move_slots()]
+
     def get_moves_details(self, obj):
         moves_details = []
-        for move in obj.moves.all():
-            current_pp = obj.moves_pp.get(str(move.id), move.pp) if obj.moves_pp else move.pp
-
+        for slot in obj.get_move_slots():
+            move = slot.move
             moves_details.append({
                 'id': move.id,
                 'name': move.name,
@@ -43,13 +47,14 @@ class PlayerPokemonSerializer(serializers.ModelSerializer):
                 'power': move.power,
                 'accuracy': move.accuracy,
                 'pp': move.pp,
-                'current_pp': current_pp,
+                'current_pp': slot.current_pp,
                 'damage_class': move.damage_class,
             })
         return moves_details
 
     def get_available_moves(self, obj):
         available_moves = obj.get_available_moves()
+        known_move_ids = {slot.move_id for slot in obj.get_move_slots()}
         return [{
             'id': pm.move.id,
             'name': pm.move.name,
@@ -59,16 +64,17 @@ class PlayerPokemonSerializer(serializers.ModelSerializer):
             'accuracy': pm.move.accuracy,
             'pp': pm.move.pp,
             'damage_class': pm.move.damage_class,
-            'already_known': obj.moves.filter(id=pm.move.id).exists()
+            'already_known': pm.move.id in known_move_ids
         } for pm in available_moves]
 
 
-class PlayerPokemonViewSet(viewsets.ModelViewSet):
+class PlayerPokemonViewSet(ReleasesPlayerBattles, viewsets.ModelViewSet):
     serializer_class = PlayerPokemonSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return PlayerPokemon.objects.filter(player__user=self.request.user)
+        return PlayerPokemon.objects.filter(player__user=self.request.user).select_related(
+            'pokemon').prefetch_related('move_slots')
 
     @action(detail=True, methods=['post'])
     def teach_move(self, request, pk=None):
@@ -82,7 +88,7 @@ class PlayerPokemonViewSet(viewsets.ModelViewSet):
 
             return Response({
                 'message': f'{player_pokemon.pokemon.name} aprendió {move.name}',
-                'moves': [m.name for m in player_pokemon.moves.all()]
+                'moves': [m.name for m in player_pokemon.get_moves()]
             })
 
         except Move.DoesNotExist:
@@ -100,18 +106,20 @@ class PlayerPokemonViewSet(viewsets.ModelViewSet):
             old_move = Move.objects.get(id=old_move_id)
             new_move = Move.objects.get(id=new_move_id)
 
-            if not player_pokemon.moves.filter(id=old_move.id).exists():
+            if player_pokemon.get_move_slot(old_move.id) is None:
                 return Response({'error': 'El Pokémon no conoce ese movimiento'}, status=400)
 
             if not player_pokemon.can_learn_move(new_move):
                 return Response({'error': f'No puede aprender {new_move.name}'}, status=400)
 
-            player_pokemon.moves.remove(old_move)
-            player_pokemon.moves.add(new_move)
+            try:
+                player_pokemon.replace_move(old_move, new_move)
+            except ValidationError as e:
+                return Response({'error': str(e)}, status=400)
 
             return Response({
                 'message': f'Reemplazado {old_move.name} por {new_move.name}',
-                'moves': [m.name for m in player_pokemon.moves.all()]
+                'moves': [m.name for m in player_pokemon.get_moves()]
             })
 
         except Move.DoesNotExist:
@@ -125,16 +133,16 @@ class PlayerPokemonViewSet(viewsets.ModelViewSet):
         try:
             move = Move.objects.get(id=move_id)
 
-            if player_pokemon.moves.count() <= 1:
+            if len(player_pokemon.get_move_slots()) <= 1:
                 return Response({'error': 'El Pokémon debe tener al menos 1 movimiento'}, status=400)
 
-            if not player_pokemon.moves.filter(id=move.id).exists():
+            if player_pokemon.get_move_slot(move.id) is None:
                 return Response({'error': 'El Pokémon no conoce ese movimiento'}, status=400)
 
-            player_pokemon.moves.remove(move)
+            player_pokemon.forget_move(move)
             return Response({
                 'message': f'Olvidado: {move.name}',
-                'moves': [m.name for m in player_pokemon.moves.all()]
+                'moves': [m.name for m in player_pokemon.get_moves()]
             })
 
         except Move.DoesNotExist:
@@ -144,7 +152,7 @@ class PlayerPokemonViewSet(viewsets.ModelViewSet):
     def heal(self, request, pk=None):
         player_pokemon = self.get_object()
         player_pokemon.current_hp = player_pokemon.hp
-        player_pokemon.save()
+        player_pokemon.save(update_fields=['current_hp'])
         return Response({
             'message': f'{player_pokemon.pokemon.name} curado completamente',
             'current_hp': player_pokemon.current_hp,
@@ -2,6 +2,7 @@ from rest_framework import viewsets, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from usuario.models.Player import Player
+from usuario.services.battle_sessions import battle_sessions
 from pokemon.models.Location import Location
 from pokemon.models.Pokemon import Pokemon
 
@@ -49,7 +50,7 @@ class PlayerViewSet(viewsets.ModelViewSet):
             from pokemon.models.Pokemon import Pokemon
             from usuario.models.PlayerPokemon import PlayerPokemon
             from pokemon.models.PokemonMove import PokemonMove
-            from usuario.models.Pokedex import Pokedex
+            from usuario.services.pokedex_progress import register_pokemons
 
             starter_pokemon = Pokemon.objects.get(pokedex_id=starter_id)
 
@@ -60,17 +61,12 @@ class PlayerViewSet(viewsets.ModelViewSet):
                 experience=0
             )
 
-            player_pokemon.calculate_stats()
-            player_pokemon.current_hp = player_pokemon.hp
-            player_pokemon.save()
-
             initial_moves = PokemonMove.objects.filter(
                 pokemon=starter_pokemon,
                 level__lte=5
             )[:2]
 
-            for pokemon_move in initial_moves:
-                player_pokemon.moves.add(pokemon_move.move)
+            player_pokemon.set_moves(pokemon_move.move for pokemon_move in initial_moves)
 
             player.starter_chosen = True
 
@@ -79,11 +75,7 @@ class PlayerViewSet(viewsets.ModelViewSet):
             player.current_location = starting_location
             player.save()
 
-            Pokedex.objects.create(
-                player=player,
-                pokemon=starter_pokemon,
-                state='caught'
-            )
+            register_pokemons(player, [starter_pokemon], 'caught')
 
             connected_locations = starting_location.connected_locations.all()
             connected_locations_data = [{
@@ -126,6 +118,7 @@ class PlayerViewSet(viewsets.ModelViewSet):
             if current_location and new_location not in current_location.connected_locations.all():
                 return Response({'error': 'Ubicación no accesible'}, status=400)
 
+            battle_sessions.release_player(player)
             player.current_location = new_location
             player.save()
 
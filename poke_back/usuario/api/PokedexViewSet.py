@@ -1,10 +1,11 @@
-from rest_framework import viewsets, permissions, serializers
+from rest_framework import mixins, viewsets, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from usuario.models.Pokedex import Pokedex
-from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
 from pokemon.models.Pokemon import Pokemon
+from pokemon.services.pokedex_catalog import catalog_entry
+from usuario.services.pokedex_progress import pokedex_stats, register_pokemons
 
 
 class PokedexSerializer(serializers.ModelSerializer):
@@ -21,98 +22,31 @@ class PokedexSerializer(serializers.ModelSerializer):
                   'state', 'date_registered', 'evolution_info', 'locations', 'description')
 
     def get_pokemon_types(self, obj):
-        types = [obj.pokemon.type1]
-        if obj.pokemon.type2:
-            types.append(obj.pokemon.type2)
-        return types
+        return catalog_entry(obj.pokemon_id).types
 
     def get_evolution_info(self, obj):
-        pokemon = obj.pokemon
-
-        evolves_from = None
-        if pokemon.evolves_from:
-            evolves_from = {
-                'id': pokemon.evolves_from.id,
-                'name': pokemon.evolves_from.name,
-                'pokedex_id': pokemon.evolves_from.pokedex_id
-            }
-
-        evolves_to = None
-        evolved_pokemon = Pokemon.objects.filter(evolves_from=pokemon).first()
-        if evolved_pokemon:
-            evolves_to = {
-                'id': evolved_pokemon.id,
-                'name': evolved_pokemon.name,
-                'pokedex_id': evolved_pokemon.pokedex_id,
-                'evolution_level': evolved_pokemon.evolution_level
-            }
-
-        return {
-            'evolves_from': evolves_from,
-            'evolves_to': evolves_to
-        }
+        return catalog_entry(obj.pokemon_id).evolution_info
 
     def get_locations(self, obj):
-        try:
-            encounters = WildPokemonEncounter.objects.filter(pokemon=obj.pokemon)
-            locations = []
-
-            for encounter in encounters:
-                locations.append({
-                    'location_id': encounter.location.id,
-                    'location_name': encounter.location.name,
-                    'location_type': encounter.location.location_type,
-                    'min_level': encounter.min_level,
-                    'max_level': encounter.max_level,
-                    'rarity': encounter.rarity,
-                    'rarity_display': encounter.get_rarity_display()
-                })
-
-            return locations
-        except Exception as e:
-            return []
+        return catalog_entry(obj.pokemon_id).locations
 
     def get_description(self, obj):
-        pokemon = obj.pokemon
-
-        encounters = WildPokemonEncounter.objects.filter(pokemon=pokemon)
-        route_names = [encounter.location.name for encounter in encounters]
-
-        if route_names:
-            routes_text = ", ".join(sorted(set(route_names)))
-            description = f"Puede ser encontrado en: {routes_text}"
-        else:
-            description = "Este Pokémon no aparece en rutas salvajes"
-
-        evolved_pokemon = Pokemon.objects.filter(evolves_from=pokemon).first()
-        if evolved_pokemon and evolved_pokemon.evolution_level:
-            description += f". Evoluciona a {evolved_pokemon.name} al nivel {evolved_pokemon.evolution_level}"
-
-        return description
+        return catalog_entry(obj.pokemon_id).description
 
 
-class PokedexViewSet(viewsets.ModelViewSet):
+class PokedexViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    # Sin update ni destroy: toda escritura pasa por register_pokemons para que los bits y
+    # contadores de PokedexProgress cuadren con el historial
     serializer_class = PokedexSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Pokedex.objects.filter(player__user=self.request.user)
+        # Una consulta con la especie; el resto de la ficha sale del catálogo en memoria
+        return Pokedex.objects.filter(player__user=self.request.user).select_related('pokemon')
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        player = request.user.player_profile
-        total_pokemon = 151
-
-        pokedex_entries = Pokedex.objects.filter(player=player)
-        seen_count = pokedex_entries.count()
-        caught_count = pokedex_entries.filter(state='caught').count()
-
-        return Response({
-            'total_pokemon': total_pokemon,
-            'seen': seen_count,
-            'caught': caught_count,
-            'completion_percentage': round((caught_count / total_pokemon) * 100, 2)
-        })
+        return Response(pokedex_stats(request.user.player_profile))
 
     def create(self, request, *args, **kwargs):
         player = request.user.player_profile
@@ -123,15 +57,8 @@ class PokedexViewSet(viewsets.ModelViewSet):
             from pokemon.models.Pokemon import Pokemon
             pokemon = Pokemon.objects.get(id=pokemon_id)
 
-            pokedex_entry, created = Pokedex.objects.get_or_create(
-                player=player,
-                pokemon=pokemon,
-                defaults={'state': state}
-            )
-
-            if not created and state == 'caught':
-                pokedex_entry.state = 'caught'
-                pokedex_entry.save()
+            register_pokemons(player, [pokemon], state)
+            pokedex_entry = self.get_queryset().get(pokemon=pokemon)
 
             serializer = self.get_serializer(pokedex_entry)
             return Response(serializer.data)
@@ -4,10 +4,12 @@ from rest_framework.response import Response
 from django.core.exceptions import ValidationError
 from usuario.models.Player import Player
 from usuario.models.PlayerPokemon import PlayerPokemon
+from usuario.services.battle_sessions import ReleasesPlayerBattles
+from usuario.services.healing import heal_team
 from pokemon.models.Move import Move
 
 
-class PokemonCenterViewSet(viewsets.ViewSet):
+class PokemonCenterViewSet(ReleasesPlayerBattles, viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def _check_location(self, player):
@@ -25,19 +27,7 @@ class PokemonCenterViewSet(viewsets.ViewSet):
         except ValidationError as e:
             return Response({'error': str(e)}, status=400)
 
-        team_pokemons = player.pokemons.filter(in_team=True)
-
-        healed_count = 0
-        for pokemon in team_pokemons:
-            PlayerPokemon.objects.filter(pk=pokemon.pk).update(current_hp=pokemon.hp)
-
-            if pokemon.moves_pp:
-                for move in pokemon.moves.all():
-                    move_id_str = str(move.id)
-                    pokemon.moves_pp[move_id_str] = move.pp
-                PlayerPokemon.objects.filter(pk=pokemon.pk).update(moves_pp=pokemon.moves_pp)
-
-            healed_count += 1
+        healed_count = heal_team(player)
 
         return Response({
             'message': f'Todos tus Pokémon del equipo han sido curados ({healed_count} Pokémon)',
@@ -92,7 +82,7 @@ class PokemonCenterViewSet(viewsets.ViewSet):
         pokemon.order = 0
         pokemon.save()
 
-        self._reorder_team(request.user.player_profile)
+        PlayerPokemon.reorder_team(pokemon.player_id)
 
         return Response({
             'message': f'{pokemon.pokemon.name} movido a la reserva',
@@ -187,6 +177,7 @@ class PokemonCenterViewSet(viewsets.ViewSet):
             return Response({'error': 'Pokémon no encontrado'}, status=404)
 
         available_moves = pokemon.get_available_moves()
+        known_move_ids = {slot.move_id for slot in pokemon.get_move_slots()}
 
         moves_data = []
         for pm in available_moves:
@@ -199,12 +190,12 @@ class PokemonCenterViewSet(viewsets.ViewSet):
                 'accuracy': pm.move.accuracy,
                 'pp': pm.move.pp,
                 'damage_class': pm.move.damage_class,
-                'already_known': pokemon.moves.filter(id=pm.move.id).exists()
+                'already_known': pm.move.id in known_move_ids
             })
 
         return Response({
             'pokemon': pokemon.pokemon.name,
-            'current_moves': [{'id': m.id, 'name': m.name} for m in pokemon.moves.all()],
+            'current_moves': [{'id': m.id, 'name': m.name} for m in pokemon.get_moves()],
             'available_moves': moves_data
         })
 
@@ -232,7 +223,7 @@ class PokemonCenterViewSet(viewsets.ViewSet):
 
             return Response({
                 'message': f'{pokemon.pokemon.name} aprendió {move.name}',
-                'current_moves': [m.name for m in pokemon.moves.all()]
+                'current_moves': [m.name for m in pokemon.get_moves()]
             })
 
         except Move.DoesNotExist:
@@ -264,7 +255,7 @@ class PokemonCenterViewSet(viewsets.ViewSet):
 
             return Response({
                 'message': f'{pokemon.pokemon.name} olvidó {move.name}',
-                'current_moves': [m.name for m in pokemon.moves.all()]
+                'current_moves': [m.name for m in pokemon.get_moves()]
             })
 
         except Move.DoesNotExist:
@@ -272,16 +263,6 @@ class PokemonCenterViewSet(viewsets.ViewSet):
         except ValidationError as e:
             return Response({'error': str(e)}, status=400)
 
-    def _reorder_team(self, player):
-        team_pokemons = PlayerPokemon.objects.filter(
-            player=player,
-            in_team=True
-        ).order_by('order', 'id')
-
-        for new_order, pokemon in enumerate(team_pokemons):
-            if pokemon.order != new_order:
-                PlayerPokemon.objects.filter(pk=pokemon.pk).update(order=new_order)
-
 
     # Enponts de prueba para agregar Pokémon
     @action(detail=False, methods=['post'])
@@ -319,24 +300,15 @@ class PokemonCenterViewSet(viewsets.ViewSet):
                 order=0
             )
 
-            new_pokemon.calculate_stats()
-            new_pokemon.current_hp = new_pokemon.hp
-            new_pokemon.save()
-
             initial_moves = PokemonMove.objects.filter(
                 pokemon=test_pokemon,
                 level__lte=5
             )[:2]
 
-            for move in initial_moves:
-                new_pokemon.moves.add(move.move)
+            new_pokemon.set_moves(pokemon_move.move for pokemon_move in initial_moves)
 
-            from usuario.models.Pokedex import Pokedex
-            Pokedex.objects.get_or_create(
-                player=player,
-                pokemon=test_pokemon,
-                defaults={'state': 'caught'}
-            )
+            from usuario.services.pokedex_progress import register_pokemons
+            register_pokemons(player, [test_pokemon], 'caught')
 
             return Response({
                 'message': f'{test_pokemon.name} agregado a tu reserva!',
@@ -1,19 +1,35 @@
 from rest_framework import viewsets, permissions, serializers
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer
 from rest_framework.response import Response
+import queue
 import random
 import string
 from django.db import transaction
+from django.http import StreamingHttpResponse
 from usuario.models import Bag
 from django.utils import timezone
 from django.db.models import Q
-from usuario.models.Battle import Battle
+from usuario.models.Battle import Battle, StaleBattleError
 from usuario.models.Player import Player
+from usuario.models.User import User
 from usuario.models.PlayerPokemon import PlayerPokemon
 from pokemon.models.Pokemon import Pokemon
 from pokemon.models.Move import Move
+from pokemon.services.game_data import get_game_data
+from pokemon.engine import Combatant, MoveData, calculate_damage
+from usuario.services.battle_sessions import battle_sessions
+from usuario.services.pvp_events import (
+    STREAM_TICKET_MAX_AGE, PvPEvent, encode_event, pvp_events, pvp_events_config, read_stream_ticket, stream_ticket
+)
+from usuario.services.pvp_state import state_delta
 import json
 
+# Cada cuánto se manda un comentario al stream para que proxies y navegador no cierren la conexión
+SSE_KEEPALIVE_SECONDS = 15
+
 
 class PvPBattleSerializer(serializers.ModelSerializer):
     player1_username = serializers.CharField(source='player1.user.username', read_only=True)
@@ -25,33 +41,33 @@ class PvPBattleSerializer(serializers.ModelSerializer):
                   'player2', 'player2_username', 'state', 'current_turn', 'created_at')
 
 
+class EventStreamRenderer(BaseRenderer):
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Solo se usa para errores; los eventos los escribe el propio stream
+        return encode_event('error', data).encode('utf-8')
+
+
+class StreamTicketAuthentication(BaseAuthentication):
+    """EventSource no permite cabeceras: ?ticket= de stream_ticket, válido para una batalla y poco tiempo."""
+
+    def authenticate(self, request):
+        ticket = request.query_params.get('ticket')
+        if not ticket:
+            return None
+
+        user_id = read_stream_ticket(ticket, request.parser_context['kwargs'].get('pk'))
+        user = User.objects.filter(pk=user_id, is_active=True).first() if user_id else None
+        if user is None:
+            raise AuthenticationFailed('Ticket de stream no válido o caducado')
+        return user, None
+
+
 class PvPBattleViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
-    TYPE_EFFECTIVENESS = {
-        'normal': {'rock': 0.5, 'ghost': 0, 'steel': 0.5},
-        'fire': {'fire': 0.5, 'water': 0.5, 'grass': 2, 'ice': 2, 'bug': 2, 'rock': 0.5, 'dragon': 0.5, 'steel': 2},
-        'water': {'fire': 2, 'water': 0.5, 'grass': 0.5, 'ground': 2, 'rock': 2, 'dragon': 0.5},
-        'electric': {'water': 2, 'electric': 0.5, 'grass': 0.5, 'ground': 0, 'flying': 2, 'dragon': 0.5},
-        'grass': {'fire': 0.5, 'water': 2, 'grass': 0.5, 'poison': 0.5, 'ground': 2, 'flying': 0.5, 'bug': 0.5,
-                  'rock': 2, 'dragon': 0.5, 'steel': 0.5},
-        'ice': {'fire': 0.5, 'water': 0.5, 'grass': 2, 'ice': 0.5, 'ground': 2, 'flying': 2, 'dragon': 2, 'steel': 0.5},
-        'fighting': {'normal': 2, 'ice': 2, 'poison': 0.5, 'flying': 0.5, 'psychic': 0.5, 'bug': 0.5, 'rock': 2,
-                     'ghost': 0, 'dark': 2, 'steel': 2, 'fairy': 0.5},
-        'poison': {'grass': 2, 'poison': 0.5, 'ground': 0.5, 'rock': 0.5, 'ghost': 0.5, 'steel': 0, 'fairy': 2},
-        'ground': {'fire': 2, 'electric': 2, 'grass': 0.5, 'poison': 2, 'flying': 0, 'bug': 0.5, 'rock': 2, 'steel': 2},
-        'flying': {'electric': 0.5, 'grass': 2, 'fighting': 2, 'bug': 2, 'rock': 0.5, 'steel': 0.5},
-        'psychic': {'fighting': 2, 'poison': 2, 'psychic': 0.5, 'dark': 0, 'steel': 0.5},
-        'bug': {'fire': 0.5, 'grass': 2, 'fighting': 0.5, 'poison': 0.5, 'flying': 0.5, 'psychic': 2, 'ghost': 0.5,
-                'dark': 2, 'steel': 0.5, 'fairy': 0.5},
-        'rock': {'fire': 2, 'ice': 2, 'fighting': 0.5, 'ground': 0.5, 'flying': 2, 'bug': 2, 'steel': 0.5},
-        'ghost': {'normal': 0, 'psychic': 2, 'ghost': 2, 'dark': 0.5},
-        'dragon': {'dragon': 2, 'steel': 0.5, 'fairy': 0},
-        'dark': {'fighting': 0.5, 'psychic': 2, 'ghost': 2, 'dark': 0.5, 'fairy': 0.5},
-        'steel': {'fire': 0.5, 'water': 0.5, 'electric': 0.5, 'ice': 2, 'rock': 2, 'steel': 0.5, 'fairy': 2},
-        'fairy': {'fire': 0.5, 'fighting': 2, 'poison': 0.5, 'dragon': 2, 'dark': 2, 'steel': 0.5}
-    }
-
     def generate_room_code(self):
         while True:
             code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
@@ -61,21 +77,17 @@ class PvPBattleViewSet(viewsets.ViewSet):
     def scale_pokemon_to_level_50(self, player_pokemon):
         level = 50
 
-        hp = int((2 * player_pokemon.pokemon.base_hp * level) / 100) + level + 10
-        attack = int((2 * player_pokemon.pokemon.base_attack * level) / 100) + 5
-        defense = int((2 * player_pokemon.pokemon.base_defense * level) / 100) + 5
-        special_attack = int((2 * player_pokemon.pokemon.base_special_attack * level) / 100) + 5
-        special_defense = int((2 * player_pokemon.pokemon.base_special_defense * level) / 100) + 5
-        speed = int((2 * player_pokemon.pokemon.base_speed * level) / 100) + 5
+        game_data = get_game_data()
 
-        from pokemon.models.PokemonMove import PokemonMove
+        hp, attack, defense, special_attack, special_defense, speed = game_data.stats(player_pokemon.pokemon, level)
 
         moves_data = []
         current_move_ids = set()
 
-        current_moves = list(player_pokemon.moves.all())
-        for move in current_moves[:4]:
-            current_pp = player_pokemon.moves_pp.get(str(move.id), move.pp) if player_pokemon.moves_pp else move.pp
+        move_slots = player_pokemon.get_move_slots()[:4]
+        for slot in move_slots:
+            move = slot.move
+            current_pp = slot.current_pp
 
             moves_data.append({
                 'id': move.id,
@@ -90,10 +102,7 @@ class PvPBattleViewSet(viewsets.ViewSet):
             current_move_ids.add(move.id)
 
         if len(moves_data) < 4:
-            level_moves = PokemonMove.objects.filter(
-                pokemon=player_pokemon.pokemon,
-                level__lte=level
-            ).select_related('move').order_by('-level')
+            level_moves = game_data.moves_learned_up_to(player_pokemon.pokemon_id, level)[::-1]
 
             move_list = []
             for pm in level_moves:
@@ -128,9 +137,13 @@ class PvPBattleViewSet(viewsets.ViewSet):
                 current_move_ids.add(move.id)
 
         if len(moves_data) < 4:
-            type_moves = Move.objects.filter(
-                type__in=[player_pokemon.pokemon.type1, player_pokemon.pokemon.type2]
-            ).exclude(id__in=current_move_ids).order_by('-power')
+            pokemon_types = (player_pokemon.pokemon.type1, player_pokemon.pokemon.type2)
+            type_moves = sorted(
+                (move for move_type in pokemon_types for move in game_data.moves_by_type.get(move_type, ())
+                 if move.id not in current_move_ids),
+                key=lambda move: move.power if move.power is not None else -1,
+                reverse=True
+            )
 
             for move in type_moves:
                 if len(moves_data) >= 4:
@@ -164,7 +177,7 @@ class PvPBattleViewSet(viewsets.ViewSet):
                 if len(moves_data) >= 4:
                     break
 
-                move = Move.objects.filter(name=move_name).first()
+                move = game_data.move_by_name.get(move_name)
                 if move and move.id not in current_move_ids:
                     moves_data.append({
                         'id': move.id,
@@ -179,7 +192,10 @@ class PvPBattleViewSet(viewsets.ViewSet):
                     current_move_ids.add(move.id)
 
         if not moves_data:
-            default_move = Move.objects.filter(damage_class='physical', power__gt=0).first()
+            default_move = next(
+                (move for move in game_data.moves if move.damage_class == 'physical' and (move.power or 0) > 0),
+                None
+            )
             if default_move:
                 moves_data.append({
                     'id': default_move.id,
@@ -210,7 +226,7 @@ class PvPBattleViewSet(viewsets.ViewSet):
             'sprite_back': player_pokemon.pokemon.sprite_back,
             'moves': moves_data,
             'total_moves': len(moves_data),
-            'auto_filled_moves': len(moves_data) - len(current_moves)  # Para debug
+            'auto_filled_moves': len(moves_data) - len(move_slots)  # Para debug
         }
 
     @action(detail=False, methods=['post'])
@@ -243,6 +259,8 @@ class PvPBattleViewSet(viewsets.ViewSet):
             return Response({'error': 'Formato de batalla no válido'}, status=400)
 
         required_pokemon = 1 if battle_format == '1vs1' else 2
+        # El equipo se escala con sus PS y PP reales, no los de la base de datos si hay un combate en memoria
+        battle_sessions.release_player(player)
         available_pokemon = player.pokemons.filter(in_team=True, current_hp__gt=0).count()
 
         if available_pokemon < required_pokemon:
@@ -250,7 +268,8 @@ class PvPBattleViewSet(viewsets.ViewSet):
                 'error': f'Necesitas al menos {required_pokemon} Pokémon en tu equipo para este formato'
             }, status=400)
 
-        team_pokemons = player.pokemons.filter(in_team=True, current_hp__gt=0).order_by('order')[:required_pokemon]
+        team_pokemons = player.pokemons.filter(in_team=True, current_hp__gt=0).select_related(
+            'pokemon').prefetch_related('move_slots').order_by('order')[:required_pokemon]
 
         scaled_team = []
         for pokemon in team_pokemons:
@@ -298,9 +317,12 @@ class PvPBattleViewSet(viewsets.ViewSet):
                 'error': 'Sala no encontrada, ya ha iniciado o no tienes permiso para cerrarla'
             }, status=404)
 
+        battle_id = battle.id
         with transaction.atomic():
             battle.delete()
 
+        self.send_battle_notification(battle_id, 'closed', battle, 'La sala se ha cerrado')
+
         return Response({
             'message': 'Sala cerrada exitosamente',
             'room_code': room_code
@@ -366,6 +388,7 @@ class PvPBattleViewSet(viewsets.ViewSet):
             return Response({'error': 'No puedes unirte a tu propia sala'}, status=400)
 
         required_pokemon = 1 if battle.battle_format == '1vs1' else 2
+        battle_sessions.release_player(player)
         available_pokemon = player.pokemons.filter(in_team=True, current_hp__gt=0).count()
 
         if available_pokemon < required_pokemon:
@@ -373,28 +396,35 @@ class PvPBattleViewSet(viewsets.ViewSet):
                 'error': f'Necesitas al menos {required_pokemon} Pokémon en tu equipo para esta batalla'
             }, status=400)
 
-        team_pokemons = player.pokemons.filter(in_team=True, current_hp__gt=0).order_by('order')[:required_pokemon]
+        team_pokemons = player.pokemons.filter(in_team=True, current_hp__gt=0).select_related(
+            'pokemon').prefetch_related('move_slots').order_by('order')[:required_pokemon]
 
         scaled_team = []
         for pokemon in team_pokemons:
             scaled_team.append(self.scale_pokemon_to_level_50(pokemon))
 
-        with transaction.atomic():
-            battle.player2 = player
-            battle.player2_team = scaled_team
-            battle.state = 'active'
+        battle.player2 = player
+        battle.player2_team = scaled_team
+        battle.state = 'active'
 
-            player1_speed = battle.player1_team[0]['speed'] if battle.player1_team else 0
-            player2_speed = scaled_team[0]['speed'] if scaled_team else 0
+        player1_speed = battle.player1_team[0]['speed'] if battle.player1_team else 0
+        player2_speed = scaled_team[0]['speed'] if scaled_team else 0
 
-            if player1_speed > player2_speed:
-                battle.current_turn = battle.player1
-            elif player2_speed > player1_speed:
-                battle.current_turn = battle.player2
-            else:
-                battle.current_turn = random.choice([battle.player1, battle.player2])
+        if player1_speed > player2_speed:
+            battle.current_turn = battle.player1
+        elif player2_speed > player1_speed:
+            battle.current_turn = battle.player2
+        else:
+            battle.current_turn = random.choice([battle.player1, battle.player2])
 
-            battle.save()
+        try:
+            battle.save_versioned()
+        except StaleBattleError:
+            # Otro jugador entró en la sala al mismo tiempo
+            return Response({'error': 'Sala no encontrada o no disponible', 'conflict': True}, status=409)
+
+        self.send_battle_notification(battle.id, 'joined', battle,
+                                      f'{player.user.username} se ha unido a la batalla')
 
         return Response({
             'message': f'Te has unido a la batalla contra {battle.player1.user.username}',
@@ -412,7 +442,9 @@ class PvPBattleViewSet(viewsets.ViewSet):
         if not battle:
             return Response({'error': 'Batalla PvP no encontrada o no tienes acceso'}, status=404)
 
-        return Response(self.get_pvp_battle_state(battle, request.user.player_profile))
+        # ?since=<versión> devuelve solo lo que cambió desde esa versión
+        return Response(self.get_pvp_battle_state(battle, request.user.player_profile,
+                                                  since=request.query_params.get('since')))
 
     @action(detail=True, methods=['post'])
     def attack(self, request, pk=None):
@@ -420,6 +452,9 @@ class PvPBattleViewSet(viewsets.ViewSet):
         if not battle:
             return Response({'error': 'Batalla PvP no encontrada'}, status=404)
 
+        if self.is_stale_request(request, battle):
+            return self.conflict_response(pk, request.user)
+
         player = request.user.player_profile
 
         if not battle.is_player_turn(player):
@@ -447,64 +482,74 @@ class PvPBattleViewSet(viewsets.ViewSet):
         if move['current_pp'] <= 0:
             return Response({'error': f'No hay PP restantes para {move["name"]}'}, status=400)
 
-        with transaction.atomic():
-            move['current_pp'] -= 1
+        # Un turno normal es un único UPDATE condicionado por version; no necesita transacción
+        try:
+            return self.resolve_attack(battle, player, player_pokemon, move, target,
+                                       since=request.data.get('version'))
+        except StaleBattleError:
+            return self.conflict_response(pk, request.user)
 
-            if player == battle.player1:
-                battle.player1_team[battle.player1_current_pokemon] = player_pokemon
-            else:
-                battle.player2_team[battle.player2_current_pokemon] = player_pokemon
+    def resolve_attack(self, battle, player, player_pokemon, move, target, since=None):
+        move['current_pp'] -= 1
 
-            opponent = battle.player2 if player == battle.player1 else battle.player1
-            opponent_team = battle.get_current_opponent_team(player)
+        if player == battle.player1:
+            battle.player1_team[battle.player1_current_pokemon] = player_pokemon
+        else:
+            battle.player2_team[battle.player2_current_pokemon] = player_pokemon
 
-            if battle.battle_format == '2vs2':
-                if target < 0 or target >= len(opponent_team):
-                    return Response({'error': 'Objetivo no válido'}, status=400)
-                opponent_pokemon = opponent_team[target]
-            else:
-                opponent_pokemon = battle.get_opponent_current_pokemon(player)
+        opponent = battle.player2 if player == battle.player1 else battle.player1
+        opponent_team = battle.get_current_opponent_team(player)
 
-            if not opponent_pokemon or opponent_pokemon['current_hp'] <= 0:
-                return Response({'error': 'El Pokémon objetivo está debilitado'}, status=400)
+        if battle.battle_format == '2vs2':
+            if target < 0 or target >= len(opponent_team):
+                return Response({'error': 'Objetivo no válido'}, status=400)
+            opponent_pokemon = opponent_team[target]
+        else:
+            opponent_pokemon = battle.get_opponent_current_pokemon(player)
 
-            damage = self.calculate_pvp_damage(player_pokemon, opponent_pokemon, move)
+        if not opponent_pokemon or opponent_pokemon['current_hp'] <= 0:
+            return Response({'error': 'El Pokémon objetivo está debilitado'}, status=400)
 
-            opponent_pokemon['current_hp'] -= damage
-            opponent_pokemon['current_hp'] = max(0, opponent_pokemon['current_hp'])
+        damage = self.calculate_pvp_damage(player_pokemon, opponent_pokemon, move)
 
-            if player == battle.player1:
-                battle.player2_team[battle.player2_current_pokemon] = opponent_pokemon
-            else:
-                battle.player1_team[battle.player1_current_pokemon] = opponent_pokemon
+        opponent_pokemon['current_hp'] -= damage
+        opponent_pokemon['current_hp'] = max(0, opponent_pokemon['current_hp'])
 
-            message = f'{player_pokemon["pokemon_name"]} usó {move["name"]}. '
-            if damage > 0:
-                message += f'Causó {damage} de daño.'
+        if player == battle.player1:
+            battle.player2_team[battle.player2_current_pokemon] = opponent_pokemon
+        else:
+            battle.player1_team[battle.player1_current_pokemon] = opponent_pokemon
+
+        message = f'{player_pokemon["pokemon_name"]} usó {move["name"]}. '
+        if damage > 0:
+            message += f'Causó {damage} de daño.'
 
-            if opponent_pokemon['current_hp'] <= 0:
-                message += f' ¡{opponent_pokemon["pokemon_name"]} fue derrotado!'
+        if opponent_pokemon['current_hp'] <= 0:
+            message += f' ¡{opponent_pokemon["pokemon_name"]} fue derrotado!'
 
-                if battle.check_team_defeated(battle.get_current_opponent_team(player)):
+            if battle.check_team_defeated(battle.get_current_opponent_team(player)):
+                with transaction.atomic():
                     battle.end_battle(player)
-                    message += f' ¡Has ganado la batalla!'
+                message += f' ¡Has ganado la batalla!'
+                self.send_battle_notification(battle.id, 'battle_ended', battle, message)
 
-                    return Response({
-                        'message': message,
-                        'battle_ended': True,
-                        'winner': player.user.username,
-                        'battle_state': self.get_pvp_battle_state(battle, player)
-                    })
+                return Response({
+                    'message': message,
+                    'battle_ended': True,
+                    'winner': player.user.username,
+                    'battle_state': self.get_pvp_battle_state(battle, player, since)
+                })
 
-            battle.current_turn = opponent
-            battle.save()
+        battle.current_turn = opponent
+        battle.save_versioned()
+        self.send_battle_notification(battle.id, 'attack', battle, message)
 
-            return Response({
-                'message': message,
-                'damage': damage,
-                'your_turn': False,
-                'battle_state': self.get_pvp_battle_state(battle, player)
-            })
+        return Response({
+            'message': message,
+            'damage': damage,
+            'your_turn': False,
+            'battle_state': self.get_pvp_battle_state(battle, player, since)
+        })
 
     @action(detail=True, methods=['post'])
     def switch_pokemon(self, request, pk=None):
@@ -512,6 +557,9 @@ class PvPBattleViewSet(viewsets.ViewSet):
         if not battle:
             return Response({'error': 'Batalla PvP no encontrada'}, status=404)
 
+        if self.is_stale_request(request, battle):
+            return self.conflict_response(pk, request.user)
+
         player = request.user.player_profile
 
         if not battle.is_player_turn(player):
@@ -536,21 +584,26 @@ class PvPBattleViewSet(viewsets.ViewSet):
         if team[pokemon_index]['current_hp'] <= 0:
             return Response({'error': 'Ese Pokémon está debilitado'}, status=400)
 
-        with transaction.atomic():
-            if player == battle.player1:
-                battle.player1_current_pokemon = pokemon_index
-            else:
-                battle.player2_current_pokemon = pokemon_index
+        if player == battle.player1:
+            battle.player1_current_pokemon = pokemon_index
+        else:
+            battle.player2_current_pokemon = pokemon_index
 
-            opponent = battle.player2 if player == battle.player1 else battle.player1
-            battle.current_turn = opponent
-            battle.save()
+        opponent = battle.player2 if player == battle.player1 else battle.player1
+        battle.current_turn = opponent
+        try:
+            battle.save_versioned()
+        except StaleBattleError:
+            return self.conflict_response(pk, request.user)
 
-            return Response({
-                'message': f'Cambiaste a {team[pokemon_index]["pokemon_name"]}',
-                'your_turn': False,
-                'battle_state': self.get_pvp_battle_state(battle, player)
-            })
+        self.send_battle_notification(battle.id, 'switch', battle,
+                                      f'{player.user.username} cambió a {team[pokemon_index]["pokemon_name"]}')
+
+        return Response({
+            'message': f'Cambiaste a {team[pokemon_index]["pokemon_name"]}',
+            'your_turn': False,
+            'battle_state': self.get_pvp_battle_state(battle, player, request.data.get('version'))
+        })
 
     @action(detail=True, methods=['post'])
     def surrender(self, request, pk=None):
@@ -558,18 +611,29 @@ class PvPBattleViewSet(viewsets.ViewSet):
         if not battle:
             return Response({'error': 'Batalla PvP no encontrada'}, status=404)
 
+        if self.is_stale_request(request, battle):
+            return self.conflict_response(pk, request.user)
+
         player = request.user.player_profile
         opponent = battle.player2 if player == battle.player1 else battle.player1
 
-        with transaction.atomic():
-            battle.end_battle(opponent)
+        if not battle.is_active and not battle.is_waiting:
+            return Response({'error': 'La batalla ya ha terminado'}, status=400)
 
-            return Response({
-                'message': 'Te has rendido',
-                'battle_ended': True,
-                'winner': opponent.user.username,
-                'loser': player.user.username
-            })
+        try:
+            with transaction.atomic():
+                battle.end_battle(opponent)
+        except StaleBattleError:
+            return self.conflict_response(pk, request.user)
+
+        self.send_battle_notification(battle.id, 'battle_ended', battle, f'{player.user.username} se ha rendido')
+
+        return Response({
+            'message': 'Te has rendido',
+            'battle_ended': True,
+            'winner': opponent.user.username,
+            'loser': player.user.username
+        })
 
     @action(detail=True, methods=['post'])
     def use_item(self, request, pk=None):
@@ -577,6 +641,9 @@ class PvPBattleViewSet(viewsets.ViewSet):
         if not battle:
             return Response({'error': 'Batalla no encontrada'}, status=404)
 
+        if self.is_stale_request(request, battle):
+            return self.conflict_response(pk, request.user)
+
         player = request.user.player_profile
         item_type = request.data.get('item_type')
 
@@ -608,37 +675,94 @@ class PvPBattleViewSet(viewsets.ViewSet):
             else:
                 battle.player2_team[battle.player2_current_pokemon] = current_pokemon
 
-            setattr(bag, f'{item_type}s', getattr(bag, f'{item_type}s') - 1)
-            bag.save()
-
             message = f'{player.user.username} usó una {item_type}. Curó {actual_heal} HP.'
 
             opponent = battle.player2 if player == battle.player1 else battle.player1
             battle.current_turn = opponent
-            battle.save()
-
-            self.send_battle_notification(battle.id, {
-                'action': 'use_item',
-                'player': player.user.username,
-                'item': item_type,
-                'pokemon': current_pokemon['pokemon_name'],
-                'heal': actual_heal,
-                'message': message,
-                'turn_changed_to': opponent.user.username
-            })
+
+            try:
+                with transaction.atomic():
+                    setattr(bag, f'{item_type}s', getattr(bag, f'{item_type}s') - 1)
+                    bag.save()
+                    battle.save_versioned()
+            except StaleBattleError:
+                return self.conflict_response(pk, request.user)
+
+            self.send_battle_notification(battle.id, 'use_item', battle, message)
 
             return Response({
                 'message': message,
                 'healed': actual_heal,
                 'your_turn': False,
-                'battle_state': self.get_pvp_battle_state(battle, player)
+                'battle_state': self.get_pvp_battle_state(battle, player, request.data.get('version'))
             })
 
         return Response({'error': 'Item no válido para PvP'}, status=400)
 
+    @action(detail=True, methods=['post'])
+    def stream_ticket(self, request, pk=None):
+        """Ticket para abrir events/ sin poner el token de la API en la URL."""
+        battle = self.get_pvp_battle(pk, request.user)
+        if not battle:
+            return Response({'error': 'Batalla PvP no encontrada o no tienes acceso'}, status=404)
+
+        return Response({'ticket': stream_ticket(request.user, battle.id), 'expires_in': STREAM_TICKET_MAX_AGE})
+
+    @action(detail=True, methods=['get'], renderer_classes=[EventStreamRenderer],
+            authentication_classes=[TokenAuthentication, StreamTicketAuthentication])
+    def events(self, request, pk=None):
+        """Stream SSE: estado inicial y un evento por cada acción de cualquiera de los dos jugadores."""
+        battle = self.get_pvp_battle(pk, request.user)
+        if not battle:
+            return Response({'error': 'Batalla PvP no encontrada o no tienes acceso'}, status=404)
+
+        subscription = pvp_events.subscribe(battle.id, pvp_events_config()['MAX_STREAMS'])
+        if subscription is None:
+            # Sin hilos libres para otro stream: el cliente vuelve al polling de /state
+            response = Response({'error': 'Demasiadas conexiones abiertas, inténtalo más tarde'}, status=503)
+            response['Retry-After'] = str(SSE_KEEPALIVE_SECONDS)
+            return response
+        response = StreamingHttpResponse(
+            self.stream_battle_events(battle, request.user.player_profile, subscription),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def stream_battle_events(self, battle, player, subscription):
+        battle_id = battle.id
+        try:
+            yield encode_event('state', {'battle_state': self.get_pvp_battle_state(battle, player)})
+            # Tras el estado inicial, cada evento lleva solo los cambios desde el anterior
+            last_version = battle.version
+
+            while battle.is_waiting or battle.is_active:
+                try:
+                    event = subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+
+                battle = event.battle
+                yield encode_event(event.name, {
+                    'message': event.message,
+                    'battle_state': self.get_pvp_battle_state(battle, player, last_version)
+                })
+                last_version = battle.version
+                if event.name == 'closed':
+                    break
+        finally:
+            pvp_events.unsubscribe(battle_id, subscription)
+
+    def send_battle_notification(self, battle_id, name, battle, message=''):
+        pvp_events.publish(battle_id, PvPEvent(name, battle, message))
+
     def get_pvp_battle(self, battle_id, user):
         try:
-            battle = Battle.objects.get(
+            battle = Battle.objects.select_related(
+                'player1__user', 'player2__user', 'current_turn__user', 'winner__user'
+            ).get(
                 id=battle_id,
                 battle_type='pvp'
             )
@@ -648,9 +772,26 @@ class PvPBattleViewSet(viewsets.ViewSet):
         except Battle.DoesNotExist:
             return None
 
-    def get_pvp_battle_state(self, battle, player):
+    def is_stale_request(self, request, battle):
+        """El cliente puede mandar la versión que tiene; si ya no es la actual, su acción llega tarde."""
+        expected_version = request.data.get('version')
+        return expected_version is not None and str(expected_version) != str(battle.version)
+
+    def conflict_response(self, battle_id, user):
+        battle = self.get_pvp_battle(battle_id, user)
+        return Response({
+            'error': 'La batalla ha cambiado mientras se procesaba tu acción. Vuelve a intentarlo.',
+            'conflict': True,
+            'battle_state': self.get_pvp_battle_state(battle, user.player_profile) if battle else None
+        }, status=409)
+
+    def get_pvp_battle_state(self, battle, player, since=None):
         is_player1 = (player == battle.player1)
 
+        delta = state_delta(battle, 0 if is_player1 else 1, since)
+        if delta is not None:
+            return delta
+
         player1_username = battle.player1.user.username if battle.player1 else None
         player2_username = battle.player2.user.username if battle.player2 else None
         current_turn_username = battle.current_turn.user.username if battle.current_turn else None
@@ -658,6 +799,7 @@ class PvPBattleViewSet(viewsets.ViewSet):
 
         return {
             'battle_id': battle.id,
+            'version': battle.version,
             'room_code': battle.room_code,
             'battle_format': battle.battle_format,
             'state': battle.state,
@@ -674,38 +816,8 @@ class PvPBattleViewSet(viewsets.ViewSet):
         }
 
     def calculate_pvp_damage(self, attacker, defender, move):
-        if move.get('damage_class') == 'status':
-            return 0
-
-        if move['damage_class'] == 'physical':
-            attack_stat = attacker['attack']
-            defense_stat = defender['defense']
-        else:
-            attack_stat = attacker['special_attack']
-            defense_stat = defender['special_defense']
-
-        level = 50
-        level_factor = (2 * level) / 5 + 2
-        power_factor = move['power'] if move['power'] else 0
-        stat_factor = attack_stat / defense_stat
-
-        base_damage = (level_factor * power_factor * stat_factor) / 50 + 2
-
-        defender_types = [defender['type1']]
-        if defender['type2']:
-            defender_types.append(defender['type2'])
-
-        type_effectiveness = self.get_type_effectiveness(move['type'], defender_types)
-        base_damage *= type_effectiveness
-
-        base_damage *= random.uniform(0.85, 1.0)
-
-        return int(max(1, base_damage))
-
-    def get_type_effectiveness(self, move_type, defender_types):
-        effectiveness = 1.0
-        for defender_type in defender_types:
-            if defender_type and move_type in self.TYPE_EFFECTIVENESS:
-                if defender_type in self.TYPE_EFFECTIVENESS[move_type]:
-                    effectiveness *= self.TYPE_EFFECTIVENESS[move_type][defender_type]
-        return effectiveness
+        return calculate_damage(
+            Combatant.from_dict(attacker),
+            Combatant.from_dict(defender),
+            MoveData.from_dict(move)
+        )
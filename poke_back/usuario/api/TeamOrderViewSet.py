@@ -2,9 +2,10 @@ from rest_framework import viewsets, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from usuario.models.PlayerPokemon import PlayerPokemon
+from usuario.services.battle_sessions import ReleasesPlayerBattles
 
 
-class TeamOrderViewSet(viewsets.ViewSet):
+class TeamOrderViewSet(ReleasesPlayerBattles, viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def _get_ordered_team(self, player):
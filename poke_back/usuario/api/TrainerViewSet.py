@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db import transaction
 from usuario.models.Trainer import Trainer
+from usuario.services.battle_sessions import battle_sessions
 from pokemon.models.Location import Location
 from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
 
@@ -38,6 +39,7 @@ class TrainerViewSet(viewsets.ReadOnlyModelViewSet):
         if trainer.location.location_type != 'route':
             return Response({'error': 'Solo puedes combatir con entrenadores en rutas'}, status=400)
 
+        battle_sessions.release_player(player)
         active_pokemon = player.pokemons.filter(in_team=True, current_hp__gt=0).order_by('order').first()
         if not active_pokemon:
             return Response({'error': 'No tienes Pokémon disponibles para combatir'}, status=400)
@@ -106,7 +108,7 @@ class TrainerViewSet(viewsets.ReadOnlyModelViewSet):
                 'level': active_pokemon.level,
                 'current_hp': active_pokemon.current_hp,
                 'max_hp': active_pokemon.hp,
-                'moves': [{'id': move.id, 'name': move.name} for move in active_pokemon.moves.all()]
+                'moves': [{'id': move.id, 'name': move.name} for move in active_pokemon.get_moves()]
             }
         })
 
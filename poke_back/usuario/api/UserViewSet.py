@@ -5,6 +5,7 @@ from django.contrib.auth import authenticate
 from usuario.models.User import User
 from usuario.models.Player import Player
 from usuario.models.Bag import Bag
+from usuario.services.leaderboard import leaderboard, player_summary
 
 from rest_framework.authtoken.models import Token
 
@@ -44,27 +45,14 @@ class UserSerializer(serializers.ModelSerializer):
 
     def get_pokedex_stats(self, obj):
         try:
-            from usuario.models.Pokedex import Pokedex
-            player = obj.player_profile
-            total_pokemon = 151
-
-            pokedex_entries = Pokedex.objects.filter(player=player)
-            seen_count = pokedex_entries.count()
-            caught_count = pokedex_entries.filter(state='caught').count()
-
-            return {
-                'total_pokemon': total_pokemon,
-                'seen': seen_count,
-                'caught': caught_count,
-                'completion_percentage': round((caught_count / total_pokemon) * 100, 2)
-            }
+            from usuario.services.pokedex_progress import pokedex_stats
+            return pokedex_stats(obj.player_profile)
         except:
             return None
 
     def get_ranking_position(self, obj):
         try:
-            higher_rated = User.objects.filter(pvp_rating__gt=obj.pvp_rating).count()
-            return higher_rated + 1  # Posición (1-based)
+            return leaderboard.rank(obj.pvp_rating)  # Posición (1-based)
         except:
             return None
 
@@ -171,78 +159,31 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def ranking(self, request):
-        top_players = User.objects.all().order_by('-pvp_rating', 'username')[:50]
-
-        ranking_data = []
-        for position, user in enumerate(top_players, 1):
-            try:
-                player_info = user.player_profile
-                pokemon_count = player_info.pokemons.count()
-
-                total_battles = user.battles_won + user.battles_lost
-                win_rate = round((user.battles_won / total_battles * 100), 2) if total_battles > 0 else 0
-
-                ranking_data.append({
-                    'position': position,
-                    'username': user.username,
-                    'pvp_rating': user.pvp_rating,
-                    'battles_won': user.battles_won,
-                    'battles_lost': user.battles_lost,
-                    'win_rate': win_rate,
-                    'total_battles': total_battles,
-                    'pokemon_count': pokemon_count,
-                    'starter_chosen': player_info.starter_chosen
-                })
-            except:
-                continue
-
-        return Response(ranking_data)
+        return Response(leaderboard.top())
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my_ranking(self, request):
         user = request.user
 
-        higher_rated = User.objects.filter(pvp_rating__gt=user.pvp_rating).count()
-        user_position = higher_rated + 1
-
-        start_idx = max(0, user_position - 3)
-        end_idx = user_position + 2
+        start_idx, nearby_ids = leaderboard.around(user)
+        user_position = leaderboard.rank(user.pvp_rating)
 
-        all_players = User.objects.all().order_by('-pvp_rating', 'username')
-        nearby_players = all_players[start_idx:end_idx]
+        nearby_users = User.objects.filter(id__in=nearby_ids, player_profile__isnull=False).in_bulk()
 
         nearby_data = []
-        for position, player in enumerate(nearby_players, start_idx + 1):
-            try:
-                player_info = player.player_profile
-                total_battles = player.battles_won + player.battles_lost
-                win_rate = round((player.battles_won / total_battles * 100), 2) if total_battles > 0 else 0
-
-                nearby_data.append({
-                    'position': position,
-                    'username': player.username,
-                    'pvp_rating': player.pvp_rating,
-                    'battles_won': player.battles_won,
-                    'battles_lost': player.battles_lost,
-                    'win_rate': win_rate,
-                    'is_current_user': player.id == user.id
-                })
-            except:
+        for position, player_id in enumerate(nearby_ids, start_idx + 1):
+            player = nearby_users.get(player_id)
+            if player is None:
                 continue
-
-        total_battles = user.battles_won + user.battles_lost
-        win_rate = round((user.battles_won / total_battles * 100), 2) if total_battles > 0 else 0
-
-        user_stats = {
-            'position': user_position,
-            'username': user.username,
-            'pvp_rating': user.pvp_rating,
-            'battles_won': user.battles_won,
-            'battles_lost': user.battles_lost,
-            'win_rate': win_rate,
-            'total_battles': total_battles,
-            'total_players': User.objects.count()
-        }
+            entry = player_summary(player, position)
+            entry['is_current_user'] = player.id == user.id
+            nearby_data.append(entry)
+
+        user_stats = player_summary(user, user_position)
+        user_stats.update({
+            'total_battles': user.battles_won + user.battles_lost,
+            'total_players': leaderboard.total()
+        })
 
         return Response({
             'user_stats': user_stats,
@@ -6,6 +6,6 @@ class UsuarioConfig(AppConfig):
     name = 'usuario'
 
     def ready(self):
-        # Eliminar esta línea por ahora, agregaremos signals después
-        # import usuario.signals
-        pass
\ No newline at end of file
+        from usuario.services import leaderboard, trainer_rosters
+        leaderboard.connect_signals()
+        trainer_rosters.connect_signals()
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuario', '0013_battle_battle_format_battle_current_turn_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='battle',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
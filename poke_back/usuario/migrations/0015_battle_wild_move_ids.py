@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:06
+
+from django.db import migrations, models
+
+
+def copy_wild_moves(apps, schema_editor):
+    Battle = apps.get_model('usuario', 'Battle')
+    WildMove = Battle.wild_moves.through
+
+    move_ids = {}
+    for battle_id, move_id in WildMove.objects.order_by('id').values_list('battle_id', 'move_id'):
+        move_ids.setdefault(battle_id, []).append(move_id)
+
+    battles = list(Battle.objects.filter(id__in=move_ids))
+    for battle in battles:
+        battle.wild_move_ids = move_ids[battle.id]
+    Battle.objects.bulk_update(battles, ['wild_move_ids'], batch_size=500)
+
+
+def copy_wild_move_ids(apps, schema_editor):
+    Battle = apps.get_model('usuario', 'Battle')
+    WildMove = Battle.wild_moves.through
+
+    WildMove.objects.bulk_create([
+        WildMove(battle_id=battle_id, move_id=move_id)
+        for battle_id, move_ids in Battle.objects.exclude(wild_move_ids=[]).values_list('id', 'wild_move_ids')
+        for move_id in move_ids
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuario', '0014_battle_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='battle',
+            name='wild_move_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(copy_wild_moves, copy_wild_move_ids),
+        migrations.RemoveField(
+            model_name='battle',
+            name='wild_moves',
+        ),
+    ]
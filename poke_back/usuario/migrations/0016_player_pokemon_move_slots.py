@@ -0,0 +1,87 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+MAX_MOVE_SLOTS = 4
+
+
+def copy_moves_to_slots(apps, schema_editor):
+    PlayerPokemon = apps.get_model('usuario', 'PlayerPokemon')
+    PlayerPokemonMove = apps.get_model('usuario', 'PlayerPokemonMove')
+    Move = apps.get_model('pokemon', 'Move')
+    KnownMove = PlayerPokemon.moves.through
+
+    max_pp = dict(Move.objects.values_list('id', 'pp'))
+    moves_pp = dict(PlayerPokemon.objects.exclude(moves_pp={}).values_list('id', 'moves_pp'))
+
+    slots = []
+    next_slot = {}
+    for player_pokemon_id, move_id in KnownMove.objects.order_by('playerpokemon_id', 'id').values_list(
+            'playerpokemon_id', 'move_id'):
+        slot = next_slot.get(player_pokemon_id, 0)
+        if slot >= MAX_MOVE_SLOTS:
+            continue
+        next_slot[player_pokemon_id] = slot + 1
+
+        pp = max_pp.get(move_id) or 0
+        current_pp = (moves_pp.get(player_pokemon_id) or {}).get(str(move_id), pp)
+        slots.append(PlayerPokemonMove(
+            player_pokemon_id=player_pokemon_id, slot=slot, move_id=move_id,
+            current_pp=max(0, min(current_pp, pp))
+        ))
+    PlayerPokemonMove.objects.bulk_create(slots, batch_size=500)
+
+
+def copy_slots_to_moves(apps, schema_editor):
+    PlayerPokemon = apps.get_model('usuario', 'PlayerPokemon')
+    PlayerPokemonMove = apps.get_model('usuario', 'PlayerPokemonMove')
+    KnownMove = PlayerPokemon.moves.through
+
+    moves_pp = {}
+    known_moves = []
+    for player_pokemon_id, move_id, current_pp in PlayerPokemonMove.objects.order_by(
+            'player_pokemon_id', 'slot').values_list('player_pokemon_id', 'move_id', 'current_pp'):
+        known_moves.append(KnownMove(playerpokemon_id=player_pokemon_id, move_id=move_id))
+        moves_pp.setdefault(player_pokemon_id, {})[str(move_id)] = current_pp
+    KnownMove.objects.bulk_create(known_moves, batch_size=500)
+
+    player_pokemons = list(PlayerPokemon.objects.filter(id__in=moves_pp))
+    for player_pokemon in player_pokemons:
+        player_pokemon.moves_pp = moves_pp[player_pokemon.id]
+    PlayerPokemon.objects.bulk_update(player_pokemons, ['moves_pp'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon', '0004_shopitem'),
+        ('usuario', '0015_battle_wild_move_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerPokemonMove',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('current_pp', models.IntegerField(default=0)),
+                ('move', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_pokemon_slots', to='pokemon.move')),
+                ('player_pokemon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='move_slots', to='usuario.playerpokemon')),
+            ],
+            options={
+                'db_table': 'player_pokemon_moves',
+                'ordering': ['slot'],
+                'unique_together': {('player_pokemon', 'move'), ('player_pokemon', 'slot')},
+            },
+        ),
+        migrations.RunPython(copy_moves_to_slots, copy_slots_to_moves),
+        migrations.RemoveField(
+            model_name='playerpokemon',
+            name='moves',
+        ),
+        migrations.RemoveField(
+            model_name='playerpokemon',
+            name='moves_pp',
+        ),
+    ]
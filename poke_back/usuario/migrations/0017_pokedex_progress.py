@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_progress(apps, schema_editor):
+    Pokedex = apps.get_model('usuario', 'Pokedex')
+    PokedexProgress = apps.get_model('usuario', 'PokedexProgress')
+
+    masks = {}
+    for player_id, pokedex_id, state in Pokedex.objects.values_list('player_id', 'pokemon__pokedex_id',
+                                                                    'state').iterator():
+        seen, caught = masks.get(player_id, (0, 0))
+        bit = 1 << pokedex_id
+        masks[player_id] = (seen | bit, caught | bit if state == 'caught' else caught)
+
+    PokedexProgress.objects.bulk_create([
+        PokedexProgress(
+            player_id=player_id,
+            seen=seen.to_bytes((seen.bit_length() + 7) // 8, 'little'),
+            caught=caught.to_bytes((caught.bit_length() + 7) // 8, 'little'),
+            seen_count=seen.bit_count(), caught_count=caught.bit_count()
+        )
+        for player_id, (seen, caught) in masks.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuario', '0016_player_pokemon_move_slots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PokedexProgress',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pokedex_progress', serialize=False, to='usuario.player')),
+                ('seen', models.BinaryField(default=b'')),
+                ('caught', models.BinaryField(default=b'')),
+                ('seen_count', models.PositiveIntegerField(default=0)),
+                ('caught_count', models.PositiveIntegerField(default=0)),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'pokedex_progress',
+            },
+        ),
+        migrations.RunPython(build_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:56
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuario', '0018_users_rating_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='playerpokemon',
+            name='just_evolved',
+        ),
+    ]
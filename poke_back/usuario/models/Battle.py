@@ -2,8 +2,10 @@ from django.db import models
 from .Player import Player
 from .PlayerPokemon import PlayerPokemon
 from pokemon.models.Pokemon import Pokemon
-from pokemon.models.Move import Move
-import json
+
+
+class StaleBattleError(Exception):
+    """Otra petición modificó la batalla entre la lectura y la escritura."""
 
 
 class Battle(models.Model):
@@ -59,12 +61,15 @@ class Battle(models.Model):
 
     state = models.CharField(max_length=10, choices=BATTLE_STATES, default='active')
     turn = models.IntegerField(default=0)
+    # Se incrementa en cada save_versioned(); detecta escrituras concurrentes en PvP
+    version = models.PositiveIntegerField(default=0)
 
     room_code = models.CharField(max_length=8, unique=True, null=True, blank=True)
     is_private = models.BooleanField(default=False)
     password = models.CharField(max_length=50, blank=True, null=True)
 
-    wild_moves = models.ManyToManyField(Move, related_name='wild_battles', blank=True)
+    # Ids de los movimientos del salvaje; se resuelven con el registro de game_data
+    wild_move_ids = models.JSONField(default=list, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -88,6 +93,11 @@ class Battle(models.Model):
     def is_active(self):
         return self.state == 'active'
 
+    @property
+    def wild_moves(self):
+        from pokemon.services.game_data import get_game_data
+        return get_game_data().moves_by_ids(self.wild_move_ids)
+
     @property
     def is_waiting(self):
         return self.state == 'waiting'
@@ -148,6 +158,20 @@ class Battle(models.Model):
                     return True
         return False
 
+    def save_versioned(self):
+        """Guarda la fila solo si sigue en la versión leída; si no, lanza StaleBattleError."""
+        values = {
+            field.attname: field.pre_save(self, False)
+            for field in self._meta.concrete_fields
+            if not field.primary_key
+        }
+        values['version'] = self.version + 1
+
+        updated = Battle.objects.filter(pk=self.pk, version=self.version).update(**values)
+        if not updated:
+            raise StaleBattleError(f'La batalla {self.pk} cambió desde la versión {self.version}')
+        self.version += 1
+
     def check_team_defeated(self, team):
         return all(pokemon['current_hp'] <= 0 for pokemon in team)
 
@@ -155,6 +179,12 @@ class Battle(models.Model):
         self.state = 'won' if winner else 'draw'
         self.winner = winner
 
+        # Primero la batalla: si otra petición ya la cerró, no se tocan estadísticas ni rating
+        if self.battle_type == 'pvp':
+            self.save_versioned()
+        else:
+            self.save()
+
         if winner:
             winner.user.battles_won += 1
             loser = self.player2 if winner == self.player1 else self.player1
@@ -165,8 +195,6 @@ class Battle(models.Model):
             winner.user.save()
             loser.user.save()
 
-        self.save()
-
     def update_ratings(self, winner, loser):
         K = 32
 
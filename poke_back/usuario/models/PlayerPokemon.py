@@ -1,8 +1,14 @@
 from django.db import models
+from django.db.models import prefetch_related_objects
 from django.core.exceptions import ValidationError
 from .Player import Player
 from pokemon.models.Pokemon import Pokemon
-from pokemon.models.Move import Move
+from pokemon.services.game_data import get_game_data
+
+# Campos cuyo valor guardado se recuerda para detectar cambios en save()
+TRACKED_FIELDS = ('level', 'pokemon_id', 'in_team', 'order')
+# Si un save(update_fields=...) toca alguno, pasa por el guardado completo
+TEAM_FIELDS = frozenset({'level', 'pokemon', 'pokemon_id', 'in_team', 'order'})
 
 
 class PlayerPokemon(models.Model):
@@ -15,7 +21,6 @@ class PlayerPokemon(models.Model):
 
     in_team = models.BooleanField(default=True)
     order = models.IntegerField(default=0)
-    moves = models.ManyToManyField(Move, related_name='player_pokemons')
 
     hp = models.IntegerField(default=0)
     attack = models.IntegerField(default=0)
@@ -23,8 +28,6 @@ class PlayerPokemon(models.Model):
     special_attack = models.IntegerField(default=0)
     special_defense = models.IntegerField(default=0)
     speed = models.IntegerField(default=0)
-    moves_pp = models.JSONField(default=dict, blank=True)
-    just_evolved = models.BooleanField(default=False)
 
     class Meta:
         db_table = 'player_pokemons'
@@ -43,129 +46,28 @@ class PlayerPokemon(models.Model):
             raise ValidationError('El orden debe estar entre 0 y 5')
 
     def calculate_stats(self):
-        self.hp = int((2 * self.pokemon.base_hp * self.level) / 100) + self.level + 10
-        self.attack = int((2 * self.pokemon.base_attack * self.level) / 100) + 5
-        self.defense = int((2 * self.pokemon.base_defense * self.level) / 100) + 5
-        self.special_attack = int((2 * self.pokemon.base_special_attack * self.level) / 100) + 5
-        self.special_defense = int((2 * self.pokemon.base_special_defense * self.level) / 100) + 5
-        self.speed = int((2 * self.pokemon.base_speed * self.level) / 100) + 5
+        game_data = get_game_data()
+        species = game_data.pokemon(self.pokemon_id) or self.pokemon
+        (self.hp, self.attack, self.defense,
+         self.special_attack, self.special_defense, self.speed) = game_data.stats(species, self.level)
 
     def get_experience_required(self, level=None):
+        from usuario.services.experience import experience_required
+
         if level is None:
             level = self.level + 1
 
-        if level <= 1:
-            return 0
-
-        return level ** 3  # Fórmula Medium Fast: n³
+        return experience_required(level)
 
     def add_experience(self, exp_amount):
-        original_level = self.level
-        self.experience += exp_amount
-
-        leveled_up = False
-
-        while self.level < 100 and self.experience >= self.get_experience_required():
-            self.level_up()
-            leveled_up = True
-
-        update_fields = {
-            'level': self.level,
-            'experience': self.experience,
-            'hp': self.hp,
-            'current_hp': self.current_hp,
-            'attack': self.attack,
-            'defense': self.defense,
-            'special_attack': self.special_attack,
-            'special_defense': self.special_defense,
-            'speed': self.speed,
-            'just_evolved': self.just_evolved
-        }
-
-        if self.just_evolved:
-            update_fields['pokemon'] = self.pokemon
-            if not self.nickname:
-                update_fields['nickname'] = None
-
-        PlayerPokemon.objects.filter(pk=self.pk).update(**update_fields)
-
-        if self.just_evolved:
-            self.just_evolved = False
-            PlayerPokemon.objects.filter(pk=self.pk).update(just_evolved=False)
-
-        return leveled_up
-
-    def level_up(self):
-        old_level = self.level
-        self.level += 1
-
-        print(f"¡{self.pokemon.name} subió al nivel {self.level}!")
-
-        old_hp_percentage = self.current_hp / self.hp if self.hp > 0 else 0
-
-        self.calculate_stats()
-
-        self.current_hp = int(self.hp * old_hp_percentage)
-        if self.current_hp <= 0 and self.hp > 0:
-            self.current_hp = 1
+        from usuario.services.experience import award_experience
 
-        self.check_evolution()
-
-        if self.just_evolved:
-            self.current_hp = self.hp
-            print(f"¡{self.pokemon.name} evolucionó!")
-
-            from usuario.models.Pokedex import Pokedex
-            Pokedex.objects.get_or_create(
-                player=self.player,
-                pokemon=self.pokemon,
-                defaults={'state': 'caught'}
-            )
+        return award_experience(self, exp_amount).leveled_up
 
     def full_heal(self):
         self.current_hp = self.hp
         PlayerPokemon.objects.filter(pk=self.pk).update(current_hp=self.hp)
 
-    def check_evolution(self):
-        evolution = Pokemon.objects.filter(
-            evolves_from=self.pokemon,
-            evolution_level__lte=self.level
-        ).first()
-
-        if evolution:
-            self.evolve(evolution)
-
-    def evolve(self, new_pokemon):
-        old_pokemon_name = self.pokemon.name
-        self.pokemon = new_pokemon
-        self.just_evolved = True
-
-        self.calculate_stats()
-
-        self.current_hp = self.hp
-
-        if not self.nickname or self.nickname == old_pokemon_name:
-            self.nickname = None
-
-        if not self.moves_pp:
-            self.moves_pp = {}
-
-        for move in self.moves.all():
-            move_id_str = str(move.id)
-            if move_id_str not in self.moves_pp:
-                self.moves_pp[move_id_str] = move.pp
-
-        from usuario.models.Pokedex import Pokedex
-        pokedex_entry, created = Pokedex.objects.get_or_create(
-            player=self.player,
-            pokemon=new_pokemon,
-            defaults={'state': 'caught'}
-        )
-
-        if not created and pokedex_entry.state != 'caught':
-            pokedex_entry.state = 'caught'
-            pokedex_entry.save()
-
     def get_experience_info(self):
         current_exp = self.experience
 
@@ -193,126 +95,180 @@ class PlayerPokemon(models.Model):
             'can_level_up': current_exp >= next_level_exp
         }
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_saved_state()
+        return instance
+
+    def _remember_saved_state(self):
+        # Valores tal y como están en la base de datos, para saber qué cambió sin volver a leer la fila
+        self._saved_state = {field: self.__dict__.get(field) for field in TRACKED_FIELDS}
+
+    def has_changed(self, field):
+        saved_state = getattr(self, '_saved_state', None)
+        if not self.pk or saved_state is None or saved_state[field] is None:
+            return True
+        return saved_state[field] != getattr(self, field)
+
     def save(self, *args, **kwargs):
+        """
+        Camino rápido: save(update_fields=[...]) sin level, pokemon, in_team ni order
+        (PS y PP en combates, capturas, curas en el centro) es un único UPDATE.
+
+        El guardado completo recalcula los stats si cambió el nivel o la especie, coloca al
+        Pokémon al final del equipo cuando entra en él y, si está en el equipo y cambió su
+        pertenencia o su orden, recoloca el equipo con un solo bulk_update. Los cambios se detectan comparando
+        con los valores leídos de la base de datos, sin volver a consultarla.
+        """
         skip_reorder = kwargs.pop('skip_reorder', False)
+        update_fields = kwargs.get('update_fields')
+
+        if update_fields is not None and not TEAM_FIELDS.intersection(update_fields):
+            super().save(*args, **kwargs)
+            self._remember_saved_state()
+            return
+
+        joined_team = self.in_team and self.has_changed('in_team')
+        team_changed = self.has_changed('in_team') or self.has_changed('order')
 
         if self.in_team:
-            if not self.pk or self.order == 0:
+            if joined_team and self.order == 0:
                 max_order = PlayerPokemon.objects.filter(
-                    player=self.player,
+                    player_id=self.player_id,
                     in_team=True
-                ).exclude(pk=self.pk).aggregate(models.Max('order'))['order__max'] or -1
-                self.order = max_order + 1
+                ).exclude(pk=self.pk).aggregate(models.Max('order'))['order__max']
+                self.order = max_order + 1 if max_order is not None else 0
 
             if self.order > 5:
                 self.order = 5
         else:
             self.order = 0
 
-        if not self.pk or self.has_changed_level():
+        if self.has_changed('level') or self.has_changed('pokemon_id'):
             self.calculate_stats()
             if not self.current_hp or self.current_hp > self.hp:
                 self.current_hp = self.hp
 
-
-
-        if not self.just_evolved and self.pk:
-            current_just_evolved = PlayerPokemon.objects.filter(pk=self.pk).values_list('just_evolved',
-                                                                                        flat=True).first()
-            if current_just_evolved and not self.just_evolved:
-                self.just_evolved = False
-
         super().save(*args, **kwargs)
+        self._remember_saved_state()
 
-        if not self.moves_pp:
-            self.moves_pp = {}
-
-        for move in self.moves.all():
-            move_id_str = str(move.id)
-            if move_id_str not in self.moves_pp:
-                self.moves_pp[move_id_str] = move.pp
-
-        if self.pk:
-            current_move_ids = set(str(move.id) for move in self.moves.all())
+        if self.in_team and team_changed and not skip_reorder:
+            PlayerPokemon.reorder_team(self.player_id)
 
-            keys_to_remove = []
-            for move_id_str in self.moves_pp.keys():
-                if move_id_str not in current_move_ids:
-                    keys_to_remove.append(move_id_str)
-
-            for key in keys_to_remove:
-                del self.moves_pp[key]
-
-        if self.in_team and not skip_reorder:
-            self._reorder_team()
-
-    def _reorder_team(self):
-        team_pokemons = PlayerPokemon.objects.filter(
-            player=self.player,
+    @staticmethod
+    def reorder_team(player_id):
+        """Deja los órdenes del equipo en 0..n-1: una lectura y como mucho un bulk_update."""
+        team_pokemons = list(PlayerPokemon.objects.filter(
+            player_id=player_id,
             in_team=True
-        ).order_by('order', 'id')
+        ).order_by('order', 'id'))
 
+        changed = []
         for new_order, pokemon in enumerate(team_pokemons):
             if pokemon.order != new_order:
-                PlayerPokemon.objects.filter(pk=pokemon.pk).update(order=new_order)
+                pokemon.order = new_order
+                changed.append(pokemon)
+
+        if changed:
+            PlayerPokemon.objects.bulk_update(changed, ['order'])
+        return len(changed)
 
     def has_changed_level(self):
-        if not self.pk:
-            return True
-        try:
-            old = PlayerPokemon.objects.get(pk=self.pk)
-            return old.level != self.level
-        except PlayerPokemon.DoesNotExist:
-            return True
+        return self.has_changed('level')
 
     def get_available_moves(self):
-        from pokemon.models.PokemonMove import PokemonMove
-        return PokemonMove.objects.filter(
-            pokemon=self.pokemon,
-            level__lte=self.level
-        ).select_related('move')
+        return get_game_data().moves_learned_up_to(self.pokemon_id, self.level)
 
     def can_learn_move(self, move):
-        return self.get_available_moves().filter(move=move).exists()
+        return get_game_data().can_learn(self.pokemon_id, move.id, self.level)
+
+    def get_move_slots(self):
+        """
+        Huecos de movimiento en orden, con sus PP. Una consulta por índice la primera vez
+        (ninguna si se precargó move_slots); los Move salen del registro de game_data.
+        Devuelve siempre las mismas instancias, así que los cambios de PP se conservan.
+        """
+        prefetch_related_objects([self], 'move_slots')
+        game_data = get_game_data()
+        slots = list(self.move_slots.all())
+        for slot in slots:
+            if not slot._meta.get_field('move').is_cached(slot):
+                move = game_data.move(slot.move_id)
+                if move is not None:
+                    slot.move = move
+        return slots
+
+    def get_moves(self):
+        return [slot.move for slot in self.get_move_slots()]
+
+    def get_move_slot(self, move_id):
+        for slot in self.get_move_slots():
+            if str(slot.move_id) == str(move_id):
+                return slot
+        return None
+
+    def _forget_move_slots(self):
+        getattr(self, '_prefetched_objects_cache', {}).pop('move_slots', None)
+
+    def set_moves(self, moves):
+        """Sustituye todos los movimientos (máximo 4) con los PP al máximo."""
+        from usuario.models.PlayerPokemonMove import MAX_MOVE_SLOTS, PlayerPokemonMove
+
+        self.move_slots.all().delete()
+        PlayerPokemonMove.objects.bulk_create([
+            PlayerPokemonMove(player_pokemon=self, slot=slot, move=move, current_pp=move.pp)
+            for slot, move in enumerate(list(moves)[:MAX_MOVE_SLOTS])
+        ])
+        self._forget_move_slots()
 
     def teach_move(self, move):
+        from usuario.models.PlayerPokemonMove import MAX_MOVE_SLOTS, PlayerPokemonMove
+
         if not self.can_learn_move(move):
             raise ValidationError(f"{self.pokemon.name} no puede aprender {move.name}")
 
-        if self.moves.count() >= 4:
+        slots = self.get_move_slots()
+        if len(slots) >= MAX_MOVE_SLOTS:
             raise ValidationError(f"{self.pokemon.name} ya tiene 4 movimientos")
 
-        if self.moves.filter(id=move.id).exists():
+        if any(slot.move_id == move.id for slot in slots):
             raise ValidationError(f"{self.pokemon.name} ya conoce {move.name}")
 
-        self.moves.add(move)
-
-        if not self.moves_pp:
-            self.moves_pp = {}
-
-        self.moves_pp[str(move.id)] = move.pp
-        self.save(update_fields=['moves_pp'])
+        used = {slot.slot for slot in slots}
+        free_slot = next(index for index in range(MAX_MOVE_SLOTS) if index not in used)
+        PlayerPokemonMove.objects.create(player_pokemon=self, slot=free_slot, move=move, current_pp=move.pp)
+        self._forget_move_slots()
 
         return True
 
     def forget_move(self, move):
-        if not self.moves.filter(id=move.id).exists():
+        slot = self.get_move_slot(move.id)
+        if slot is None:
             raise ValidationError(f"{self.pokemon.name} no conoce {move.name}")
 
-        if self.moves.count() <= 1:
+        if len(self.get_move_slots()) <= 1:
             raise ValidationError(f"{self.pokemon.name} debe tener al menos 1 movimiento")
 
-        self.moves.remove(move)
-
-        if self.moves_pp and str(move.id) in self.moves_pp:
-            del self.moves_pp[str(move.id)]
-            self.save(update_fields=['moves_pp'])
+        slot.delete()
+        self._forget_move_slots()
 
         return True
 
     def replace_move(self, old_move, new_move):
-        self.forget_move(old_move)
+        """El nuevo movimiento ocupa el hueco del antiguo, con los PP al máximo."""
+        slot = self.get_move_slot(old_move.id)
+        if slot is None:
+            raise ValidationError(f"{self.pokemon.name} no conoce {old_move.name}")
+
+        if not self.can_learn_move(new_move):
+            raise ValidationError(f"{self.pokemon.name} no puede aprender {new_move.name}")
+
+        if self.get_move_slot(new_move.id) is not None:
+            raise ValidationError(f"{self.pokemon.name} ya conoce {new_move.name}")
 
-        self.teach_move(new_move)
+        slot.move = new_move
+        slot.current_pp = new_move.pp
+        slot.save(update_fields=['move', 'current_pp'])
 
         return True
@@ -0,0 +1,21 @@
+from django.db import models
+from .PlayerPokemon import PlayerPokemon
+from pokemon.models.Move import Move
+
+MAX_MOVE_SLOTS = 4
+
+
+class PlayerPokemonMove(models.Model):
+    """Hueco de movimiento (0-3) de un PlayerPokemon con sus PP actuales."""
+    player_pokemon = models.ForeignKey(PlayerPokemon, on_delete=models.CASCADE, related_name='move_slots')
+    slot = models.PositiveSmallIntegerField()
+    move = models.ForeignKey(Move, on_delete=models.CASCADE, related_name='player_pokemon_slots')
+    current_pp = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'player_pokemon_moves'
+        ordering = ['slot']
+        unique_together = [('player_pokemon', 'slot'), ('player_pokemon', 'move')]
+
+    def __str__(self):
+        return f"{self.player_pokemon_id} [{self.slot}] {self.move_id} ({self.current_pp} PP)"
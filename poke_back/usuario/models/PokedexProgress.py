@@ -0,0 +1,82 @@
+from django.db import models
+from .Player import Player
+
+
+class StalePokedexError(Exception):
+    """Otra petición modificó el progreso entre la lectura y la escritura."""
+
+
+def decode_bits(data):
+    return int.from_bytes(bytes(data or b''), 'little')
+
+
+def encode_bits(mask):
+    return mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+
+
+class PokedexProgress(models.Model):
+    """
+    Resumen de la Pokédex de un jugador: un bit por número de Pokédex para vistos y
+    capturados, con los contadores ya calculados. Las filas de Pokedex siguen siendo el
+    historial detallado; este resumen evita contarlas en cada lectura del perfil.
+    """
+    player = models.OneToOneField(Player, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='pokedex_progress')
+    seen = models.BinaryField(default=b'')
+    caught = models.BinaryField(default=b'')
+    seen_count = models.PositiveIntegerField(default=0)
+    caught_count = models.PositiveIntegerField(default=0)
+
+    # Se incrementa en cada save_versioned(); detecta escrituras concurrentes
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'pokedex_progress'
+
+    def __str__(self):
+        return f"{self.player_id}: {self.seen_count} vistos, {self.caught_count} capturados"
+
+    @property
+    def seen_mask(self):
+        return decode_bits(self.seen)
+
+    @property
+    def caught_mask(self):
+        return decode_bits(self.caught)
+
+    def has_seen(self, pokedex_id):
+        return bool(self.seen_mask >> pokedex_id & 1)
+
+    def has_caught(self, pokedex_id):
+        return bool(self.caught_mask >> pokedex_id & 1)
+
+    def register(self, pokedex_ids, caught=False):
+        """
+        Marca los números dados como vistos (y capturados con caught=True) en memoria.
+        Devuelve los números cuyo estado cambió; capturar implica haber visto.
+        """
+        mask = 0
+        for pokedex_id in pokedex_ids:
+            mask |= 1 << pokedex_id
+
+        seen_mask, caught_mask = self.seen_mask, self.caught_mask
+        new_seen = seen_mask | mask
+        new_caught = caught_mask | mask if caught else caught_mask
+        changed = (new_seen & ~seen_mask) | (new_caught & ~caught_mask)
+
+        if changed:
+            self.seen, self.caught = encode_bits(new_seen), encode_bits(new_caught)
+            self.seen_count, self.caught_count = new_seen.bit_count(), new_caught.bit_count()
+
+        return {pokedex_id for pokedex_id in pokedex_ids if changed >> pokedex_id & 1}
+
+    def save_versioned(self):
+        """Una sola escritura, y solo si la fila sigue en la versión leída."""
+        updated = PokedexProgress.objects.filter(pk=self.pk, version=self.version).update(
+            seen=self.seen, caught=self.caught,
+            seen_count=self.seen_count, caught_count=self.caught_count,
+            version=self.version + 1
+        )
+        if not updated:
+            raise StalePokedexError(f'El progreso de {self.pk} cambió desde la versión {self.version}')
+        self.version += 1
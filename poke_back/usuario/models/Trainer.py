@@ -30,71 +30,50 @@ class Trainer(models.Model):
     def __str__(self):
         return f"{self.name} ({self.get_trainer_type_display()})"
 
-    def generate_team(self):
-        from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
+    def generate_team(self, seed=None, game_data=None):
+        """
+        Equipo en el formato de Battle.trainer_team. Con seed el resultado es determinista:
+        el mismo entrenador con la misma semilla genera siempre el mismo equipo.
+        """
+        import random
+
+        from pokemon.services.game_data import get_game_data
+        from usuario.services.trainer_rosters import member_data
 
-        encounters = WildPokemonEncounter.objects.filter(location=self.location)
+        game_data = game_data or get_game_data()
+        encounters = game_data.encounter_sampler(self.location_id)
 
         if not encounters:
             return []
 
+        rng = random.Random(f'{self.pk}:{seed}') if seed is not None else random.Random()
+
         team = []
         for _ in range(self.team_size):
-            encounter = self._weighted_random_encounter(encounters)
-
-            level = self._calculate_trainer_level()
-
-            hp = self._calculate_hp(encounter.pokemon.base_hp, level)
-            attack = self._calculate_stat(encounter.pokemon.base_attack, level)
-            defense = self._calculate_stat(encounter.pokemon.base_defense, level)
-            special_attack = self._calculate_stat(encounter.pokemon.base_special_attack, level)
-            special_defense = self._calculate_stat(encounter.pokemon.base_special_defense, level)
-            speed = self._calculate_stat(encounter.pokemon.base_speed, level)
-
-            from pokemon.models.PokemonMove import PokemonMove
-            available_moves = PokemonMove.objects.filter(
-                pokemon=encounter.pokemon,
-                level__lte=level
-            ).order_by('-level')[:4]
-
-            moves = [pm.move for pm in available_moves]
-
-            team.append({
-                'pokemon': encounter.pokemon,
-                'level': level,
-                'current_hp': hp,
-                'max_hp': hp,
-                'attack': attack,
-                'defense': defense,
-                'special_attack': special_attack,
-                'special_defense': special_defense,
-                'speed': speed,
-                'moves': moves,
-                'type1': encounter.pokemon.type1,
-                'type2': encounter.pokemon.type2,
-            })
+            encounter = self._weighted_random_encounter(encounters, rng)
 
-        return team
+            level = self._calculate_trainer_level(rng)
 
-    def _weighted_random_encounter(self, encounters):
-        import random
+            team.append(member_data(game_data, encounter.pokemon, level))
 
-        rarity_weights = {
-            'common': 60,
-            'uncommon': 30,
-            'rare': 9,
-            'very_rare': 1
-        }
+        return team
 
-        weighted_encounters = []
-        for encounter in encounters:
-            weighted_encounters.extend([encounter] * rarity_weights.get(encounter.rarity, 1))
+    def template(self, seed, game_data=None):
+        """Plantilla lista para empezar un combate (ver usuario.services.trainer_rosters)."""
+        from usuario.services.trainer_rosters import TRAINER_SPRITES, TrainerTemplate
 
-        return random.choice(weighted_encounters)
+        return TrainerTemplate(
+            self.trainer_type, self.name,
+            self.sprite or TRAINER_SPRITES.get(self.trainer_type),
+            self.dialogue_before or f"¡Soy {self.name}! ¡Prepárate para luchar!",
+            self.money_reward,
+            self.generate_team(seed, game_data)
+        )
 
-    def _calculate_trainer_level(self):
-        import random
+    def _weighted_random_encounter(self, encounters, rng):
+        return encounters.sample(rng)
 
+    def _calculate_trainer_level(self, rng):
         level_modifiers = {
             'beginner': (0.7, 0.9),
             'intermediate': (0.9, 1.1),
@@ -105,13 +84,7 @@ class Trainer(models.Model):
         }
 
         modifier_range = level_modifiers.get(self.trainer_type, (0.8, 1.0))
-        base_level = random.randint(self.min_level, self.max_level)
-        modifier = random.uniform(*modifier_range)
+        base_level = rng.randint(self.min_level, self.max_level)
+        modifier = rng.uniform(*modifier_range)
 
         return max(1, min(100, int(base_level * modifier)))
-
-    def _calculate_hp(self, base_hp, level):
-        return int((2 * base_hp * level) / 100) + level + 10
-
-    def _calculate_stat(self, base_stat, level):
-        return int((2 * base_stat * level) / 100) + 5
\ No newline at end of file
@@ -14,6 +14,10 @@ class User(AbstractUser):
 
     class Meta:
         db_table = 'users'
+        indexes = [
+            # Orden del ranking: top N sin ordenar la tabla entera
+            models.Index(fields=['-pvp_rating', 'username'], name='users_rating_idx'),
+        ]
 
     def __str__(self):
         return self.username
\ No newline at end of file
@@ -3,5 +3,7 @@ from .Player import Player
 from .Bag import Bag
 from .Pokedex import Pokedex
 from .PlayerPokemon import PlayerPokemon
+from .PlayerPokemonMove import PlayerPokemonMove
 from .Battle import Battle
-from .Trainer import Trainer
\ No newline at end of file
+from .Trainer import Trainer
+from .PokedexProgress import PokedexProgress
@@ -0,0 +1,286 @@
+"""
+Combates activos en memoria.
+
+El estado vivo de cada combate (Battle + su PlayerPokemon activo) se guarda en un
+LRU en proceso o, si BATTLE_SESSIONS['CACHE_ALIAS'] apunta a un alias de CACHES, en
+esa caché de Django. Con el LRU los turnos solo modifican la copia en memoria; la tabla
+battles se escribe (write-behind) cuando el combate termina, cuando la sesión sale del LRU
+y, para los combates con cambios de hace más de FLUSH_INTERVAL segundos, desde un hilo de
+fondo (start_background_flush, que arrancan wsgi.py y asgi.py y que también lo escribe todo
+al salir el proceso). Si el proceso cae sin apagarse, el combate se recupera desde la
+última escritura en la base de datos.
+
+El LRU y los locks por combate viven en el proceso: sirve para runserver o un único worker.
+Con varios workers cada proceso tendría su propia copia del combate, así que hay que usar
+CACHE_ALIAS con una caché compartida (Redis, Memcached).
+
+Una caché de Django puede descartar entradas (expulsión, caducidad, reinicio) sin avisar,
+así que en ese modo cada turno se escribe al momento y la caché solo ahorra las lecturas.
+
+La sesión guarda el Player y los Pokémon tal y como estaban al cargar el combate. Las
+vistas que leen o cambian el equipo fuera del combate (empezar otro combate, tienda,
+viajar, curar, movimientos, listados del equipo) llaman antes a release_player, que escribe
+la sesión y la saca de memoria: la vista lee el estado real y el siguiente turno vuelve a
+cargarlo de la base de datos.
+
+Solo el Pokémon activo puede tener cambios sin escribir: quien cambie de Pokémon o
+deje uno debilitado debe llamar a save_turn(..., flush=True).
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+
+from usuario.models.Battle import Battle
+from usuario.models.PlayerPokemon import PlayerPokemon
+from usuario.models.PlayerPokemonMove import PlayerPokemonMove
+from usuario.services.battle_turns import load_active_battle
+
+DEFAULTS = {
+    'CACHE_ALIAS': None,
+    'MAX_SESSIONS': 1000,
+    'FLUSH_INTERVAL': 30,
+}
+
+LOCK_STRIPES = 64
+
+logger = logging.getLogger(__name__)
+
+
+class BattleSession:
+    __slots__ = ('battle', 'dirty_pokemons', 'last_flush', 'unsaved')
+
+    def __init__(self, battle):
+        self.battle = battle
+        self.dirty_pokemons = {}
+        self.last_flush = time.monotonic()
+        self.unsaved = False  # turnos en memoria que aún no están en la base de datos
+
+
+class BattleSessionStore:
+    def __init__(self):
+        self._sessions = OrderedDict()
+        self._guard = threading.Lock()
+        # Un lock por franja de ids: serializa cada combate sin un lock global
+        self._locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+        self._flusher = None
+
+    def _config(self):
+        config = dict(DEFAULTS)
+        config.update(getattr(settings, 'BATTLE_SESSIONS', {}))
+        return config
+
+    def _cache(self, config):
+        alias = config['CACHE_ALIAS']
+        return caches[alias] if alias else None
+
+    def _lock_for(self, battle_id):
+        return self._locks[hash(str(battle_id)) % LOCK_STRIPES]
+
+    @contextmanager
+    def lock(self, battle_id):
+        with self._lock_for(battle_id):
+            yield
+
+    def _read(self, key, config):
+        cache = self._cache(config)
+        if cache is not None:
+            return cache.get(f'battle-session:{key}')
+
+        with self._guard:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+            return session
+
+    def _write(self, key, session, config):
+        cache = self._cache(config)
+        if cache is not None:
+            cache.set(f'battle-session:{key}', session, timeout=None)
+            return
+
+        evicted = []
+        with self._guard:
+            self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > config['MAX_SESSIONS']:
+                evicted.append(self._sessions.popitem(last=False))
+
+        for evicted_key, evicted_session in evicted:
+            self._evict(evicted_key, evicted_session)
+
+    def _evict(self, key, session):
+        lock = self._lock_for(key)
+        # Si otro hilo está jugando ese turno, la sesión vuelve al LRU en vez de escribirse a medias
+        if not lock.acquire(blocking=False):
+            with self._guard:
+                self._sessions[key] = session
+            return
+        try:
+            if session.unsaved:
+                self._flush(session)
+        finally:
+            lock.release()
+
+    def _delete(self, key, config):
+        cache = self._cache(config)
+        if cache is not None:
+            cache.delete(f'battle-session:{key}')
+            return
+        with self._guard:
+            self._sessions.pop(key, None)
+
+    def _flush(self, session):
+        with transaction.atomic():
+            if session.dirty_pokemons:
+                PlayerPokemon.objects.bulk_update(list(session.dirty_pokemons.values()), ['current_hp'])
+                slots = [
+                    slot
+                    for player_pokemon in session.dirty_pokemons.values()
+                    if 'move_slots' in getattr(player_pokemon, '_prefetched_objects_cache', {})
+                    for slot in player_pokemon.move_slots.all()
+                ]
+                if slots:
+                    PlayerPokemonMove.objects.bulk_update(slots, ['current_pp'])
+            session.battle.save()
+        session.dirty_pokemons = {}
+        session.last_flush = time.monotonic()
+        session.unsaved = False
+
+    def get(self, battle_id, user):
+        """Devuelve el combate activo del usuario; solo va a la base de datos si no está en memoria."""
+        config = self._config()
+        key = str(battle_id)
+
+        session = self._read(key, config)
+        if session is None:
+            session = BattleSession(load_active_battle(battle_id, user))
+            self._write(key, session, config)
+        elif session.battle.player.user_id != user.id:
+            raise Battle.DoesNotExist
+
+        return session.battle
+
+    def save_turn(self, battle, *player_pokemons, flush=False):
+        """Guarda el resultado del turno en memoria y escribe en la base de datos si toca."""
+        config = self._config()
+        key = str(battle.pk)
+
+        session = self._read(key, config) or BattleSession(battle)
+        session.battle = battle
+        for player_pokemon in player_pokemons:
+            session.dirty_pokemons[player_pokemon.pk] = player_pokemon
+
+        if not battle.is_active:
+            self._flush(session)
+            self._delete(key, config)
+            return
+
+        if flush or self._cache(config) is not None or \
+                time.monotonic() - session.last_flush >= config['FLUSH_INTERVAL']:
+            self._flush(session)
+        else:
+            session.unsaved = True
+        self._write(key, session, config)
+
+    def flush_all(self):
+        """Escribe todas las sesiones del LRU con cambios (p. ej. al apagar el servidor)."""
+        self._flush_sessions(time.monotonic(), wait=True)
+
+    def flush_stale(self):
+        """Escribe las sesiones del LRU con cambios de hace más de FLUSH_INTERVAL segundos."""
+        self._flush_sessions(time.monotonic() - self._config()['FLUSH_INTERVAL'], wait=False)
+
+    def _flush_sessions(self, written_before, wait):
+        with self._guard:
+            keys = [key for key, session in self._sessions.items()
+                    if session.unsaved and session.last_flush <= written_before]
+        for key in keys:
+            lock = self._lock_for(key)
+            # flush_stale no espera: si se está jugando un turno, ese combate entra en la siguiente pasada
+            if not lock.acquire(blocking=wait):
+                continue
+            try:
+                with self._guard:
+                    session = self._sessions.get(key)
+                if session is not None and session.unsaved:
+                    self._flush(session)
+            finally:
+                lock.release()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(max(self._config()['FLUSH_INTERVAL'], 1))
+            try:
+                self.flush_stale()
+            except Exception:
+                logger.exception('No se pudieron escribir los combates en memoria')
+            finally:
+                # Conexiones propias de este hilo: no deben quedar abiertas entre pasadas
+                connections.close_all()
+
+    def start_background_flush(self):
+        """Arranca (una vez por proceso) el hilo que escribe los combates pendientes y el volcado al salir."""
+        with self._guard:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name='battle-sessions-flush', daemon=True)
+        atexit.register(self.flush_all)
+        self._flusher.start()
+
+    def release_player(self, player):
+        """Escribe y olvida los combates activos del jugador que estén en memoria."""
+        config = self._config()
+        player_id = getattr(player, 'pk', player)
+
+        if self._cache(config) is not None:
+            # Cada turno ya está escrito: basta con descartar las entradas
+            for battle_id in Battle.objects.filter(player_id=player_id, state='active').values_list('id', flat=True):
+                self._delete(str(battle_id), config)
+            return
+
+        with self._guard:
+            keys = [key for key, session in self._sessions.items() if session.battle.player_id == player_id]
+        for key in keys:
+            with self.lock(key):
+                with self._guard:
+                    session = self._sessions.pop(key, None)
+                if session is not None and session.unsaved:
+                    self._flush(session)
+
+    def discard(self, battle_id):
+        self._delete(str(battle_id), self._config())
+
+    def clear(self):
+        """Olvida todas las sesiones del LRU sin escribirlas."""
+        with self._guard:
+            self._sessions.clear()
+
+
+battle_sessions = BattleSessionStore()
+
+
+class ReleasesPlayerBattles:
+    """Para viewsets cuyas acciones leen o cambian el equipo: escriben antes los combates del jugador."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        player = getattr(request.user, 'player_profile', None)
+        if player is not None:
+            battle_sessions.release_player(player)
+
+
+def serialized_by_battle(view_method):
+    """Ejecuta la acción con el lock de su combate: dos peticiones al mismo combate no se pisan."""
+    @wraps(view_method)
+    def wrapper(viewset, request, pk=None, *args, **kwargs):
+        with battle_sessions.lock(pk):
+            return view_method(viewset, request, pk, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,74 @@
+import random
+
+from usuario.models.Battle import Battle
+from pokemon.engine import Combatant, MoveData, calculate_damage
+
+# Se usa si el rival no tiene movimientos; evita consultar Move en mitad del turno
+FALLBACK_MOVE = MoveData(None, 'Tackle', 'normal', 0)
+
+
+def load_active_battle(battle_id, user):
+    """Carga el combate con todo lo que necesita un turno: 1 consulta + 1 prefetch."""
+    return Battle.objects.select_related(
+        'player',
+        'player__current_location',
+        'player_pokemon__pokemon',
+        'wild_pokemon',
+    ).prefetch_related(
+        'player_pokemon__move_slots',
+    ).get(id=battle_id, player__user=user, state='active')
+
+
+def find_known_move(player_pokemon, move_id):
+    slot = player_pokemon.get_move_slot(move_id)
+    return slot.move if slot is not None else None
+
+
+def get_current_pp(player_pokemon, move):
+    slot = player_pokemon.get_move_slot(move.id)
+    return slot.current_pp if slot is not None else move.pp
+
+
+def spend_pp(player_pokemon, move):
+    """Gasta 1 PP en memoria; la sesión del combate escribe los huecos al hacer flush."""
+    slot = player_pokemon.get_move_slot(move.id)
+    if slot is None:
+        return 0
+    if slot.current_pp > 0:
+        slot.current_pp -= 1
+    return slot.current_pp
+
+
+def wild_counter_attack(battle, rng=random):
+    available_moves = battle.wild_moves
+    if not available_moves:
+        return 0, FALLBACK_MOVE
+
+    wild_move = rng.choice(available_moves)
+
+    damage = calculate_damage(
+        Combatant.from_species(battle.wild_pokemon, battle.wild_level, battle.wild_current_hp),
+        Combatant.from_player_pokemon(battle.player_pokemon),
+        MoveData.from_model(wild_move),
+        rng
+    )
+
+    return damage, wild_move
+
+
+def trainer_counter_attack(battle, rng=random):
+    current_pokemon = battle.current_opponent_pokemon
+    if not current_pokemon or not current_pokemon['moves']:
+        return 0, {'name': FALLBACK_MOVE.name, 'type': FALLBACK_MOVE.type}
+
+    move = rng.choice(current_pokemon['moves'])
+
+    damage = calculate_damage(
+        Combatant.from_dict(current_pokemon),
+        Combatant.from_player_pokemon(battle.player_pokemon),
+        MoveData.from_dict(move),
+        rng
+    )
+
+    return damage, move
+
@@ -0,0 +1,128 @@
+"""
+Experiencia y subida de niveles sin recorrer nivel a nivel.
+
+Con la curva Medium Fast (nivel n a partir de n³ de experiencia) el nivel final sale de
+una raíz cúbica entera, los stats de la tabla del registro y la cadena de evoluciones del
+índice de evoluciones, todo en memoria. Después se escribe una sola vez: un UPDATE (o un
+bulk_update para varios Pokémon) y un único registro en la Pokédex por jugador con todas
+las especies nuevas, incluidas las evoluciones intermedias.
+"""
+from usuario.models.PlayerPokemon import PlayerPokemon
+from usuario.services.pokedex_progress import register_pokemons
+from pokemon.services.game_data import get_game_data
+
+MAX_LEVEL = 100
+
+UPDATE_FIELDS = ('pokemon', 'nickname', 'level', 'experience', 'hp', 'current_hp', 'attack', 'defense',
+                 'special_attack', 'special_defense', 'speed')
+
+
+def experience_required(level):
+    if level <= 1:
+        return 0
+    return level ** 3  # Fórmula Medium Fast: n³
+
+
+def level_for_experience(experience, current_level=1):
+    """Nivel más alto alcanzado con esa experiencia; nunca baja del nivel actual."""
+    level = int(round(max(experience, 0) ** (1 / 3)))
+    # Corrige el redondeo de coma flotante de la raíz cúbica
+    while level ** 3 > experience:
+        level -= 1
+    while (level + 1) ** 3 <= experience:
+        level += 1
+    return max(current_level, min(MAX_LEVEL, level))
+
+
+class ExperienceResult:
+    __slots__ = ('player_pokemon', 'experience_gained', 'old_level', 'new_level', 'old_pokemon', 'evolutions')
+
+    def __init__(self, player_pokemon, experience_gained, old_level, old_pokemon):
+        self.player_pokemon = player_pokemon
+        self.experience_gained = experience_gained
+        self.old_level = old_level
+        self.new_level = old_level
+        self.old_pokemon = old_pokemon
+        self.evolutions = []
+
+    @property
+    def leveled_up(self):
+        return self.new_level > self.old_level
+
+    @property
+    def evolved(self):
+        return bool(self.evolutions)
+
+
+def apply_experience(player_pokemon, amount, game_data=None):
+    """Suma la experiencia y aplica niveles, stats y evoluciones en memoria, sin consultas."""
+    game_data = game_data or get_game_data()
+    species = game_data.pokemon(player_pokemon.pokemon_id)
+    if species is not None:
+        player_pokemon.pokemon = species
+    result = ExperienceResult(player_pokemon, amount, player_pokemon.level, player_pokemon.pokemon)
+
+    player_pokemon.experience += amount
+    result.new_level = level_for_experience(player_pokemon.experience, player_pokemon.level)
+    if not result.leveled_up:
+        return result
+
+    player_pokemon.level = result.new_level
+
+    evolution = game_data.evolution_for(player_pokemon.pokemon_id, result.new_level)
+    while evolution is not None and evolution not in result.evolutions:
+        result.evolutions.append(evolution)
+        evolution = game_data.evolution_for(evolution.id, result.new_level)
+
+    old_hp_percentage = player_pokemon.current_hp / player_pokemon.hp if player_pokemon.hp > 0 else 0
+
+    if result.evolved:
+        old_pokemon_name = player_pokemon.pokemon.name
+        player_pokemon.pokemon = result.evolutions[-1]
+        if not player_pokemon.nickname or player_pokemon.nickname == old_pokemon_name:
+            player_pokemon.nickname = None
+
+    player_pokemon.calculate_stats()
+
+    if result.evolved:
+        player_pokemon.current_hp = player_pokemon.hp
+    else:
+        player_pokemon.current_hp = int(player_pokemon.hp * old_hp_percentage)
+        if player_pokemon.current_hp <= 0 and player_pokemon.hp > 0:
+            player_pokemon.current_hp = 1
+
+    return result
+
+
+def award_experience(player_pokemon, amount):
+    """Un UPDATE y, si evoluciona, el registro de las nuevas especies en la Pokédex."""
+    result = apply_experience(player_pokemon, amount)
+    PlayerPokemon.objects.filter(pk=player_pokemon.pk).update(
+        **{field: getattr(player_pokemon, field) for field in UPDATE_FIELDS}
+    )
+    register_evolutions([result])
+    return result
+
+
+def award_experience_many(awards):
+    """awards: pares (PlayerPokemon, experiencia). Un bulk_update y un registro en la Pokédex por jugador."""
+    game_data = get_game_data()
+    results = [apply_experience(player_pokemon, amount, game_data) for player_pokemon, amount in awards]
+    if results:
+        PlayerPokemon.objects.bulk_update([result.player_pokemon for result in results], UPDATE_FIELDS)
+        register_evolutions(results)
+    return results
+
+
+def award_team_experience(player, amount):
+    """La misma experiencia a todo el equipo: consultas constantes sin importar el tamaño."""
+    team = PlayerPokemon.objects.filter(player=player, in_team=True).order_by('order')
+    return award_experience_many([(player_pokemon, amount) for player_pokemon in team])
+
+
+def register_evolutions(results):
+    evolutions = {}
+    for result in results:
+        evolutions.setdefault(result.player_pokemon.player_id, []).extend(result.evolutions)
+    for player_id, pokemons in evolutions.items():
+        register_pokemons(player_id, pokemons, 'caught')
@@ -0,0 +1,38 @@
+"""
+Curación de equipos (Centro Pokémon, derrotas, mantenimiento).
+
+PS y PP se restauran con dos UPDATE por conjunto, sin leer los Pokémon: current_hp toma
+el valor de hp y current_pp el PP máximo del movimiento de cada hueco. Sirve igual para
+un jugador que para varios o para todos.
+"""
+from django.db.models import F, OuterRef, Subquery
+
+from pokemon.models.Move import Move
+from usuario.models.PlayerPokemon import PlayerPokemon
+from usuario.models.PlayerPokemonMove import PlayerPokemonMove
+
+
+def heal_pokemons(pokemons):
+    """Cura un queryset de PlayerPokemon; devuelve cuántos había."""
+    healed = pokemons.update(current_hp=F('hp'))
+    PlayerPokemonMove.objects.filter(player_pokemon__in=pokemons.values('pk')).update(
+        current_pp=Subquery(Move.objects.filter(pk=OuterRef('move_id')).values('pp')[:1])
+    )
+    return healed
+
+
+def heal_players(players=None, include_boxes=False):
+    """
+    Cura el equipo (y con include_boxes también la reserva) de los jugadores dados
+    (instancias o ids); con players=None, el de todos los jugadores.
+    """
+    pokemons = PlayerPokemon.objects.all()
+    if players is not None:
+        pokemons = pokemons.filter(player_id__in=[getattr(player, 'pk', player) for player in players])
+    if not include_boxes:
+        pokemons = pokemons.filter(in_team=True)
+    return heal_pokemons(pokemons)
+
+
+def heal_team(player, include_boxes=False):
+    return heal_players([player], include_boxes)
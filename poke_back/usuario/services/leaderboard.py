@@ -0,0 +1,370 @@
+"""
+Clasificación PvP.
+
+El top N sale de una consulta sobre el índice users_rating_idx (con el perfil y el número
+de Pokémon en la misma consulta) y se guarda en LEADERBOARD['CACHE_ALIAS']. Se descarta en
+cuanto cambia el rating de un usuario y, como mucho, a los TOP_TIMEOUT segundos.
+
+La posición de un usuario y sus vecinos salen de un índice en memoria ordenado por
+(-rating, username, id): un árbol de Fenwick con los usuarios por rating da la posición en
+O(log R) (R es el rango de ratings, no el número de usuarios) y cada rating guarda sus
+usuarios ordenados por nombre. La señal post_save de User lo actualiza tocando solo el
+rating viejo y el nuevo.
+
+El índice se carga completo en un hilo de fondo (start_background_refresh, que arrancan
+wsgi.py y asgi.py) y se vuelve a cargar cada REFRESH_INTERVAL segundos para recoger los
+cambios de otros procesos y las transacciones revertidas; el nuevo índice sustituye al
+anterior de golpe, con los cambios que llegaron mientras se cargaba. Ninguna petición
+carga el índice: hasta que esté listo (o en procesos sin el hilo, como los comandos) las
+posiciones se consultan en la base de datos sobre el mismo users_rating_idx.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.db.models import Count, Q
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',  # None: el top no se guarda y se consulta siempre
+    'TOP_SIZE': 50,
+    'TOP_TIMEOUT': 60,  # segundos; recoge cambios que no pasan por el rating (Pokémon, inicial)
+    'REFRESH_INTERVAL': 60,  # segundos entre recargas (en segundo plano) del índice de posiciones
+}
+
+TOP_KEY = 'leaderboard:top'
+
+# Holgura del árbol por encima y por debajo de los ratings cargados; fuera de ella se rehace
+RATING_MARGIN = 1000
+
+
+class RatingCounts:
+    """Árbol de Fenwick con el número de usuarios de cada rating entre low y high."""
+
+    def __init__(self, counts, low, high):
+        self.low = low
+        self.size = high - low + 1
+        self.tree = [0] * (self.size + 1)
+        for rating, count in counts.items():
+            self.add(rating, count)
+
+    def covers(self, rating):
+        return self.low <= rating < self.low + self.size
+
+    def add(self, rating, delta):
+        i = rating - self.low + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def at_most(self, rating):
+        """Usuarios con rating <= rating (vale también fuera de [low, high])."""
+        i = min(rating - self.low + 1, self.size)
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+class RatingIndex:
+    """Usuarios ordenados de mayor a menor rating (desempate por nombre, como el ranking)."""
+
+    def __init__(self, rows=()):
+        self.key_by_user = {}
+        self.buckets = {}
+        for user_id, username, rating in rows:
+            self.key_by_user[user_id] = (rating, username)
+            self.buckets.setdefault(rating, []).append((username, user_id))
+        for bucket in self.buckets.values():
+            bucket.sort()
+        self.ratings = sorted(self.buckets)
+        self._build_counts()
+
+    def __len__(self):
+        return len(self.key_by_user)
+
+    def _build_counts(self, extra_rating=None):
+        ratings = self.ratings if extra_rating is None else self.ratings + [extra_rating]
+        low, high = min(ratings, default=0), max(ratings, default=0)
+        # La holgura crece con el rango: rehacer el árbol sale amortizado
+        margin = max(RATING_MARGIN, high - low)
+        self.counts = RatingCounts(
+            {rating: len(bucket) for rating, bucket in self.buckets.items()}, low - margin, high + margin
+        )
+
+    def _add(self, user_id, username, rating):
+        if not self.counts.covers(rating):
+            self._build_counts(rating)
+        bucket = self.buckets.get(rating)
+        if bucket is None:
+            bucket = self.buckets[rating] = []
+            insort(self.ratings, rating)
+        insort(bucket, (username, user_id))
+        self.counts.add(rating, 1)
+        self.key_by_user[user_id] = (rating, username)
+
+    def remove(self, user_id):
+        key = self.key_by_user.pop(user_id, None)
+        if key is None:
+            return
+        rating, username = key
+        bucket = self.buckets[rating]
+        del bucket[bisect_left(bucket, (username, user_id))]
+        if not bucket:
+            del self.buckets[rating]
+            del self.ratings[bisect_left(self.ratings, rating)]
+        self.counts.add(rating, -1)
+
+    def update(self, user_id, username, rating):
+        if self.key_by_user.get(user_id) == (rating, username):
+            return
+        self.remove(user_id)
+        self._add(user_id, username, rating)
+
+    def rank(self, rating):
+        """Posición de un rating: usuarios con más rating + 1 (los empates la comparten)."""
+        return len(self) - self.counts.at_most(rating) + 1
+
+    def index_of(self, user_id):
+        key = self.key_by_user.get(user_id)
+        if key is None:
+            return None
+        rating, username = key
+        return self.rank(rating) - 1 + bisect_left(self.buckets[rating], (username, user_id))
+
+    def around(self, user_id, before=2, after=2):
+        """(índice del primero, ids) de los usuarios alrededor de user_id en el ranking."""
+        index = self.index_of(user_id)
+        if index is None:
+            return 0, []
+        rating, username = self.key_by_user[user_id]
+        bucket = self.buckets[rating]
+        position = bisect_left(bucket, (username, user_id))
+
+        # Hacia arriba: el principio del propio rating y luego los ratings mayores, del más cercano
+        above = [key[1] for key in reversed(bucket[max(0, position - before):position])]
+        i = bisect_right(self.ratings, rating)
+        while len(above) < before and i < len(self.ratings):
+            higher = self.buckets[self.ratings[i]]
+            above.extend(key[1] for key in reversed(higher[-(before - len(above)):]))
+            i += 1
+
+        # Hacia abajo (incluido el propio usuario): el resto del rating y luego los menores
+        below = [key[1] for key in bucket[position:position + after + 1]]
+        i = bisect_left(self.ratings, rating) - 1
+        while len(below) < after + 1 and i >= 0:
+            lower = self.buckets[self.ratings[i]]
+            below.extend(key[1] for key in lower[:after + 1 - len(below)])
+            i -= 1
+
+        return index - len(above), above[::-1] + below
+
+
+def win_rate(user):
+    total_battles = user.battles_won + user.battles_lost
+    return round((user.battles_won / total_battles * 100), 2) if total_battles > 0 else 0
+
+
+def player_summary(user, position):
+    return {
+        'position': position,
+        'username': user.username,
+        'pvp_rating': user.pvp_rating,
+        'battles_won': user.battles_won,
+        'battles_lost': user.battles_lost,
+        'win_rate': win_rate(user),
+    }
+
+
+def load_top(size):
+    from usuario.models.User import User
+
+    top_users = (User.objects.select_related('player_profile')
+                 .annotate(pokemon_count=Count('player_profile__pokemons'))
+                 .order_by('-pvp_rating', 'username')[:size])
+
+    entries = []
+    for position, user in enumerate(top_users, 1):
+        try:
+            player_info = user.player_profile
+        except User.player_profile.RelatedObjectDoesNotExist:
+            continue
+
+        entry = player_summary(user, position)
+        entry.update({
+            'total_battles': user.battles_won + user.battles_lost,
+            'pokemon_count': user.pokemon_count,
+            'starter_chosen': player_info.starter_chosen
+        })
+        entries.append(entry)
+    return entries
+
+
+def load_around(user, before=2, after=2):
+    """Como RatingIndex.around, en la base de datos (3 consultas sobre users_rating_idx)."""
+    from usuario.models.User import User
+
+    higher = Q(pvp_rating__gt=user.pvp_rating) | Q(pvp_rating=user.pvp_rating, username__lt=user.username)
+    index = User.objects.filter(higher).count()
+    above = list(User.objects.filter(higher).order_by('pvp_rating', '-username')
+                 .values_list('id', flat=True)[:before])
+    below = list(User.objects.exclude(higher).order_by('-pvp_rating', 'username')
+                 .values_list('id', flat=True)[:after + 1])
+    return index - len(above), above[::-1] + below
+
+
+class Leaderboard:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._pending = None  # cambios recibidos mientras se carga un índice nuevo
+        self._refresher = None
+
+    def _config(self):
+        config = dict(DEFAULTS)
+        config.update(getattr(settings, 'LEADERBOARD', {}))
+        return config
+
+    def _cache(self, config):
+        alias = config['CACHE_ALIAS']
+        return caches[alias] if alias else None
+
+    def index(self):
+        """Índice cargado, o None si aún no hay ninguno."""
+        return self._index
+
+    def rebuild(self):
+        """Carga el índice completo y lo pone en lugar del anterior."""
+        from usuario.models.User import User
+
+        with self._lock:
+            self._pending = []
+        try:
+            index = RatingIndex(User.objects.values_list('id', 'username', 'pvp_rating').iterator(chunk_size=10000))
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for user_id, username, rating in self._pending:
+                if rating is None:
+                    index.remove(user_id)
+                else:
+                    index.update(user_id, username, rating)
+            self._pending = None
+            self._index = index
+        return index
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.rebuild()
+            except Exception:
+                logger.exception('No se pudo recargar el índice de la clasificación')
+            finally:
+                # Conexiones propias de este hilo: no deben quedar abiertas entre recargas
+                connections.close_all()
+            time.sleep(self._config()['REFRESH_INTERVAL'])
+
+    def start_background_refresh(self):
+        """Arranca (una vez por proceso) el hilo que carga y recarga el índice."""
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, name='leaderboard-refresh', daemon=True)
+        self._refresher.start()
+
+    def rank(self, rating):
+        index = self._index
+        if index is None:
+            from usuario.models.User import User
+            return User.objects.filter(pvp_rating__gt=rating).count() + 1
+        return index.rank(rating)
+
+    def around(self, user, before=2, after=2):
+        index = self._index
+        if index is None:
+            return load_around(user, before, after)
+        if index.index_of(user.pk) is None:
+            # Usuario creado en otro proceso después de la última carga: una lectura no toca el
+            # índice ni el top; lo añade la señal de su proceso o la siguiente recarga
+            return load_around(user, before, after)
+        return index.around(user.pk, before, after)
+
+    def total(self):
+        index = self._index
+        if index is None:
+            from usuario.models.User import User
+            return User.objects.count()
+        return len(index)
+
+    def top(self):
+        config = self._config()
+        cache = self._cache(config)
+        entries = cache.get(TOP_KEY) if cache is not None else None
+        if entries is None:
+            entries = load_top(config['TOP_SIZE'])
+            if cache is not None:
+                cache.set(TOP_KEY, entries, timeout=config['TOP_TIMEOUT'])
+        return entries
+
+    def _apply(self, user_id, username, rating):
+        with self._lock:
+            if self._index is not None:
+                if rating is None:
+                    self._index.remove(user_id)
+                else:
+                    self._index.update(user_id, username, rating)
+            if self._pending is not None:
+                self._pending.append((user_id, username, rating))
+
+    def record(self, user):
+        """Actualiza la posición de un usuario en el índice cargado y descarta el top."""
+        self._apply(user.pk, user.username, user.pvp_rating)
+        self.invalidate_top()
+
+    def forget(self, user_id):
+        self._apply(user_id, None, None)
+        self.invalidate_top()
+
+    def invalidate_top(self):
+        cache = self._cache(self._config())
+        if cache is not None:
+            cache.delete(TOP_KEY)
+
+    def clear(self):
+        with self._lock:
+            self._index = None
+        self.invalidate_top()
+
+
+leaderboard = Leaderboard()
+
+
+def record_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'pvp_rating', 'username'} & set(update_fields):
+        return
+    leaderboard.record(instance)
+    if transaction.get_connection().in_atomic_block:
+        # Otro proceso pudo rehacer el top sin ver aún la transacción en curso
+        transaction.on_commit(leaderboard.invalidate_top)
+
+
+def forget_on_delete(sender, instance, **kwargs):
+    leaderboard.forget(instance.pk)
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_save
+
+    from usuario.models.User import User
+
+    post_save.connect(record_on_save, sender=User, dispatch_uid='leaderboard-record')
+    post_delete.connect(forget_on_delete, sender=User, dispatch_uid='leaderboard-forget')
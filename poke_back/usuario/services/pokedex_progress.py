@@ -0,0 +1,74 @@
+"""
+Registro en la Pokédex a través de los bits de PokedexProgress.
+
+Si todas las especies ya estaban marcadas basta con leer la fila de progreso. Si no, los
+bits y contadores se guardan con una única escritura (el INSERT de la fila o un UPDATE
+versionado; se reintenta si otra petición se adelantó) y solo las especies nuevas se
+añaden al historial de Pokedex. Las lecturas de estadísticas usan los contadores y no
+cuentan filas.
+"""
+from django.db import IntegrityError, transaction
+
+from usuario.models.Pokedex import Pokedex
+from usuario.models.PokedexProgress import PokedexProgress, StalePokedexError
+
+TOTAL_POKEMON = 151
+MAX_RETRIES = 5
+
+
+def register_pokemons(player, pokemons, state='seen'):
+    """
+    Marca especies (instancias de Pokemon) como vistas o capturadas para un jugador
+    (instancia o id). Devuelve las especies cuyo estado cambió.
+    """
+    player_id = getattr(player, 'pk', player)
+    by_pokedex_id = {pokemon.pokedex_id: pokemon for pokemon in pokemons}
+    if not by_pokedex_id:
+        return []
+    caught = state == 'caught'
+
+    for _ in range(MAX_RETRIES):
+        progress = PokedexProgress.objects.filter(player_id=player_id).first()
+        created = progress is None
+        if created:
+            progress = PokedexProgress(player_id=player_id)
+
+        changed = progress.register(by_pokedex_id, caught)
+        if not changed:
+            return []
+
+        new_pokemons = [by_pokedex_id[pokedex_id] for pokedex_id in sorted(changed)]
+        try:
+            with transaction.atomic():
+                if created:
+                    progress.save(force_insert=True)
+                else:
+                    progress.save_versioned()
+                write_history(player_id, new_pokemons, caught)
+        except (StalePokedexError, IntegrityError):
+            # Otra petición creó o actualizó la fila: se vuelve a leer y a aplicar
+            continue
+        return new_pokemons
+
+    raise StalePokedexError(f'No se pudo actualizar la Pokédex del jugador {player_id}')
+
+
+def write_history(player_id, pokemons, caught):
+    entries = [Pokedex(player_id=player_id, pokemon=pokemon, state='caught' if caught else 'seen')
+               for pokemon in pokemons]
+    if caught:
+        Pokedex.objects.bulk_create(entries, update_conflicts=True, unique_fields=['player', 'pokemon'],
+                                    update_fields=['state'])
+    else:
+        Pokedex.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def pokedex_stats(player):
+    seen, caught = PokedexProgress.objects.filter(player=player).values_list(
+        'seen_count', 'caught_count').first() or (0, 0)
+    return {
+        'total_pokemon': TOTAL_POKEMON,
+        'seen': seen,
+        'caught': caught,
+        'completion_percentage': round((caught / TOTAL_POKEMON) * 100, 2)
+    }
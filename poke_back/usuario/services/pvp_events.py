@@ -0,0 +1,112 @@
+"""
+Canal de eventos PvP en memoria.
+
+Cada conexión a pvp-battles/{id}/events/ se suscribe a su batalla y recibe un evento
+cada vez que se resuelve una acción. El broker vive en el proceso: sirve para
+runserver o un único worker; con varios workers haría falta un canal compartido.
+
+Bajo WSGI cada stream abierto ocupa un hilo del servidor mientras dure la batalla, así que
+PVP_EVENTS['MAX_STREAMS'] debe quedar por debajo de los hilos del proceso (p. ej. gunicorn
+--worker-class gthread --threads) dejando sitio para las peticiones normales. Pasado el
+límite el stream responde 503 y el cliente vuelve al polling de /state.
+
+EventSource no permite cabeceras, así que el stream no se autentica con el token de la API
+en la URL (acabaría en logs e historial) sino con un ticket firmado que solo vale para una
+batalla y STREAM_TICKET_MAX_AGE segundos.
+"""
+import json
+import queue
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+
+DEFAULTS = {
+    'MAX_STREAMS': 64,  # streams abiertos a la vez por proceso
+}
+
+# Eventos pendientes por suscriptor; si un cliente no lee, pierde eventos y se resincroniza con /state
+MAX_PENDING_EVENTS = 50
+
+STREAM_TICKET_MAX_AGE = 60  # segundos para abrir el stream con el ticket
+STREAM_TICKET_SALT = 'usuario.pvp-battle-stream'
+
+
+def pvp_events_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'PVP_EVENTS', {}))
+    return config
+
+
+def stream_ticket(user, battle_id):
+    return signing.TimestampSigner(salt=STREAM_TICKET_SALT).sign(f'{user.pk}:{battle_id}')
+
+
+def read_stream_ticket(ticket, battle_id):
+    """id del usuario del ticket; None si está caducado, manipulado o es de otra batalla."""
+    try:
+        value = signing.TimestampSigner(salt=STREAM_TICKET_SALT).unsign(ticket, max_age=STREAM_TICKET_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    user_id, ticket_battle_id = value.split(':')
+    return int(user_id) if ticket_battle_id == str(battle_id) else None
+
+
+class PvPEvent:
+    __slots__ = ('name', 'battle', 'message')
+
+    def __init__(self, name, battle, message=''):
+        self.name = name
+        self.battle = battle
+        self.message = message
+
+
+class PvPEventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._count = 0
+
+    def subscribe(self, battle_id, max_streams=None):
+        """Cola de eventos de la batalla; None si el proceso ya tiene max_streams abiertos."""
+        subscription = queue.Queue(maxsize=MAX_PENDING_EVENTS)
+        with self._lock:
+            if max_streams is not None and self._count >= max_streams:
+                return None
+            self._subscribers[int(battle_id)].add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, battle_id, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(int(battle_id))
+            if subscribers is None:
+                return
+            if subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+            if not subscribers:
+                del self._subscribers[int(battle_id)]
+
+    def subscriber_count(self, battle_id):
+        with self._lock:
+            return len(self._subscribers.get(int(battle_id), ()))
+
+    def publish(self, battle_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(int(battle_id), ()))
+
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                pass
+
+
+pvp_events = PvPEventBroker()
+
+
+def encode_event(name, data):
+    """Formato text/event-stream: una línea event y una línea data con JSON."""
+    return f'event: {name}\ndata: {json.dumps(data, default=str)}\n\n'
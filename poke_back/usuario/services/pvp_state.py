@@ -0,0 +1,154 @@
+"""
+Estado PvP por versiones.
+
+Dentro de una batalla solo cambian PS, PP, Pokémon activo, turno, estado y ganador;
+el resto (stats, movimientos, sprites) es fijo. Por cada versión de la batalla se guarda
+esa parte dinámica y, si el cliente dice qué versión tiene, se le envían solo los cambios.
+Si su versión ya no está en el historial se le manda el estado completo.
+"""
+import threading
+from collections import OrderedDict
+
+# Versiones que se guardan por batalla; una diferencia mayor recibe el estado completo
+MAX_DELTA_GAP = 10
+MAX_BATTLES = 1000
+
+
+def team_vitals(team):
+    return tuple(
+        (pokemon['current_hp'], tuple(move.get('current_pp') for move in pokemon.get('moves', ())))
+        for pokemon in team
+    )
+
+
+def dynamic_snapshot(battle):
+    return {
+        'state': battle.state,
+        'current_turn_id': battle.current_turn_id,
+        'winner_id': battle.winner_id,
+        'current_pokemon': (battle.player1_current_pokemon, battle.player2_current_pokemon),
+        'teams': (team_vitals(battle.player1_team), team_vitals(battle.player2_team)),
+    }
+
+
+def diff_team(old_team, new_team):
+    """Cambios de PS/PP de un equipo; None si el equipo cambió de forma (p. ej. aún no existía)."""
+    if len(old_team) != len(new_team):
+        return None
+
+    changes = []
+    for index, ((old_hp, old_pp), (new_hp, new_pp)) in enumerate(zip(old_team, new_team)):
+        if len(old_pp) != len(new_pp):
+            return None
+
+        change = {}
+        if old_hp != new_hp:
+            change['current_hp'] = new_hp
+        move_changes = [
+            {'index': move_index, 'current_pp': pp}
+            for move_index, (old, pp) in enumerate(zip(old_pp, new_pp))
+            if old != pp
+        ]
+        if move_changes:
+            change['moves'] = move_changes
+        if change:
+            change['index'] = index
+            changes.append(change)
+    return changes
+
+
+def diff_snapshots(old, new, battle, side):
+    """Cambios entre dos versiones vistos por el jugador side (0 = player1, 1 = player2)."""
+    other = 1 - side
+    changes = {}
+
+    if old['state'] != new['state']:
+        changes['state'] = new['state']
+    if old['current_turn_id'] != new['current_turn_id']:
+        player = battle.player1 if side == 0 else battle.player2
+        changes['your_turn'] = battle.current_turn_id is not None and battle.current_turn_id == player.id
+        changes['current_turn_username'] = battle.current_turn.user.username if battle.current_turn else None
+    if old['winner_id'] != new['winner_id']:
+        changes['winner_username'] = battle.winner.user.username if battle.winner else None
+    if old['current_pokemon'][side] != new['current_pokemon'][side]:
+        changes['your_current_pokemon_index'] = new['current_pokemon'][side]
+    if old['current_pokemon'][other] != new['current_pokemon'][other]:
+        changes['opponent_current_pokemon_index'] = new['current_pokemon'][other]
+
+    for key, index in (('your_team', side), ('opponent_team', other)):
+        team_changes = diff_team(old['teams'][index], new['teams'][index])
+        if team_changes is None:
+            return None
+        if team_changes:
+            changes[key] = team_changes
+
+    return changes
+
+
+class PvPStateHistory:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._battles = OrderedDict()
+
+    def record(self, battle_id, version, snapshot):
+        with self._lock:
+            versions = self._battles.get(battle_id)
+            if versions is None:
+                versions = self._battles[battle_id] = OrderedDict()
+            self._battles.move_to_end(battle_id)
+
+            versions[version] = snapshot
+            while len(versions) > MAX_DELTA_GAP + 1:
+                versions.popitem(last=False)
+            while len(self._battles) > MAX_BATTLES:
+                self._battles.popitem(last=False)
+
+    def get(self, battle_id, version):
+        with self._lock:
+            versions = self._battles.get(battle_id)
+            return versions.get(version) if versions else None
+
+    def clear(self):
+        with self._lock:
+            self._battles.clear()
+
+
+pvp_state_history = PvPStateHistory()
+
+
+def parse_version(value):
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def state_delta(battle, side, since):
+    """Delta desde la versión since, o None si hay que mandar el estado completo."""
+    if battle.id is None:
+        return None
+
+    snapshot = dynamic_snapshot(battle)
+    pvp_state_history.record(battle.id, battle.version, snapshot)
+
+    since = parse_version(since)
+    if since is None or since > battle.version or battle.version - since > MAX_DELTA_GAP:
+        return None
+
+    base = pvp_state_history.get(battle.id, since)
+    if base is None:
+        return None
+
+    changes = diff_snapshots(base, snapshot, battle, side)
+    if changes is None:
+        return None
+
+    return {
+        'battle_id': battle.id,
+        'version': battle.version,
+        'since': since,
+        'delta': True,
+        'changes': changes,
+    }
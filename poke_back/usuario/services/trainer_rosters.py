@@ -0,0 +1,228 @@
+"""
+Plantillas de entrenadores por ruta: aleatorios por categoría y los guardados en Trainer.
+
+Para cada ruta y categoría se genera una vez, a partir del registro de game_data, un
+conjunto de ROSTER_SIZE entrenadores completos (nombre, diálogo, recompensa y equipo con
+stats, los 4 últimos movimientos aprendidos y sprites). El equipo se guarda ya serializado
+en JSON, así que empezar un combate contra un entrenador queda en sortear una plantilla y
+hacer un único INSERT en battles.
+
+Los entrenadores guardados (modelo Trainer) de una ubicación tienen prioridad: cada uno se
+genera con TEAMS_PER_TRAINER semillas fijas, así que el mismo entrenador con la misma
+semilla lleva siempre el mismo equipo.
+
+Todo se descarta con el registro: cambia con los datos del juego, al guardar o borrar un
+Trainer y con el comando refresh_trainer_rosters, que invalida el registro en todos los
+procesos.
+"""
+import json
+import random
+
+# Entrenadores aleatorios de las rutas (también los usa el comando simulate_battles)
+TRAINER_TYPES = ('beginner', 'intermediate', 'advanced', 'gym_leader')
+TRAINER_TYPE_WEIGHTS = (0.4, 0.3, 0.2, 0.1)
+TRAINER_TEAM_SIZES = {
+    'beginner': (1, 2),
+    'intermediate': (2, 3),
+    'advanced': (3, 4),
+    'gym_leader': (5, 6),
+}
+TRAINER_LEVELS = {
+    'beginner': (3, 7),
+    'intermediate': (8, 15),
+    'advanced': (16, 25),
+    'gym_leader': (26, 40),
+}
+
+TRAINER_NAMES = {
+    'beginner': ['Alex', 'Sofía', 'Leo', 'Emma', 'Luis', 'Ana'],
+    'intermediate': ['Entrenador Marcos', 'Entrenadora Carla', 'Rival Diego', 'Rival Elena'],
+    'advanced': ['Maestro Koga', 'Maestro Bruno', 'Líder Blanca', 'Líder Rojo'],
+    'gym_leader': ['Líder Brock', 'Líder Misty', 'Líder Lt. Surge', 'Líder Erika'],
+}
+
+TRAINER_SPRITES = {
+    'beginner': 'https://example.com/trainer_beginner.png',
+    'intermediate': 'https://example.com/trainer_intermediate.png',
+    'advanced': 'https://example.com/trainer_advanced.png',
+    'gym_leader': 'https://example.com/trainer_gym_leader.png',
+}
+
+TRAINER_DIALOGUES = {
+    'beginner': "¡Hola! Soy {name}, un entrenador principiante. ¡Prepárate para luchar!",
+    'intermediate': "Soy {name}. Mi equipo está bien entrenado. ¡No será fácil!",
+    'advanced': "Yo, {name}, te mostraré la fuerza de un entrenador experimentado.",
+    'gym_leader': "¡Soy {name}! Para pasar, tendrás que derrotar a mi poderoso equipo.",
+}
+
+TRAINER_BASE_REWARD = {
+    'beginner': 50,
+    'intermediate': 100,
+    'advanced': 200,
+    'gym_leader': 500,
+}
+
+MAX_TRAINER_MOVES = 4
+ROSTER_SIZE = 32
+TEAMS_PER_TRAINER = 8  # semillas 0..7 por cada Trainer guardado
+
+
+def move_data(move):
+    return {
+        'id': move.id,
+        'name': move.name,
+        'type': move.type,
+        'power': move.power,
+        'accuracy': move.accuracy,
+        'pp': move.pp,
+        'damage_class': move.damage_class,
+        'current_pp': move.pp
+    }
+
+
+def member_data(game_data, pokemon, level):
+    """Un Pokémon del equipo tal y como se guarda en Battle.trainer_team."""
+    hp, attack, defense, special_attack, special_defense, speed = game_data.stats(pokemon, level)
+    learned_moves = game_data.moves_learned_up_to(pokemon.id, level)[::-1][:MAX_TRAINER_MOVES]
+
+    return {
+        'pokemon_id': pokemon.id,
+        'pokemon_name': pokemon.name,
+        'level': level,
+        'current_hp': hp,
+        'max_hp': hp,
+        'attack': attack,
+        'defense': defense,
+        'special_attack': special_attack,
+        'special_defense': special_defense,
+        'speed': speed,
+        'type1': pokemon.type1,
+        'type2': pokemon.type2,
+        'sprite_front': pokemon.sprite_front,
+        'sprite_back': pokemon.sprite_back,
+        'moves': [move_data(pokemon_move.move) for pokemon_move in learned_moves]
+    }
+
+
+class TrainerTemplate:
+    __slots__ = ('trainer_type', 'name', 'sprite', 'dialogue', 'money_reward', 'team_size', 'team_json')
+
+    def __init__(self, trainer_type, name, sprite, dialogue, money_reward, team):
+        self.trainer_type = trainer_type
+        self.name = name
+        self.sprite = sprite
+        self.dialogue = dialogue
+        self.money_reward = money_reward
+        self.team_size = len(team)
+        self.team_json = json.dumps(team, separators=(',', ':'))
+
+    @classmethod
+    def generated(cls, trainer_type, name, team):
+        """Entrenador aleatorio: sprite, diálogo y recompensa salen de su categoría."""
+        return cls(trainer_type, name, TRAINER_SPRITES[trainer_type],
+                   TRAINER_DIALOGUES[trainer_type].format(name=name),
+                   TRAINER_BASE_REWARD[trainer_type] * len(team), team)
+
+    def team(self):
+        """Copia nueva del equipo: el combate modifica los PS y PP."""
+        return json.loads(self.team_json)
+
+
+class TrainerRoster:
+    """Entrenadores ya generados de una categoría en una ruta."""
+
+    def __init__(self, sampler, game_data, trainer_type, size=ROSTER_SIZE, rng=random):
+        self.sampler = sampler
+        self.trainer_type = trainer_type
+        self._members = {}
+        self.templates = tuple(self._build(game_data, rng) for _ in range(size)) if sampler else ()
+
+    def __bool__(self):
+        return bool(self.templates)
+
+    def _member(self, game_data, pokemon, level):
+        key = (pokemon.id, level)
+        if key not in self._members:
+            self._members[key] = member_data(game_data, pokemon, level)
+        return self._members[key]
+
+    def _build(self, game_data, rng):
+        min_size, max_size = TRAINER_TEAM_SIZES[self.trainer_type]
+        min_level, max_level = TRAINER_LEVELS[self.trainer_type]
+
+        team = []
+        used_pokemon_ids = set()
+        for _ in range(rng.randint(min_size, max_size)):
+            encounter = self.sampler.sample(rng)
+
+            if encounter.pokemon_id in used_pokemon_ids:
+                available_encounters = self.sampler.excluding(used_pokemon_ids)
+                if available_encounters:
+                    encounter = available_encounters.sample(rng)
+
+            used_pokemon_ids.add(encounter.pokemon_id)
+            team.append(self._member(game_data, encounter.pokemon, rng.randint(min_level, max_level)))
+
+        return TrainerTemplate.generated(self.trainer_type, rng.choice(TRAINER_NAMES[self.trainer_type]), team)
+
+    def sample(self, rng=random):
+        return rng.choice(self.templates) if self.templates else None
+
+
+def trainer_roster(location_id, trainer_type, game_data=None):
+    from pokemon.services.game_data import get_game_data
+
+    game_data = game_data or get_game_data()
+    return game_data.derived(
+        ('trainer_roster', location_id, trainer_type),
+        lambda: TrainerRoster(game_data.encounter_sampler(location_id), game_data, trainer_type)
+    )
+
+
+class LocationTrainers:
+    """Equipos ya generados de los entrenadores guardados (modelo Trainer) de una ubicación."""
+
+    def __init__(self, trainers, game_data, teams_per_trainer=TEAMS_PER_TRAINER):
+        templates = (trainer.template(seed, game_data) for trainer in trainers for seed in range(teams_per_trainer))
+        self.templates = tuple(template for template in templates if template.team_size)
+
+    def __bool__(self):
+        return bool(self.templates)
+
+    def sample(self, rng=random):
+        return rng.choice(self.templates) if self.templates else None
+
+
+def location_trainers(location_id, game_data=None):
+    from pokemon.services.game_data import get_game_data
+    from usuario.models.Trainer import Trainer
+
+    game_data = game_data or get_game_data()
+    return game_data.derived(
+        ('location_trainers', location_id),
+        lambda: LocationTrainers(Trainer.objects.filter(location_id=location_id).order_by('id'), game_data)
+    )
+
+
+def pick_trainer(location_id, rng=random):
+    """
+    Un entrenador guardado de la ubicación si los hay; si no, sortea la categoría por peso y
+    una plantilla aleatoria de esa categoría. None si la ruta no tiene Pokémon.
+    """
+    trainers = location_trainers(location_id)
+    if trainers:
+        return trainers.sample(rng)
+
+    trainer_type = rng.choices(TRAINER_TYPES, weights=TRAINER_TYPE_WEIGHTS)[0]
+    return trainer_roster(location_id, trainer_type).sample(rng)
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_save
+
+    from pokemon.services.game_data import invalidate_on_change
+    from usuario.models.Trainer import Trainer
+
+    # Los equipos de los entrenadores guardados se descartan con el registro
+    post_save.connect(invalidate_on_change, sender=Trainer, dispatch_uid='trainer-rosters-save')
+    post_delete.connect(invalidate_on_change, sender=Trainer, dispatch_uid='trainer-rosters-delete')
@@ -0,0 +1,35 @@
+"""
+Creación de combates salvajes a partir de las plantillas de pokemon.services.wild_pools.
+
+new_wild_battle no toca la base de datos; start_wild_battles crea varios combates con un
+solo bulk_create (simulaciones, pruebas de carga).
+"""
+from usuario.models.Battle import Battle
+from usuario.services.pokedex_progress import register_pokemons
+
+
+def new_wild_battle(player, player_pokemon, template):
+    return Battle(
+        battle_type='wild',
+        player=player,
+        player_pokemon=player_pokemon,
+        wild_pokemon=template.pokemon,
+        wild_level=template.level,
+        wild_current_hp=template.hp,
+        wild_max_hp=template.hp,
+        wild_move_ids=list(template.move_ids),
+        state='active',
+        turn=0
+    )
+
+
+def start_wild_battles(player, player_pokemon, templates):
+    battles = [new_wild_battle(player, player_pokemon, template) for template in templates]
+    Battle.objects.bulk_create(battles)
+    register_seen(player, {template.pokemon for template in templates})
+    return battles
+
+
+def register_seen(player, pokemons):
+    """Marca como vistos en la Pokédex; las especies ya registradas solo cuestan la lectura de los bits."""
+    register_pokemons(player, pokemons)
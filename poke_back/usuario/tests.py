@@ -1,3 +1,1152 @@
-from django.test import TestCase
+import json
+import random
+import threading
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from pokemon.models.Location import Location
+from pokemon.models.Move import Move
+from pokemon.engine import calculate_hp
+from pokemon.models.Pokemon import Pokemon
+from pokemon.models.PokemonMove import PokemonMove
+from pokemon.models.WildPokemonEncounter import WildPokemonEncounter
+from pokemon.services.game_data import get_game_data
+from pokemon.services.pokedex_catalog import catalog_entry
+from pokemon.services.wild_pools import wild_encounter_pool
+from pokemon.models.ShopItem import ShopItem
+from usuario.models.Bag import Bag
+from usuario.models.Battle import Battle, StaleBattleError
+from usuario.models.Player import Player
+from usuario.models.PlayerPokemon import PlayerPokemon
+from usuario.models.PlayerPokemonMove import PlayerPokemonMove
+from usuario.models.Pokedex import Pokedex
+from usuario.models.PokedexProgress import PokedexProgress, StalePokedexError
+from usuario.models.Trainer import Trainer
+from usuario.models.User import User
+from usuario.services.battle_sessions import battle_sessions
+from usuario.services.experience import award_experience, award_team_experience, level_for_experience
+from usuario.services.healing import heal_players
+from usuario.services.leaderboard import RatingIndex, leaderboard, load_around
+from usuario.services.pokedex_progress import register_pokemons
+from usuario.services.pvp_events import STREAM_TICKET_MAX_AGE, pvp_events, stream_ticket
+from usuario.services.pvp_state import MAX_DELTA_GAP, pvp_state_history
+from usuario.services.trainer_rosters import ROSTER_SIZE, TEAMS_PER_TRAINER, TRAINER_LEVELS, location_trainers, trainer_roster
+from usuario.services.wild_battles import start_wild_battles
+
+
+def create_species(pokedex_id, name, type1='normal', type2=None, **base_stats):
+    stats = {
+        'base_hp': 45, 'base_attack': 49, 'base_defense': 49,
+        'base_special_attack': 65, 'base_special_defense': 65, 'base_speed': 45,
+    }
+    stats.update(base_stats)
+    return Pokemon.objects.create(
+        pokedex_id=pokedex_id, name=name, type1=type1, type2=type2,
+        experience_growth=70,
+        sprite_front=f'https://example.com/{pokedex_id}.png',
+        sprite_back=f'https://example.com/back/{pokedex_id}.png',
+        **stats
+    )
+
+
+def create_player(username):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='secret')
+    location = Location.objects.create(name=f'Ruta de {username}', location_type='route')
+    return Player.objects.create(user=user, current_location=location)
+
+
+def create_player_pokemon(player, species, moves, level=50, **extra):
+    player_pokemon = PlayerPokemon.objects.create(player=player, pokemon=species, level=level, **extra)
+    player_pokemon.set_moves(moves)
+    return player_pokemon
+
+
+WRITE_THROUGH = {'CACHE_ALIAS': None, 'MAX_SESSIONS': 1000, 'FLUSH_INTERVAL': 0}
+
+
+class BattleTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.species = create_species(1, 'Bulbasaur', 'grass', 'poison', base_hp=250)
+        cls.wild_species = create_species(16, 'Pidgey', 'normal', 'flying')
+        cls.moves = [
+            Move.objects.create(name=f'move-{i}', type='normal', power=1, accuracy=100, pp=30,
+                                damage_class='physical')
+            for i in range(4)
+        ]
+        cls.player = create_player('ash')
+        cls.player_pokemon = create_player_pokemon(cls.player, cls.species, cls.moves)
+
+    def setUp(self):
+        battle_sessions.clear()
+        # Las sesiones guardan instancias de este test: no deben llegar al siguiente
+        self.addCleanup(battle_sessions.clear)
+        # El registro de game_data se carga una vez por proceso, no por turno
+        get_game_data()
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def start_wild_battle(self, moves):
+        battle = Battle.objects.create(
+            player=self.player, player_pokemon=self.player_pokemon,
+            wild_pokemon=self.wild_species, wild_level=5,
+            wild_current_hp=10000, wild_max_hp=10000, wild_move_ids=[move.id for move in moves]
+        )
+        return battle
+
+    def start_trainer_battle(self):
+        move = {'id': self.moves[0].id, 'name': 'move-0', 'type': 'normal', 'power': 1,
+                'accuracy': 100, 'pp': 30, 'damage_class': 'physical'}
+        opponent = {
+            'pokemon_id': self.wild_species.id, 'pokemon_name': 'Pidgey', 'level': 5,
+            'current_hp': 10000, 'max_hp': 10000, 'attack': 10, 'defense': 10,
+            'special_attack': 10, 'special_defense': 10, 'speed': 10,
+            'type1': 'normal', 'type2': 'flying', 'moves': [move],
+        }
+        return Battle.objects.create(
+            battle_type='trainer', player=self.player, player_pokemon=self.player_pokemon,
+            trainer_name='Rival', trainer_team=[opponent, dict(opponent)]
+        )
+
+    def attack(self, battle):
+        response = self.client.post(f'/api/auth/battles/{battle.id}/attack/', {'move_id': self.moves[0].id},
+                                    format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+
+class BattleTurnQueryCountTest(BattleTestCase):
+    """Un turno de attack debe hacer siempre el mismo número de consultas."""
+
+    # battle + prefetch de huecos de movimiento, solo si el combate no está en memoria
+    LOAD_QUERIES = 2
+    # SAVEPOINT, UPDATE player_pokemons, UPDATE player_pokemon_moves, UPDATE battles, RELEASE
+    FLUSH_QUERIES = 5
+
+    def test_wild_turn_query_count(self):
+        battle = self.start_wild_battle(self.moves[:1])
+        with self.assertNumQueries(self.LOAD_QUERIES):
+            self.attack(battle)
+        for _ in range(3):
+            with self.assertNumQueries(0):
+                self.attack(battle)
+
+    @override_settings(BATTLE_SESSIONS=WRITE_THROUGH)
+    def test_wild_turn_query_count_does_not_depend_on_move_count(self):
+        battle = self.start_wild_battle(self.moves)
+        with self.assertNumQueries(self.LOAD_QUERIES + self.FLUSH_QUERIES):
+            self.attack(battle)
+        with self.assertNumQueries(self.FLUSH_QUERIES):
+            self.attack(battle)
+
+    def test_trainer_turn_query_count(self):
+        battle = self.start_trainer_battle()
+        with self.assertNumQueries(self.LOAD_QUERIES):
+            self.attack(battle)
+        for _ in range(3):
+            with self.assertNumQueries(0):
+                self.attack(battle)
+
+    @override_settings(BATTLE_SESSIONS=WRITE_THROUGH)
+    def test_turn_persists_pp_and_hp(self):
+        battle = self.start_wild_battle(self.moves[:1])
+        response = self.attack(battle)
+
+        self.player_pokemon.refresh_from_db()
+        battle.refresh_from_db()
+        self.assertEqual(self.player_pokemon.get_move_slot(self.moves[0].id).current_pp, 29)
+        self.assertEqual(response.data['battle_state']['player_pokemon']['current_hp'],
+                         self.player_pokemon.current_hp)
+        self.assertLess(battle.wild_current_hp, 10000)
+
+
+class BattleSessionStoreTest(BattleTestCase):
+    """Escritura diferida de los combates activos y recuperación desde la base de datos."""
+
+    def stored_pp(self):
+        return PlayerPokemonMove.objects.get(player_pokemon=self.player_pokemon, move=self.moves[0]).current_pp
+
+    def test_turns_are_written_behind(self):
+        battle = self.start_wild_battle(self.moves[:1])
+        self.attack(battle)
+        self.attack(battle)
+        self.assertEqual(self.stored_pp(), 30)
+
+        battle_sessions.flush_all()
+        self.assertEqual(self.stored_pp(), 28)
+
+    def test_recovers_from_last_flush(self):
+        battle = self.start_wild_battle(self.moves[:1])
+        with override_settings(BATTLE_SESSIONS=WRITE_THROUGH):
+            self.attack(battle)
+        self.attack(battle)
+
+        # Se pierde la memoria del proceso: se sigue desde la última escritura
+        battle_sessions.clear()
+        response = self.attack(battle)
+        moves = response.data['battle_state']['player_pokemon']['moves']
+        self.assertEqual(moves[0]['current_pp'], 28)
+
+    def test_battle_end_flushes_and_forgets_session(self):
+        battle = self.start_wild_battle(self.moves[:1])
+        self.attack(battle)
+
+        response = self.client.post(f'/api/auth/battles/{battle.id}/flee/')
+        self.assertEqual(response.status_code, 200)
+        battle.refresh_from_db()
+        self.assertEqual(battle.state, 'fled')
+        self.assertEqual(self.stored_pp(), 29)
+
+        response = self.client.post(f'/api/auth/battles/{battle.id}/attack/', {'move_id': self.moves[0].id},
+                                    format='json')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(BATTLE_SESSIONS={'CACHE_ALIAS': None, 'MAX_SESSIONS': 1, 'FLUSH_INTERVAL': 30})
+    def test_eviction_flushes_battle(self):
+        first = self.start_wild_battle(self.moves[:1])
+        second = self.start_wild_battle(self.moves[:1])
+        self.attack(first)
+        self.attack(second)
+
+        first.refresh_from_db()
+        self.assertLess(first.wild_current_hp, 10000)
+
+    @override_settings(
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'battles': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'battles'},
+        },
+        BATTLE_SESSIONS={'CACHE_ALIAS': 'battles', 'MAX_SESSIONS': 1000, 'FLUSH_INTERVAL': 30}
+    )
+    def test_django_cache_backend(self):
+        battle = self.start_wild_battle(self.moves[:1])
+        load_queries = BattleTurnQueryCountTest.LOAD_QUERIES
+        flush_queries = BattleTurnQueryCountTest.FLUSH_QUERIES
+        with self.assertNumQueries(load_queries + flush_queries):
+            self.attack(battle)
+        # La caché ahorra las lecturas; cada turno se escribe porque la entrada puede desaparecer
+        with self.assertNumQueries(flush_queries):
+            response = self.attack(battle)
+        moves = response.data['battle_state']['player_pokemon']['moves']
+        self.assertEqual(moves[0]['current_pp'], 28)
+        self.assertEqual(self.stored_pp(), 28)
+
+    def test_stale_sessions_are_flushed_without_another_turn(self):
+        battle = self.start_wild_battle(self.moves[:1])
+        self.attack(battle)
+
+        battle_sessions.flush_stale()
+        self.assertEqual(self.stored_pp(), 30)
+
+        # Pasado FLUSH_INTERVAL el hilo de fondo escribe el combate aunque no se juegue otro turno
+        with override_settings(BATTLE_SESSIONS={'CACHE_ALIAS': None, 'MAX_SESSIONS': 1000, 'FLUSH_INTERVAL': 0}):
+            battle_sessions.flush_stale()
+        self.assertEqual(self.stored_pp(), 29)
+
+    def test_team_reads_see_unsaved_turns(self):
+        battle = self.start_wild_battle(self.moves[:1])
+        self.attack(battle)
+
+        response = self.client.get(f'/api/auth/player-pokemons/{self.player_pokemon.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['moves_details'][0]['current_pp'], 29)
+        self.assertEqual(self.stored_pp(), 29)
+
+    def test_shop_and_center_during_battle_are_kept(self):
+        town = Location.objects.create(name='Pueblo Paleta', location_type='town')
+        self.player.current_location = town
+        self.player.money = 1000
+        self.player.save()
+        Bag.objects.get_or_create(player=self.player)
+        item = ShopItem.objects.create(name='Poción', item_type='potion', price=300, description='Cura 20 PS')
+
+        battle = self.start_wild_battle(self.moves[:1])
+        self.attack(battle)
+        self.player_pokemon.refresh_from_db()
+
+        # Compra y cura a mitad de combate; el combate en memoria no debe deshacerlas al ganar
+        self.assertEqual(self.client.post(f'/api/game/shop/{item.id}/buy/').status_code, 200)
+        self.assertEqual(self.client.post('/api/auth/pokemon-center/heal_team/').status_code, 200)
+        Battle.objects.filter(pk=battle.pk).update(wild_current_hp=1)
+        response = self.attack(battle)
+        self.assertTrue(response.data['won'])
+
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.money, 1000 - item.price + battle.wild_level * 5)
+        self.assertEqual(self.player.current_location, town)
+        self.player_pokemon.refresh_from_db()
+        self.assertEqual(self.player_pokemon.current_hp, self.player_pokemon.hp)
+        self.assertEqual(self.stored_pp(), 29)
+
+    def test_move_changes_during_battle_are_kept(self):
+        new_move = Move.objects.create(name='vine-whip', type='grass', power=45, accuracy=100, pp=25,
+                                       damage_class='physical')
+        PokemonMove.objects.create(pokemon=self.species, move=new_move, level=1)
+        get_game_data()
+
+        battle = self.start_wild_battle(self.moves[:1])
+        self.attack(battle)
+
+        # El hueco reutilizado no debe recibir los PP del movimiento antiguo al escribir el combate
+        response = self.client.post(f'/api/auth/player-pokemons/{self.player_pokemon.id}/replace_move/',
+                                    {'old_move_id': self.moves[0].id, 'new_move_id': new_move.id}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        response = self.client.post(f'/api/auth/player-pokemons/{self.player_pokemon.id}/forget_move/',
+                                    {'move_id': self.moves[1].id}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        battle_sessions.flush_all()
+
+        slots = {slot.move_id: slot.current_pp for slot in PlayerPokemonMove.objects.filter(
+            player_pokemon=self.player_pokemon)}
+        self.assertEqual(slots, {new_move.id: 25, self.moves[2].id: 30, self.moves[3].id: 30})
+
+        # El combate sigue con los movimientos que el Pokémon conoce ahora
+        response = self.client.post(f'/api/auth/battles/{battle.id}/attack/', {'move_id': self.moves[1].id},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(f'/api/auth/battles/{battle.id}/attack/', {'move_id': new_move.id},
+                                    format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+
+def pvp_pokemon(name, hp=100000, pp=100000):
+    move = {'id': 1, 'name': 'tackle', 'type': 'normal', 'power': 40, 'accuracy': 100,
+            'pp': pp, 'current_pp': pp, 'damage_class': 'physical'}
+    return {
+        'pokemon_id': 1, 'pokemon_name': name, 'level': 50, 'current_hp': hp, 'max_hp': hp,
+        'attack': 60, 'defense': 60, 'special_attack': 60, 'special_defense': 60, 'speed': 60,
+        'type1': 'normal', 'type2': None, 'moves': [move],
+    }
+
+
+def create_pvp_battle(player1, player2):
+    return Battle.objects.create(
+        battle_type='pvp', battle_format='1vs1', state='active',
+        player1=player1, player2=player2, current_turn=player1,
+        player1_team=[pvp_pokemon('Rattata')], player2_team=[pvp_pokemon('Pidgey')]
+    )
+
+
+class WildBattleStartTest(BattleTestCase):
+    def setUp(self):
+        super().setUp()
+        WildPokemonEncounter.objects.create(location=self.player.current_location, pokemon=self.wild_species,
+                                            min_level=3, max_level=3, rarity='common')
+        for level, move in enumerate(self.moves[:3], start=1):
+            PokemonMove.objects.create(pokemon=self.wild_species, move=move, level=level * 2)
+        get_game_data()
+
+    def test_pool_templates(self):
+        template = wild_encounter_pool(self.player.current_location.id).sample()
+
+        self.assertEqual(template.level, 3)
+        self.assertEqual(template.hp, calculate_hp(self.wild_species.base_hp, 3))
+        self.assertEqual(template.move_ids, (self.moves[0].id,))
+
+    def test_start_is_one_battle_insert(self):
+        # Pokémon activo + prefetch, INSERT battles, bits de la Pokédex y su escritura en un savepoint
+        # (progreso + historial); perfil y ubicación ya en memoria
+        with self.assertNumQueries(8):
+            response = self.client.post('/api/auth/battles/start_wild_battle/')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        battle = Battle.objects.get(id=response.data['battle_id'])
+        self.assertEqual(battle.wild_move_ids, [self.moves[0].id])
+        self.assertEqual([move.id for move in battle.wild_moves], [self.moves[0].id])
+        self.assertTrue(Pokedex.objects.filter(player=self.player, pokemon=self.wild_species).exists())
+
+        # Especie ya vista: la Pokédex solo cuesta leer los bits
+        with self.assertNumQueries(4):
+            response = self.client.post('/api/auth/battles/start_wild_battle/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(Pokedex.objects.filter(player=self.player).count(), 1)
+
+    def test_start_writes_the_abandoned_battle_first(self):
+        abandoned = self.start_wild_battle(self.moves[:1])
+        Battle.objects.filter(pk=abandoned.pk).update(wild_level=100)
+        hp = self.attack(abandoned).data['battle_state']['player_pokemon']['current_hp']
+        self.assertLess(hp, self.player_pokemon.hp)
+
+        # El combate abandonado no se cura al empezar otro ni escribe encima del nuevo más tarde
+        response = self.client.post('/api/auth/battles/start_wild_battle/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['player_pokemon']['current_hp'], hp)
+
+        battle = Battle.objects.get(pk=response.data['battle_id'])
+        hp = self.attack(battle).data['battle_state']['player_pokemon']['current_hp']
+        battle_sessions.flush_all()
+        self.player_pokemon.refresh_from_db()
+        self.assertEqual(self.player_pokemon.current_hp, hp)
+
+    def test_batch_start(self):
+        templates = wild_encounter_pool(self.player.current_location.id).sample_many(5)
+
+        with self.assertNumQueries(6):
+            battles = start_wild_battles(self.player, self.player_pokemon, templates)
+
+        self.assertEqual(Battle.objects.filter(player=self.player, battle_type='wild').count(), 5)
+        self.assertTrue(all(battle.wild_max_hp == templates[0].hp for battle in battles))
+
+
+class TrainerRosterTest(BattleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.route = self.player.current_location
+        WildPokemonEncounter.objects.create(location=self.route, pokemon=self.wild_species,
+                                            min_level=3, max_level=3, rarity='common')
+        for level, move in enumerate(self.moves, start=1):
+            PokemonMove.objects.create(pokemon=self.wild_species, move=move, level=level * 2)
+        # Sin entrenadores guardados en la ruta: se usan las plantillas aleatorias
+        location_trainers(self.route.id)
+
+    def test_roster_templates(self):
+        roster = trainer_roster(self.route.id, 'gym_leader')
+
+        self.assertEqual(len(roster.templates), ROSTER_SIZE)
+        self.assertIs(roster, trainer_roster(self.route.id, 'gym_leader'))
+        member = roster.templates[0].team()[0]
+        self.assertTrue(TRAINER_LEVELS['gym_leader'][0] <= member['level'] <= TRAINER_LEVELS['gym_leader'][1])
+        # Los 4 últimos movimientos aprendidos, del más reciente al más antiguo
+        self.assertEqual([move['id'] for move in member['moves']], [move.id for move in reversed(self.moves)])
+        self.assertFalse(trainer_roster(Location.objects.create(name='Vacía', location_type='route').id, 'beginner'))
+
+    def test_start_is_one_battle_insert(self):
+        # Pokémon activo + prefetch de movimientos y un INSERT en battles
+        with self.assertNumQueries(3):
+            response = self.client.post('/api/auth/battles/start_trainer_battle/')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        battle = Battle.objects.get(id=response.data['battle_id'])
+        self.assertEqual(battle.trainer_team[0]['pokemon_name'], 'Pidgey')
+        self.assertEqual(len(battle.trainer_team), response.data['trainer']['team_size'])
+
+    def test_saved_trainer_teams_are_seeded(self):
+        trainer = Trainer.objects.create(name='Cazabichos Juan', trainer_type='beginner', location=self.route,
+                                         min_level=5, max_level=20, team_size=3, money_reward=120)
+
+        self.assertEqual(trainer.generate_team(seed=1), trainer.generate_team(seed=1))
+        team = trainer.generate_team(seed=1)
+        self.assertEqual(len(team), 3)
+        self.assertEqual(json.loads(json.dumps(team)), team)
+        self.assertEqual(len(location_trainers(self.route.id).templates), TEAMS_PER_TRAINER)
+
+    def test_saved_trainers_are_used_by_battles(self):
+        Trainer.objects.create(name='Cazabichos Juan', trainer_type='beginner', location=self.route,
+                               dialogue_before='¡Mis bichos son los mejores!', money_reward=120)
+        self.client.post('/api/auth/battles/start_trainer_battle/')  # Genera los equipos de la ubicación
+
+        with self.assertNumQueries(3):
+            response = self.client.post('/api/auth/battles/start_trainer_battle/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['trainer']['name'], 'Cazabichos Juan')
+        self.assertEqual(response.data['message'], '¡Mis bichos son los mejores!')
+        self.assertEqual(response.data['trainer']['money_reward'], 120)
+
+        Trainer.objects.all().delete()
+        self.assertFalse(location_trainers(self.route.id))
+
+    def test_battles_do_not_share_the_template(self):
+        roster = trainer_roster(self.route.id, 'beginner')
+        team = roster.templates[0].team()
+        team[0]['current_hp'] = 0
+
+        self.assertGreater(roster.templates[0].team()[0]['current_hp'], 0)
+
+
+class ExperienceTest(TestCase):
+    def setUp(self):
+        self.base = create_species(1, 'Bulbasaur', 'grass', 'poison')
+        self.middle = create_species(2, 'Ivysaur', 'grass', 'poison', base_hp=60)
+        self.final = create_species(3, 'Venusaur', 'grass', 'poison', base_hp=80)
+        Pokemon.objects.filter(pk=self.middle.pk).update(evolves_from=self.base, evolution_level=16)
+        Pokemon.objects.filter(pk=self.final.pk).update(evolves_from=self.middle, evolution_level=32)
+        self.player = create_player('red')
+        self.player_pokemon = create_player_pokemon(self.player, self.base, [], level=10, experience=1000)
+        get_game_data()
+
+    def test_level_for_experience(self):
+        self.assertEqual(level_for_experience(999), 9)
+        self.assertEqual(level_for_experience(1000), 10)
+        self.assertEqual(level_for_experience(64 ** 3 - 1), 63)
+        self.assertEqual(level_for_experience(10 ** 9), 100)
+        self.assertEqual(level_for_experience(0, current_level=5), 5)
+
+    def test_multi_level_reward_evolves_twice(self):
+        player_pokemon = PlayerPokemon.objects.get(pk=self.player_pokemon.pk)
+
+        # UPDATE player_pokemons + bits de la Pokédex y su escritura en un savepoint (progreso + historial)
+        with self.assertNumQueries(6):
+            result = award_experience(player_pokemon, 40 ** 3 - 1000)
+
+        self.assertEqual((result.old_level, result.new_level), (10, 40))
+        self.assertEqual([pokemon.name for pokemon in result.evolutions], ['Ivysaur', 'Venusaur'])
+
+        player_pokemon.refresh_from_db()
+        self.assertEqual(player_pokemon.level, 40)
+        self.assertEqual(player_pokemon.pokemon_id, self.final.id)
+        self.assertEqual(player_pokemon.hp, calculate_hp(80, 40))
+        self.assertEqual(player_pokemon.current_hp, player_pokemon.hp)
+        self.assertEqual(
+            set(Pokedex.objects.filter(player=self.player, state='caught').values_list('pokemon__name', flat=True)),
+            {'Ivysaur', 'Venusaur'}
+        )
+
+    def test_small_reward_keeps_level(self):
+        self.assertFalse(self.player_pokemon.add_experience(10))
+
+        self.player_pokemon.refresh_from_db()
+        self.assertEqual((self.player_pokemon.level, self.player_pokemon.experience), (10, 1010))
+
+    def test_team_reward_is_constant_queries(self):
+        for _ in range(4):
+            create_player_pokemon(self.player, self.base, [], level=5, experience=125)
+
+        with self.assertNumQueries(7):
+            results = award_team_experience(self.player, 20 ** 3)
+
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result.evolved for result in results))
+        self.assertEqual(Pokedex.objects.filter(player=self.player).count(), 1)
+
+
+class PlayerPokemonSaveTest(TestCase):
+    def setUp(self):
+        self.species = create_species(1, 'Bulbasaur', 'grass', 'poison')
+        self.moves = [
+            Move.objects.create(name=f'move-{i}', type='normal', power=40, accuracy=100, pp=10 + i,
+                                damage_class='physical')
+            for i in range(2)
+        ]
+        self.player = create_player('misty')
+        self.team = [create_player_pokemon(self.player, self.species, self.moves, level=10) for _ in range(5)]
+        self.reserve = create_player_pokemon(self.player, self.species, [], level=10, in_team=False)
+        get_game_data()
+
+    def test_fast_path_is_one_update(self):
+        player_pokemon = PlayerPokemon.objects.get(pk=self.team[0].pk)
+        player_pokemon.current_hp = 1
+
+        with self.assertNumQueries(1):
+            player_pokemon.save(update_fields=['current_hp'])
+
+    def test_unchanged_team_member_does_not_reorder(self):
+        player_pokemon = PlayerPokemon.objects.get(pk=self.team[0].pk)
+        player_pokemon.current_hp = 1
+
+        with self.assertNumQueries(1):
+            player_pokemon.save()
+        self.assertEqual(PlayerPokemon.objects.get(pk=self.team[0].pk).order, 0)
+
+    def test_level_change_recalculates_stats_without_refetch(self):
+        player_pokemon = PlayerPokemon.objects.get(pk=self.team[1].pk)
+        player_pokemon.level = 20
+
+        with self.assertNumQueries(1):
+            player_pokemon.save()
+        self.assertEqual(PlayerPokemon.objects.get(pk=player_pokemon.pk).hp, calculate_hp(45, 20))
+
+    def test_joining_team_reorders_in_constant_queries(self):
+        PlayerPokemon.objects.filter(pk=self.team[2].pk).update(order=4)
+        reserve = PlayerPokemon.objects.get(pk=self.reserve.pk)
+        reserve.in_team = True
+
+        # MAX(order), UPDATE, lectura del equipo y un bulk_update
+        with self.assertNumQueries(4):
+            reserve.save()
+
+        orders = list(PlayerPokemon.objects.filter(player=self.player, in_team=True)
+                      .order_by('order').values_list('id', flat=True))
+        self.assertEqual(orders[-1], reserve.pk)
+        self.assertEqual(len(orders), 6)
+
+
+class MoveSlotTest(TestCase):
+    def setUp(self):
+        self.species = create_species(1, 'Bulbasaur', 'grass', 'poison')
+        self.moves = [
+            Move.objects.create(name=f'move-{i}', type='normal', power=40, accuracy=100, pp=10 + i,
+                                damage_class='physical')
+            for i in range(5)
+        ]
+        for move in self.moves:
+            PokemonMove.objects.create(pokemon=self.species, move=move, level=1)
+        self.player = create_player('brock')
+        self.player_pokemon = create_player_pokemon(self.player, self.species, self.moves[:3], level=10)
+        get_game_data()
+
+    def test_moves_and_pp_load_in_one_query(self):
+        player_pokemon = PlayerPokemon.objects.get(pk=self.player_pokemon.pk)
+
+        with self.assertNumQueries(1):
+            slots = player_pokemon.get_move_slots()
+            player_pokemon.get_moves()
+            player_pokemon.get_move_slot(self.moves[2].id)
+
+        self.assertEqual([slot.slot for slot in slots], [0, 1, 2])
+        self.assertEqual([slot.move.name for slot in slots], ['move-0', 'move-1', 'move-2'])
+        self.assertEqual([slot.current_pp for slot in slots], [10, 11, 12])
+
+    def test_slot_order_is_kept(self):
+        self.player_pokemon.forget_move(self.moves[1])
+        self.player_pokemon.teach_move(self.moves[3])
+        self.player_pokemon.replace_move(self.moves[0], self.moves[4])
+
+        player_pokemon = PlayerPokemon.objects.get(pk=self.player_pokemon.pk)
+        self.assertEqual([move.name for move in player_pokemon.get_moves()], ['move-4', 'move-3', 'move-2'])
+        self.assertEqual(player_pokemon.get_move_slot(self.moves[4].id).current_pp, 14)
+
+    def test_center_restores_pp(self):
+        PlayerPokemonMove.objects.filter(player_pokemon=self.player_pokemon).update(current_pp=0)
+        PlayerPokemon.objects.filter(pk=self.player_pokemon.pk).update(current_hp=1)
+        self.player.current_location.location_type = 'town'
+        self.player.current_location.save()
+
+        client = APIClient()
+        client.force_authenticate(self.player.user)
+        # UPDATE de PS + UPDATE de PP sin importar el tamaño del equipo (perfil y ubicación ya en memoria)
+        with self.assertNumQueries(2):
+            response = client.post('/api/auth/pokemon-center/heal_team/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['healed_count'], 1)
+
+        self.assertEqual(list(PlayerPokemonMove.objects.filter(player_pokemon=self.player_pokemon)
+                              .values_list('current_pp', flat=True)), [10, 11, 12])
+        self.player_pokemon.refresh_from_db()
+        self.assertEqual(self.player_pokemon.current_hp, self.player_pokemon.hp)
+
+
+class HealingTest(TestCase):
+    def setUp(self):
+        species = create_species(1, 'Bulbasaur', 'grass', 'poison')
+        move = Move.objects.create(name='Tackle', type='normal', power=40, accuracy=100, pp=35,
+                                   damage_class='physical')
+        self.players = [create_player(f'trainer{i}') for i in range(3)]
+        self.team = [create_player_pokemon(player, species, [move]) for player in self.players]
+        self.boxed = [create_player_pokemon(player, species, [move], in_team=False) for player in self.players]
+        PlayerPokemon.objects.update(current_hp=0)
+        PlayerPokemonMove.objects.update(current_pp=0)
+
+    def healed_ids(self):
+        return set(PlayerPokemon.objects.filter(current_hp=F('hp')).values_list('id', flat=True))
+
+    def test_heal_many_players_in_two_queries(self):
+        with self.assertNumQueries(2):
+            healed = heal_players(self.players[:2])
+
+        self.assertEqual(healed, 2)
+        self.assertEqual(self.healed_ids(), {self.team[0].id, self.team[1].id})
+        self.assertEqual(PlayerPokemonMove.objects.filter(current_pp=35).count(), 2)
+
+    def test_heal_everyone_with_boxes(self):
+        out = StringIO()
+        call_command('heal_all', boxes=True, stdout=out)
+
+        self.assertIn('6 Pokémon curados', out.getvalue())
+        self.assertEqual(len(self.healed_ids()), 6)
+        self.assertFalse(PlayerPokemonMove.objects.exclude(current_pp=35).exists())
+
+
+class PokedexCatalogTest(TestCase):
+    def setUp(self):
+        self.player = create_player('oak')
+        self.species = [create_species(i, f'Especie{i}') for i in range(1, 7)]
+        evolved = self.species[1]
+        evolved.evolves_from = self.species[0]
+        evolved.evolution_level = 16
+        evolved.save()
+        route = Location.objects.create(name='Ruta 1', location_type='route')
+        WildPokemonEncounter.objects.create(location=route, pokemon=self.species[0],
+                                            min_level=2, max_level=4, rarity='common')
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/auth/pokedex/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_entry_is_prebuilt(self):
+        entry = catalog_entry(self.species[0].id)
+
+        self.assertEqual(entry.evolution_info['evolves_to']['name'], 'Especie2')
+        self.assertEqual(entry.locations[0]['location_name'], 'Ruta 1')
+        self.assertEqual(entry.description, 'Puede ser encontrado en: Ruta 1. Evoluciona a Especie2 al nivel 16')
+        self.assertIs(entry, catalog_entry(self.species[0].id))
+
+    def test_list_queries_do_not_grow_with_entries(self):
+        Pokedex.objects.create(player=self.player, pokemon=self.species[0])
+        self.list_queries()  # Carga el registro
+        few = self.list_queries()
+
+        Pokedex.objects.bulk_create([Pokedex(player=self.player, pokemon=species) for species in self.species[1:]])
+        self.assertEqual(self.list_queries(), few)
+
+        response = self.client.get('/api/auth/pokedex/')
+        data = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual(len(data), 6)
+        self.assertEqual(data[1]['evolution_info']['evolves_from']['name'], 'Especie1')
+
+
+class PokedexProgressTest(TestCase):
+    def setUp(self):
+        self.player = create_player('oak')
+        self.species = [create_species(i, f'Especie{i}') for i in (1, 25, 150)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def test_bits_and_counters(self):
+        self.assertEqual(register_pokemons(self.player, self.species), self.species)
+        self.assertEqual(register_pokemons(self.player, [self.species[1]], 'caught'), [self.species[1]])
+
+        progress = PokedexProgress.objects.get(player=self.player)
+        self.assertEqual((progress.seen_count, progress.caught_count), (3, 1))
+        self.assertTrue(progress.has_seen(150))
+        self.assertTrue(progress.has_caught(25))
+        self.assertFalse(progress.has_caught(1))
+        self.assertEqual(Pokedex.objects.get(player=self.player, pokemon=self.species[1]).state, 'caught')
+
+    def test_already_registered_is_one_read(self):
+        register_pokemons(self.player, self.species[:1], 'caught')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(register_pokemons(self.player, self.species[:1]), [])
+        # Ver de nuevo una especie capturada no la degrada
+        self.assertEqual(Pokedex.objects.get(player=self.player).state, 'caught')
+
+    def test_stale_version_retries(self):
+        register_pokemons(self.player, self.species[:1])
+        PokedexProgress.objects.filter(player=self.player).update(version=F('version') + 1)
+        stale = PokedexProgress.objects.get(player=self.player)
+        stale.version -= 1
+
+        with self.assertRaises(StalePokedexError):
+            stale.save_versioned()
+        self.assertEqual(register_pokemons(self.player, self.species[1:2]), self.species[1:2])
+        self.assertEqual(PokedexProgress.objects.get(player=self.player).seen_count, 2)
+
+    def test_stats_read_counters(self):
+        register_pokemons(self.player, self.species)
+        register_pokemons(self.player, self.species[:2], 'caught')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/auth/pokedex/stats/')
+        self.assertEqual(response.data['seen'], 3)
+        self.assertEqual(response.data['caught'], 2)
+        self.assertEqual(response.data['completion_percentage'], round(2 / 151 * 100, 2))
+
+
+    def test_entries_cannot_be_edited_outside_progress(self):
+        register_pokemons(self.player, self.species[:1], 'caught')
+        entry = Pokedex.objects.get(player=self.player)
+
+        self.assertEqual(self.client.patch(f'/api/auth/pokedex/{entry.id}/', {'state': 'seen'}).status_code, 405)
+        self.assertEqual(self.client.delete(f'/api/auth/pokedex/{entry.id}/').status_code, 405)
+        response = self.client.post('/api/auth/pokedex/', {'pokemon_id': self.species[1].id, 'state': 'seen'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/auth/pokedex/stats/').data['seen'], 2)
+
+
+class LeaderboardTest(TestCase):
+    def setUp(self):
+        # El índice vive en el proceso: no debe arrastrar usuarios de otros tests
+        leaderboard.clear()
+        self.players = [create_player(f'trainer{i}') for i in range(8)]
+        for rating, player in zip((1200, 1100, 1100, 1050, 1000, 990, 980, 900), self.players):
+            User.objects.filter(pk=player.user_id).update(pvp_rating=rating)
+        leaderboard.clear()
+
+    def client_for(self, player):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=player.user_id))
+        return client
+
+    def test_rating_index(self):
+        index = RatingIndex([(1, 'ash', 1000), (2, 'brock', 1100), (3, 'misty', 1100), (4, 'gary', 900)])
+
+        self.assertEqual(index.rank(1100), 1)
+        self.assertEqual(index.rank(1000), 3)
+        self.assertEqual(index.around(1, before=1, after=1), (1, [3, 1, 4]))
+
+        index.update(4, 'gary', 1300)
+        self.assertEqual(index.index_of(4), 0)
+        self.assertEqual(index.rank(1000), 4)
+        index.remove(2)
+        self.assertEqual(len(index), 3)
+
+    def test_rating_index_matches_sorted_order(self):
+        rng = random.Random(7)
+        users = {user_id: (f'user{user_id}', rng.randint(900, 1100)) for user_id in range(200)}
+        index = RatingIndex((user_id, username, rating) for user_id, (username, rating) in users.items())
+        for _ in range(300):
+            user_id = rng.randrange(250)
+            if rng.random() < 0.1:
+                users.pop(user_id, None)
+                index.remove(user_id)
+            else:
+                # Incluye ratings fuera del rango inicial del árbol
+                users[user_id] = (f'user{user_id}', rng.choice((rng.randint(900, 1100), rng.randint(-5000, 9000))))
+                index.update(user_id, *users[user_id])
+
+        ordered = sorted(users, key=lambda user_id: (-users[user_id][1], users[user_id][0]))
+        self.assertEqual(len(index), len(ordered))
+        for position, user_id in enumerate(ordered):
+            rating = users[user_id][1]
+            self.assertEqual(index.index_of(user_id), position)
+            self.assertEqual(index.rank(rating), sum(1 for other in users.values() if other[1] > rating) + 1)
+            start = max(0, position - 2)
+            self.assertEqual(index.around(user_id), (start, ordered[start:position + 3]))
+
+    def test_database_fallback_until_index_is_loaded(self):
+        client = self.client_for(self.players[4])
+        self.assertIsNone(leaderboard.index())
+        without_index = client.get('/api/auth/users/my_ranking/').data
+
+        leaderboard.rebuild()
+        self.assertEqual(client.get('/api/auth/users/my_ranking/').data, without_index)
+        self.assertEqual(without_index['user_stats']['position'], 5)
+
+    def test_unknown_user_is_read_from_database(self):
+        leaderboard.rebuild()
+        # Como un usuario creado en otro proceso: bulk_create no lanza la señal de este
+        User.objects.bulk_create([User(username='newcomer', email='newcomer@example.com', pvp_rating=1060)])
+        newcomer = User.objects.get(username='newcomer')
+
+        with mock.patch.object(leaderboard, 'invalidate_top') as invalidate_top:
+            self.assertEqual(leaderboard.around(newcomer), load_around(newcomer))
+        self.assertEqual(leaderboard.around(newcomer)[0], 1)
+        invalidate_top.assert_not_called()
+        self.assertIsNone(leaderboard.index().index_of(newcomer.id))
+        self.assertEqual(len(leaderboard.index()), 8)
+
+    def test_rebuild_keeps_changes_made_while_loading(self):
+        last = User.objects.get(pk=self.players[-1].user_id)
+        rows = list(User.objects.values_list('id', 'username', 'pvp_rating'))
+
+        def load(rows_iterator):
+            # Cambio de rating mientras se lee la tabla
+            last.pvp_rating = 1500
+            last.save()
+            return RatingIndex(rows)
+
+        with mock.patch('usuario.services.leaderboard.RatingIndex', side_effect=load):
+            leaderboard.rebuild()
+        self.assertEqual(leaderboard.index().index_of(last.id), 0)
+
+    def test_my_ranking_without_count_queries(self):
+        client = self.client_for(self.players[4])
+        leaderboard.rebuild()
+
+        # Solo los vecinos
+        with self.assertNumQueries(1):
+            response = client.get('/api/auth/users/my_ranking/')
+
+        self.assertEqual(response.data['user_stats']['position'], 5)
+        self.assertEqual(response.data['user_stats']['total_players'], 8)
+        self.assertEqual([entry['position'] for entry in response.data['nearby_players']], [3, 4, 5, 6, 7])
+        self.assertTrue(response.data['nearby_players'][2]['is_current_user'])
+
+    def test_top_is_cached_until_ratings_change(self):
+        client = self.client_for(self.players[0])
+        with self.assertNumQueries(1):
+            response = client.get('/api/auth/users/ranking/')
+        self.assertEqual(response.data[0]['username'], 'trainer0')
+        with self.assertNumQueries(0):
+            client.get('/api/auth/users/ranking/')
+
+        last = User.objects.get(pk=self.players[-1].user_id)
+        last.pvp_rating = 1500
+        last.save()
+
+        response = client.get('/api/auth/users/ranking/')
+        self.assertEqual(response.data[0]['username'], 'trainer7')
+        self.assertEqual(leaderboard.rank(1200), 2)
+
+
+class PvPTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.player1 = create_player('red')
+        cls.player2 = create_player('blue')
+
+    def setUp(self):
+        # Los ids se reutilizan entre tests: el historial de versiones no debe arrastrarse
+        pvp_state_history.clear()
+
+    def client_for(self, player):
+        client = APIClient()
+        client.force_authenticate(player.user)
+        return client
+
+
+class PvPConcurrencyTest(PvPTestCase):
+    """Las escrituras de PvP comprueban la versión de la fila: nunca se pierde un turno."""
+
+    def test_stale_copy_cannot_overwrite(self):
+        battle = create_pvp_battle(self.player1, self.player2)
+        first = Battle.objects.get(pk=battle.pk)
+        second = Battle.objects.get(pk=battle.pk)
+
+        first.current_turn = self.player2
+        first.save_versioned()
+
+        second.state = 'draw'
+        with self.assertRaises(StaleBattleError):
+            second.save_versioned()
+
+        battle.refresh_from_db()
+        self.assertEqual(battle.version, 1)
+        self.assertEqual(battle.state, 'active')
+
+    def test_retry_with_old_version_gets_conflict(self):
+        battle = create_pvp_battle(self.player1, self.player2)
+        client = self.client_for(self.player1)
+
+        response = client.post(f'/api/auth/pvp-battles/{battle.id}/attack/', {'move_id': 1, 'version': 0},
+                               format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['battle_state']['version'], 1)
+
+        # El jugador 2 responde y el jugador 1 reintenta su petición antigua
+        response = self.client_for(self.player2).post(f'/api/auth/pvp-battles/{battle.id}/attack/',
+                                                      {'move_id': 1, 'version': 1}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        response = client.post(f'/api/auth/pvp-battles/{battle.id}/attack/', {'move_id': 1, 'version': 0},
+                               format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(response.data['conflict'])
+        self.assertEqual(response.data['battle_state']['version'], 2)
+
+    def test_surrender_twice_counts_once(self):
+        battle = create_pvp_battle(self.player1, self.player2)
+        client = self.client_for(self.player1)
+
+        self.assertEqual(client.post(f'/api/auth/pvp-battles/{battle.id}/surrender/').status_code, 200)
+        self.assertEqual(client.post(f'/api/auth/pvp-battles/{battle.id}/surrender/').status_code, 400)
+
+        self.player2.user.refresh_from_db()
+        self.assertEqual(self.player2.user.battles_won, 1)
+
+
+class PvPConcurrencyStressTest(TransactionTestCase):
+    """Ambos jugadores (y reintentos duplicados) atacan a la vez contra la misma batalla."""
+
+    THREADS_PER_PLAYER = 2
+    REQUESTS_PER_THREAD = 15
+
+    def fire(self, player, battle_id, statuses):
+        client = APIClient()
+        client.force_authenticate(player.user)
+        try:
+            for _ in range(self.REQUESTS_PER_THREAD):
+                response = client.post(f'/api/auth/pvp-battles/{battle_id}/attack/', {'move_id': 1},
+                                       format='json')
+                statuses.append((player.pk, response.status_code))
+        finally:
+            connection.close()
+
+    def test_concurrent_turns_keep_state_consistent(self):
+        player1 = create_player('red')
+        player2 = create_player('blue')
+        battle = create_pvp_battle(player1, player2)
+
+        statuses = []
+        threads = [
+            threading.Thread(target=self.fire, args=(player, battle.id, statuses))
+            for player in (player1, player2)
+            for _ in range(self.THREADS_PER_PLAYER)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(status in (200, 400, 409) for _, status in statuses), statuses)
+        accepted = {player1.pk: 0, player2.pk: 0}
+        for player_pk, status in statuses:
+            if status == 200:
+                accepted[player_pk] += 1
+
+        battle.refresh_from_db()
+        # Cada turno aceptado es exactamente una versión y un PP gastado: ninguno se pierde
+        self.assertEqual(battle.version, accepted[player1.pk] + accepted[player2.pk])
+        self.assertLessEqual(abs(accepted[player1.pk] - accepted[player2.pk]), 1)
+        for team, player in ((battle.player1_team, player1), (battle.player2_team, player2)):
+            move = team[0]['moves'][0]
+            self.assertEqual(move['pp'] - move['current_pp'], accepted[player.pk])
+
+
+class PvPRoomTest(PvPTestCase):
+    """Crear y unirse a una sala escala el equipo a nivel 50 desde sus huecos de movimiento."""
+
+    def test_create_and_join_room(self):
+        species = create_species(25, 'Pikachu', 'electric')
+        moves = [Move.objects.create(name=f'pvp-move-{i}', type='electric', power=40, accuracy=100, pp=30,
+                                     damage_class='special') for i in range(2)]
+        create_player_pokemon(self.player1, species, moves, level=10, in_team=True)
+        create_player_pokemon(self.player2, species, moves[:1], level=10, in_team=True)
+
+        response = self.client_for(self.player1).post('/api/auth/pvp-battles/create_room/',
+                                                      {'battle_format': '1vs1'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        member = response.data['your_team'][0]
+        self.assertEqual(member['level'], 50)
+        self.assertEqual(member['moves'][:2], [
+            {'id': move.id, 'name': move.name, 'type': 'electric', 'power': 40, 'accuracy': 100, 'pp': 30,
+             'current_pp': 30, 'damage_class': 'special'}
+            for move in moves
+        ])
+        self.assertEqual(member['auto_filled_moves'], member['total_moves'] - 2)
+
+        response = self.client_for(self.player2).post('/api/auth/pvp-battles/join_room/',
+                                                      {'room_code': response.data['room_code']}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        battle = Battle.objects.get(pk=response.data['battle_id'])
+        self.assertEqual((battle.state, battle.player2_id), ('active', self.player2.id))
+        self.assertEqual(battle.player2_team[0]['moves'][0]['id'], moves[0].id)
+
+
+class PvPEventStreamTest(PvPTestCase):
+    """El rival recibe cada acción por el stream SSE sin tener que hacer polling."""
+
+    def ticket(self, battle, player):
+        response = self.client_for(player).post(f'/api/auth/pvp-battles/{battle.id}/stream_ticket/')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['ticket']
+
+    def open_stream(self, battle, ticket):
+        return APIClient().get(f'/api/auth/pvp-battles/{battle.id}/events/?ticket={ticket}')
+
+    def read_event(self, stream):
+        name, data = next(stream).decode('utf-8').strip().split('\n')
+        return name[len('event: '):], json.loads(data[len('data: '):])
+
+    def test_opponent_receives_turns(self):
+        battle = create_pvp_battle(self.player1, self.player2)
+
+        # EventSource no manda cabeceras: autenticación por un ticket de corta duración
+        response = self.open_stream(battle, self.ticket(battle, self.player2))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = iter(response.streaming_content)
+
+        name, data = self.read_event(stream)
+        self.assertEqual(name, 'state')
+        self.assertFalse(data['battle_state']['your_turn'])
+
+        client1 = self.client_for(self.player1)
+        client1.post(f'/api/auth/pvp-battles/{battle.id}/attack/', {'move_id': 1}, format='json')
+
+        name, data = self.read_event(stream)
+        self.assertEqual(name, 'attack')
+        changes = data['battle_state']['changes']
+        self.assertTrue(changes['your_turn'])
+        self.assertLess(changes['your_team'][0]['current_hp'], 100000)
+
+        client1.post(f'/api/auth/pvp-battles/{battle.id}/surrender/')
+        name, data = self.read_event(stream)
+        self.assertEqual(name, 'battle_ended')
+        self.assertEqual(data['battle_state']['changes']['winner_username'], 'blue')
+
+        with self.assertRaises(StopIteration):
+            next(stream)
+        self.assertEqual(pvp_events.subscriber_count(battle.id), 0)
+
+    def test_stream_requires_participant(self):
+        battle = create_pvp_battle(self.player1, self.player2)
+        outsider = create_player('green')
+
+        response = self.client_for(outsider).post(f'/api/auth/pvp-battles/{battle.id}/stream_ticket/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.open_stream(battle, stream_ticket(outsider.user, battle.id)).status_code, 404)
+        self.assertEqual(pvp_events.subscriber_count(battle.id), 0)
+
+    def test_ticket_is_bound_to_battle_and_expires(self):
+        battle = create_pvp_battle(self.player1, self.player2)
+        other = create_pvp_battle(self.player1, self.player2)
+        ticket = self.ticket(battle, self.player2)
+
+        self.assertEqual(self.open_stream(other, ticket).status_code, 401)
+        self.assertEqual(self.open_stream(battle, ticket + 'x').status_code, 401)
+        # El token de la API ya no sirve en la URL
+        token = Token.objects.create(user=self.player2.user)
+        response = APIClient().get(f'/api/auth/pvp-battles/{battle.id}/events/?token={token.key}')
+        self.assertEqual(response.status_code, 401)
+
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + STREAM_TICKET_MAX_AGE + 1):
+            self.assertEqual(self.open_stream(battle, ticket).status_code, 401)
+
+    @override_settings(PVP_EVENTS={'MAX_STREAMS': 1})
+    def test_stream_budget(self):
+        battle = create_pvp_battle(self.player1, self.player2)
+        first = self.open_stream(battle, self.ticket(battle, self.player2))
+        self.assertEqual(first.status_code, 200)
+        stream = iter(first.streaming_content)
+        next(stream)
+
+        response = self.open_stream(battle, self.ticket(battle, self.player1))
+        self.assertEqual(response.status_code, 503)
+
+        # Al terminar la batalla el stream se cierra y deja el hueco libre
+        self.client_for(self.player1).post(f'/api/auth/pvp-battles/{battle.id}/surrender/')
+        self.assertEqual(len(list(stream)), 1)
+        subscription = pvp_events.subscribe(battle.id, max_streams=1)
+        self.assertIsNotNone(subscription)
+        pvp_events.unsubscribe(battle.id, subscription)
+
+
+class PvPStateDeltaTest(PvPTestCase):
+    """Con ?since= / version el servidor solo devuelve lo que cambió."""
+
+    def state(self, battle, player, since=None):
+        url = f'/api/auth/pvp-battles/{battle.id}/state/'
+        if since is not None:
+            url += f'?since={since}'
+        response = self.client_for(player).get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_attack_returns_only_changed_fields(self):
+        battle = create_pvp_battle(self.player1, self.player2)
+        full = self.state(battle, self.player1)
+        self.assertIn('your_team', full)
+
+        response = self.client_for(self.player1).post(f'/api/auth/pvp-battles/{battle.id}/attack/',
+                                                      {'move_id': 1, 'version': full['version']}, format='json')
+        delta = response.data['battle_state']
+        self.assertTrue(delta['delta'])
+        self.assertEqual((delta['since'], delta['version']), (0, 1))
+        self.assertEqual(set(delta['changes']), {'your_turn', 'current_turn_username', 'your_team', 'opponent_team'})
+        self.assertEqual(delta['changes']['your_team'], [{'index': 0, 'moves': [{'index': 0, 'current_pp': 99999}]}])
+        self.assertEqual(set(delta['changes']['opponent_team'][0]), {'index', 'current_hp'})
+
+        # El rival ve lo mismo desde su lado
+        changes = self.state(battle, self.player2, since=0)['changes']
+        self.assertTrue(changes['your_turn'])
+        self.assertEqual(changes['your_team'][0]['current_hp'], delta['changes']['opponent_team'][0]['current_hp'])
+
+    def test_up_to_date_client_gets_empty_delta(self):
+        battle = create_pvp_battle(self.player1, self.player2)
+        version = self.state(battle, self.player1)['version']
+        self.assertEqual(self.state(battle, self.player1, since=version)['changes'], {})
+
+    def test_falls_back_to_full_snapshot(self):
+        battle = create_pvp_battle(self.player1, self.player2)
+        self.state(battle, self.player1)
+
+        Battle.objects.filter(pk=battle.pk).update(version=MAX_DELTA_GAP + 1)
+        self.assertIn('your_team', self.state(battle, self.player1, since=0))
+
+        # Versión que este proceso no conoce (p. ej. tras reiniciar)
+        pvp_state_history.clear()
+        self.assertIn('your_team', self.state(battle, self.player1, since=MAX_DELTA_GAP))
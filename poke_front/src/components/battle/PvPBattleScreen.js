@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { getBattleState, pvpAttack, pvpSurrender } from '../../services/pvpService';
+import { getBattleState, mergeBattleState, pvpAttack, pvpSurrender, subscribeToBattle } from '../../services/pvpService';
 import './PvPBattleScreen.css';
 
 const PvPBattleScreen = () => {
@@ -43,8 +43,12 @@ const PvPBattleScreen = () => {
   const enemyHPRef = useRef(0);
   const playerHPRef = useRef(0);
 
-  // Polling interval
+  // Último estado completo: los deltas del servidor se aplican sobre él
+  const battleStateRef = useRef(null);
+
+  // Polling interval (solo si falla el stream de eventos)
   const [pollInterval, setPollInterval] = useState(null);
+  const streamConnectedRef = useRef(false);
   const lastUpdateRef = useRef(Date.now());
 
   // Encontrar Pokémon actual
@@ -53,65 +57,80 @@ const PvPBattleScreen = () => {
     return team[currentIndex] || team[0];
   };
 
-  // Cargar estado de batalla
-  const loadBattleState = async () => {
-    try {
-      const response = await getBattleState(battleId);
-      
-      // Evitar actualizaciones demasiado frecuentes
-      const now = Date.now();
-      if (now - lastUpdateRef.current < 1000) return;
-      lastUpdateRef.current = now;
-      
-      setBattleData(response);
+  // Aplicar un estado de batalla (respuesta de /state o evento del servidor), completo o delta.
+  // Devuelve el estado resultante, o null si hay que pedir el estado completo.
+  const applyBattleState = (incoming) => {
+    const response = mergeBattleState(battleStateRef.current, incoming);
+    if (!response) {
+      loadBattleState(true);
+      return null;
+    }
+    battleStateRef.current = response;
+    setBattleData(response);
+    
+    // Actualizar sprites y HP del jugador
+    const playerPokemon = findCurrentPokemon(
+      response.your_team, 
+      response.your_current_pokemon_index
+    );
+    
+    if (playerPokemon) {
+      setCurrentPlayerPokemon(playerPokemon);
+      setCurrentPlayerSprite(playerPokemon.sprite_back || 
+        `https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/back/${playerPokemon.pokemon_id || 1}.png`);
       
-      // Actualizar sprites y HP del jugador
-      const playerPokemon = findCurrentPokemon(
-        response.your_team, 
-        response.your_current_pokemon_index
-      );
+      setPlayerHP(playerPokemon.current_hp);
+      setPlayerMaxHP(playerPokemon.max_hp);
+      playerHPRef.current = playerPokemon.current_hp;
+    }
+    
+    // Actualizar sprites y HP del oponente
+    const opponentPokemon = findCurrentPokemon(
+      response.opponent_team, 
+      response.opponent_current_pokemon_index
+    );
+    
+    if (opponentPokemon) {
+      setCurrentOpponentPokemon(opponentPokemon);
+      setCurrentEnemySprite(opponentPokemon.sprite_front || 
+        `https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/${opponentPokemon.pokemon_id || 1}.png`);
       
-      if (playerPokemon) {
-        setCurrentPlayerPokemon(playerPokemon);
-        setCurrentPlayerSprite(playerPokemon.sprite_back || 
-          `https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/back/${playerPokemon.pokemon_id || 1}.png`);
-        
-        setPlayerHP(playerPokemon.current_hp);
-        setPlayerMaxHP(playerPokemon.max_hp);
-        playerHPRef.current = playerPokemon.current_hp;
+      setEnemyHP(opponentPokemon.current_hp);
+      setEnemyMaxHP(opponentPokemon.max_hp);
+      enemyHPRef.current = opponentPokemon.current_hp;
+    }
+    
+    // Verificar si la batalla terminó
+    if (response.state === 'finished' || response.winner_username) {
+      setBattleEnded(true);
+      if (pollInterval) {
+        clearInterval(pollInterval);
+        setPollInterval(null);
       }
       
-      // Actualizar sprites y HP del oponente
-      const opponentPokemon = findCurrentPokemon(
-        response.opponent_team, 
-        response.opponent_current_pokemon_index
-      );
-      
-      if (opponentPokemon) {
-        setCurrentOpponentPokemon(opponentPokemon);
-        setCurrentEnemySprite(opponentPokemon.sprite_front || 
-          `https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/${opponentPokemon.pokemon_id || 1}.png`);
-        
-        setEnemyHP(opponentPokemon.current_hp);
-        setEnemyMaxHP(opponentPokemon.max_hp);
-        enemyHPRef.current = opponentPokemon.current_hp;
+      // Agregar mensaje de fin de batalla al log
+      if (response.winner_username) {
+        addToBattleLog(`¡${response.winner_username} ha ganado la batalla!`);
       }
+    }
+    
+    setLoading(false);
+    return response;
+  };
+
+  // Cargar estado de batalla (full = ignorar el estado que ya tenemos)
+  const loadBattleState = async (full = false) => {
+    try {
+      const since = full ? null : battleStateRef.current?.version;
+      if (full) battleStateRef.current = null;
+      const response = await getBattleState(battleId, since);
       
-      // Verificar si la batalla terminó
-      if (response.state === 'finished' || response.winner_username) {
-        setBattleEnded(true);
-        if (pollInterval) {
-          clearInterval(pollInterval);
-          setPollInterval(null);
-        }
-        
-        // Agregar mensaje de fin de batalla al log
-        if (response.winner_username) {
-          addToBattleLog(`¡${response.winner_username} ha ganado la batalla!`);
-        }
-      }
+      // Evitar actualizaciones demasiado frecuentes
+      const now = Date.now();
+      if (!full && now - lastUpdateRef.current < 1000) return;
+      lastUpdateRef.current = now;
       
-      setLoading(false);
+      applyBattleState(response);
     } catch (err) {
       setError('Error al cargar estado de batalla: ' + err.message);
       setLoading(false);
@@ -122,13 +141,41 @@ const PvPBattleScreen = () => {
   // Inicializar batalla
   useEffect(() => {
     loadBattleState();
-    
-    // Configurar polling cada 2 segundos
-    const interval = setInterval(loadBattleState, 2000);
-    setPollInterval(interval);
-    
+
+    // El servidor envía cada acción por SSE; si el stream falla se vuelve al polling cada 2 segundos
+    let interval = null;
+    let finished = false;
+
+    const unsubscribe = subscribeToBattle(
+      battleId,
+      (eventName, data) => {
+        if (eventName === 'state') streamConnectedRef.current = true;
+        const state = data.battle_state ? applyBattleState(data.battle_state) : null;
+
+        // Las acciones propias ya se muestran con la respuesta de la petición. Los eventos
+        // llegan como delta: your_turn está en changes (o en el estado ya aplicado)
+        const yourTurn = state?.your_turn ?? data.battle_state?.changes?.your_turn ?? data.battle_state?.your_turn;
+        if (data.message && eventName !== 'state' && yourTurn) {
+          addToBattleLog(data.message);
+        }
+
+        if (eventName === 'battle_ended' || eventName === 'closed') {
+          finished = true;
+          unsubscribe();
+        }
+      },
+      () => {
+        streamConnectedRef.current = false;
+        if (finished || interval) return;
+        unsubscribe();
+        interval = setInterval(() => loadBattleState(), 2000);
+        setPollInterval(interval);
+      }
+    );
+
     return () => {
-      if (pollInterval) clearInterval(pollInterval);
+      unsubscribe();
+      if (interval) clearInterval(interval);
     };
   }, [battleId]);
 
@@ -197,13 +244,14 @@ const PvPBattleScreen = () => {
         setTimeout(() => setEnemyShaking(false), 500);
       }, 200);
 
-      const response = await pvpAttack(battleId, move.id);
+      const response = await pvpAttack(battleId, move.id, battleStateRef.current?.version);
+      const battleState = mergeBattleState(battleStateRef.current, response.battle_state);
 
       // Actualizar HP si hay daño
-      if (response.damage && response.battle_state) {
+      if (response.damage && battleState) {
         const opponentPokemon = findCurrentPokemon(
-          response.battle_state.opponent_team,
-          response.battle_state.opponent_current_pokemon_index
+          battleState.opponent_team,
+          battleState.opponent_current_pokemon_index
         );
         
         if (opponentPokemon) {
@@ -212,10 +260,12 @@ const PvPBattleScreen = () => {
       }
 
       addToBattleLog(response.message);
+      // El delta de la respuesta lleva el estado a la nueva versión; el evento del stream ya no cambia nada
+      applyBattleState(response.battle_state);
 
-      // Recargar estado para actualizar turno
+      // Sin stream, recargar estado para ver la respuesta del rival
       setTimeout(() => {
-        loadBattleState();
+        if (!streamConnectedRef.current) loadBattleState();
         setActionInProgress(false);
       }, 1500);
 
@@ -1,6 +1,6 @@
 import { getToken, removeToken, removeUser } from '../utils/auth';
 
-const API_BASE_URL = 'http://localhost:8000/api';
+export const API_BASE_URL = 'http://localhost:8000/api';
 
 const handleResponse = async (response) => {
   if (!response.ok) {
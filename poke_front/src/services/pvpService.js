@@ -1,4 +1,4 @@
-import { apiRequest } from './api';
+import { apiRequest, API_BASE_URL } from './api';
 
 export const createRoom = async () => {
   return await apiRequest('/auth/pvp-battles/create_room/', {
@@ -17,14 +17,94 @@ export const joinRoom = async (roomCode) => {
   });
 };
 
-export const getBattleState = async (battleId) => {
-  return await apiRequest(`/auth/pvp-battles/${battleId}/state/`);
+// Con since (última versión recibida) el servidor devuelve solo los cambios
+export const getBattleState = async (battleId, since = null) => {
+  const query = since !== null && since !== undefined ? `?since=${since}` : '';
+  return await apiRequest(`/auth/pvp-battles/${battleId}/state/${query}`);
 };
 
-export const pvpAttack = async (battleId, moveId) => {
+// Aplica un delta ({delta, since, version, changes}) sobre el último estado completo.
+// Un delta que ya tenemos (la respuesta del ataque y su evento llegan los dos) no cambia nada.
+// Devuelve null si el delta no parte de la versión que tenemos: hay que pedir el estado completo.
+export const mergeBattleState = (previous, incoming) => {
+  if (!incoming || !incoming.delta) return incoming;
+  if (previous && incoming.version <= previous.version) return previous;
+  if (!previous || previous.version !== incoming.since) return null;
+
+  const { your_team: yourTeam, opponent_team: opponentTeam, ...fields } = incoming.changes;
+  const merged = { ...previous, ...fields, version: incoming.version };
+
+  const applyTeamChanges = (team, teamChanges) => {
+    if (!teamChanges) return team;
+    const updated = team.map((pokemon) => ({ ...pokemon, moves: pokemon.moves.map((move) => ({ ...move })) }));
+    teamChanges.forEach((change) => {
+      const pokemon = updated[change.index];
+      if (change.current_hp !== undefined) pokemon.current_hp = change.current_hp;
+      (change.moves || []).forEach((moveChange) => {
+        pokemon.moves[moveChange.index].current_pp = moveChange.current_pp;
+      });
+    });
+    return updated;
+  };
+
+  merged.your_team = applyTeamChanges(previous.your_team, yourTeam);
+  merged.opponent_team = applyTeamChanges(previous.opponent_team, opponentTeam);
+  return merged;
+};
+
+// Ticket de corta duración para abrir el stream: el token de la API no va en la URL
+export const getStreamTicket = async (battleId) => {
+  return await apiRequest(`/auth/pvp-battles/${battleId}/stream_ticket/`, {
+    method: 'POST',
+  });
+};
+
+// Stream SSE de la batalla: el servidor avisa de cada acción en vez de hacer polling
+export const subscribeToBattle = (battleId, onEvent, onError) => {
+  let source = null;
+  let closed = false;
+
+  const connect = async () => {
+    let ticket;
+    try {
+      ({ ticket } = await getStreamTicket(battleId));
+    } catch (err) {
+      if (!closed && onError) onError(err);
+      return;
+    }
+    if (closed) return;
+
+    source = new EventSource(
+      `${API_BASE_URL}/auth/pvp-battles/${battleId}/events/?ticket=${encodeURIComponent(ticket)}`
+    );
+
+    ['state', 'joined', 'attack', 'switch', 'use_item', 'battle_ended', 'closed'].forEach((eventName) => {
+      source.addEventListener(eventName, (event) => {
+        onEvent(eventName, JSON.parse(event.data));
+      });
+    });
+
+    // El ticket solo vale para abrir la conexión: si se corta, quien llama decide (polling o reabrir)
+    source.onerror = (err) => {
+      if (onError) onError(err);
+    };
+  };
+
+  connect();
+
+  return () => {
+    closed = true;
+    if (source) source.close();
+  };
+};
+
+export const pvpAttack = async (battleId, moveId, version = null) => {
+  const body = { move_id: moveId };
+  if (version !== null && version !== undefined) body.version = version;
+
   return await apiRequest(`/auth/pvp-battles/${battleId}/attack/`, {
     method: 'POST',
-    body: { move_id: moveId },
+    body,
   });
 };
 